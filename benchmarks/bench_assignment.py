@@ -0,0 +1,62 @@
+"""
+Time the unit -> resource tile assignment for growing numbers of units, with
+costs taken from BFS distances on a random 32x32 map.
+
+    python -m benchmarks.bench_assignment
+"""
+
+import argparse
+import time
+
+import numpy as np
+from utils.assignment import UNREACHABLE_COST, greedy_assignment, hungarian
+from utils.path_finder import UNREACHABLE, multi_source_bfs
+
+
+def bfs_costs(size: int, n_units: int, n_targets: int, seed: int = 0) -> np.ndarray:
+    """
+    units x targets matrix of BFS distances on a map with 15% of obstacles
+    """
+    rng = np.random.default_rng(seed)
+    passable = rng.random((size, size)) > 0.15
+    cells = rng.permutation(size * size)
+    units, targets = cells[:n_units], cells[n_units : n_units + n_targets]
+
+    sources = np.zeros((n_units, size, size), dtype=bool)
+    sources[np.arange(n_units), units // size, units % size] = True
+    dist = multi_source_bfs(passable, sources)
+
+    cost = dist[:, targets // size, targets % size].astype(float)
+    cost[cost == UNREACHABLE] = UNREACHABLE_COST
+    return cost
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=32)
+    parser.add_argument("--targets-per-unit", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for n_units in [10, 50, 100]:
+        cost = bfs_costs(args.size, n_units, args.targets_per_unit * n_units)
+
+        results = {}
+        for label, solver in [("hungarian", hungarian), ("greedy", greedy_assignment)]:
+            best = np.inf
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                assignment = solver(cost)
+                best = min(best, time.perf_counter() - start)
+            total = sum(cost[row, col] for row, col in assignment.items())
+            results[label] = (best, total)
+
+        (h_time, h_total), (g_time, g_total) = results["hungarian"], results["greedy"]
+        print(
+            f"{n_units:>3} units: hungarian {h_time * 1e3:7.2f} ms (cost {h_total:.0f})"
+            f"  greedy {g_time * 1e3:6.2f} ms (cost {g_total:.0f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
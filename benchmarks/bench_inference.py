@@ -0,0 +1,122 @@
+"""
+Policy evaluations per second of agent processes sharing an inference server,
+with and without micro-batching, compared to each process evaluating the
+policy on its own.
+
+    python -m benchmarks.bench_inference [--clients 8] [--requests 500]
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from lux.game import Game
+
+from utils.features import FeatureEncoder
+from utils.inference import InferenceClient, InferenceServer, LinearPolicy
+
+from simulator.observations import synthetic_game
+
+
+def sample_features(size: int, units: int):
+    """
+    Feature planes and unit cells of the last turn of a synthetic game
+    """
+    turns = synthetic_game(size=size, turns=10, units_per_team=units, seed=0)
+    game = Game()
+    game._initialize(turns[0])
+    for i, messages in enumerate(turns):
+        game._update(messages[2:] if i == 0 else messages)
+    features = FeatureEncoder().encode(game, 0)
+    cells = [unit.pos.y * 32 + unit.pos.x for unit in game.players[0].units]
+    return features, cells
+
+
+def run_client(path, features, cells, requests, start, results):
+    client = InferenceClient(path)
+    start.wait()
+    begin = time.perf_counter()
+    for _ in range(requests):
+        client.logits(features, cells)
+    results.put(time.perf_counter() - begin)
+    client.close()
+
+
+def run_local(policy, features, cells, requests, start, results):
+    batch = features[None]
+    start.wait()
+    begin = time.perf_counter()
+    for _ in range(requests):
+        logits = policy(batch).reshape(1, -1, features[0].size)
+        logits[0][:, cells].T.copy()
+    results.put(time.perf_counter() - begin)
+
+
+def measure(target, args, clients: int) -> float:
+    """
+    Requests per second of clients processes running target
+    """
+    context = multiprocessing.get_context("fork")
+    start = context.Barrier(clients)
+    results = context.Queue()
+    processes = [
+        context.Process(target=target, args=args + (start, results))
+        for _ in range(clients)
+    ]
+    for process in processes:
+        process.start()
+    durations = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return clients * args[-1] / max(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--size", type=int, default=32)
+    parser.add_argument("--units", type=int, default=20)
+    parser.add_argument("--max-delay", type=float, default=0.002)
+    args = parser.parse_args()
+
+    policy = LinearPolicy.random()
+    features, cells = sample_features(args.size, args.units)
+    print(f"{args.clients} clients, {len(cells)} units per request")
+
+    per_second = measure(
+        run_local, (policy, features, cells, args.requests), args.clients
+    )
+    print(f"{'local policy':<20} {per_second:>10,.0f} requests/s")
+
+    path = os.path.join(tempfile.mkdtemp(), "policy.sock")
+    for name, max_batch in (("server, batch 1", 1), ("server, batched", 64)):
+        server = InferenceServer(
+            path, policy, max_batch=max_batch, max_delay=args.max_delay
+        )
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            per_second = measure(
+                run_client, (path, features, cells, args.requests), args.clients
+            )
+            metrics = server.metrics.summary()
+        finally:
+            server.shutdown()
+            thread.join()
+            server.close()
+        latency = metrics["latency_ms"]
+        print(
+            f"{name:<20} {per_second:>10,.0f} requests/s,"
+            f" mean batch {metrics['mean_batch']:.1f},"
+            f" latency p50 {latency['p50']:.2f} ms p99 {latency['p99']:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
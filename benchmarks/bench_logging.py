@@ -0,0 +1,91 @@
+"""
+Turn latency of the agent with heavy debug logging: the former log, opening
+log.txt for every message, against the buffered TurnLogger writing at the end
+of the turn or from its background thread.
+
+    python -m benchmarks.bench_logging [--size 32] [--messages 500]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+
+from agent import agent
+from utils import turn_manager
+from utils.logger import DEBUG, TurnLogger
+
+from simulator.observations import Observation, synthetic_game
+
+_CONFIG = {"MAX_CITIES": 100, "MAX_UNITS": 100, "LOG_LEVEL": DEBUG}
+
+
+def append_log(path: str) -> Callable[[str], None]:
+    """
+    Logging as TurnManager.log used to do it
+    """
+
+    def log(message: str) -> None:
+        with open(path, "a") as f:
+            f.write(f"[Turn 0]Team 0: {message}\n")
+
+    return log
+
+
+def time_turns(game, messages: int, log: Callable[[str], None]) -> List[float]:
+    """
+    Time of each agent turn, messages being logged during the turn
+    """
+    times = []
+    for step, updates in enumerate(game):
+        start = time.perf_counter()
+        for i in range(messages):
+            log(f"unit u_{i} moves toward (12, 7) with cargo 42")
+        agent(Observation(updates, step), _CONFIG.copy())
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=32)
+    parser.add_argument("--turns", type=int, default=60)
+    parser.add_argument("--messages", type=int, default=500)
+    args = parser.parse_args()
+
+    game = synthetic_game(size=args.size, turns=args.turns, units_per_team=20)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "log.txt")
+        loggers = {
+            "no logging": TurnLogger(path, level=DEBUG + 1),
+            "end of turn": TurnLogger(path, level=DEBUG, background=False),
+            "background": TurnLogger(
+                path, level=DEBUG, max_records=args.messages, max_pending=64
+            ),
+        }
+
+        # warm up, the planning caches fill during the first turns
+        turn_manager.logger = loggers["no logging"]
+        time_turns(game, 0, loggers["no logging"].debug)
+
+        print(f"{'logging':>12} {'mean':>9} {'p50':>9} {'p99':>9} {'max':>9}")
+        runs = [(name, logger, logger.debug) for name, logger in loggers.items()]
+        runs.insert(1, ("append", loggers["no logging"], append_log(path)))
+        for name, logger, log in runs:
+            turn_manager.logger = logger
+            times = time_turns(game, args.messages, log)
+            logger.close()
+            # the first turn also sets the game up
+            times = sorted(times[1:])
+            print(
+                f"{name:>12} {statistics.mean(times) * 1e3:>7.3f}ms"
+                f" {times[len(times) // 2] * 1e3:>7.3f}ms"
+                f" {times[int(len(times) * 0.99)] * 1e3:>7.3f}ms"
+                f" {times[-1] * 1e3:>7.3f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
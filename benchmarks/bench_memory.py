@@ -0,0 +1,110 @@
+"""
+Memory held by the game state and memory allocated per turn, measured with
+tracemalloc on synthetic games.
+
+    python -m benchmarks.bench_memory [--size 32] [--units 30]
+"""
+
+import argparse
+import gc
+import statistics
+import tracemalloc
+
+from lux.game import Game
+
+from simulator.observations import Observation, synthetic_game
+from simulator.run import load_turn_manager
+
+
+def measure_game(game, turn_fn):
+    """
+    Memory held after the game and, per turn, the blocks and bytes still
+    allocated after the turn and the peak memory during the turn
+    """
+    # tracemalloc.reset_peak is new in Python 3.9
+    reset_peak = hasattr(tracemalloc, "reset_peak")
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.take_snapshot()
+    blocks, sizes, peaks = [], [], []
+    for step, messages in enumerate(game):
+        before = tracemalloc.take_snapshot()
+        if reset_peak:
+            tracemalloc.reset_peak()
+            start_size = tracemalloc.get_traced_memory()[0]
+        turn_fn(step, messages)
+        if reset_peak:
+            peaks.append(tracemalloc.get_traced_memory()[1] - start_size)
+        stats = tracemalloc.take_snapshot().compare_to(before, "filename")
+        blocks.append(sum(stat.count_diff for stat in stats if stat.count_diff > 0))
+        sizes.append(sum(stat.size_diff for stat in stats if stat.size_diff > 0))
+    held = sum(
+        stat.size_diff
+        for stat in tracemalloc.take_snapshot().compare_to(base, "filename")
+    )
+    tracemalloc.stop()
+    if not reset_peak:
+        peaks = turn_peaks(game, turn_fn)
+    # the first turn builds the state
+    return held, blocks[1:], sizes[1:], peaks[1:]
+
+
+def turn_peaks(game, turn_fn):
+    """
+    Peak memory during each turn, playing the game again with a tracemalloc
+    session per turn, without tracemalloc.reset_peak
+    """
+    gc.collect()
+    peaks = []
+    for step, messages in enumerate(game):
+        tracemalloc.start()
+        turn_fn(step, messages)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return peaks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=32)
+    parser.add_argument("--units", type=int, default=30)
+    parser.add_argument("--turns", type=int, default=30)
+    args = parser.parse_args()
+
+    game = synthetic_game(
+        size=args.size,
+        turns=args.turns,
+        units_per_team=args.units,
+        city_tiles_per_team=args.units,
+    )
+
+    state = Game()
+
+    def update(step, messages):
+        if step == 0:
+            state._initialize(messages)
+            messages = messages[2:]
+        state._update(messages)
+
+    turn_manager = load_turn_manager()
+
+    def agent_turn(step, messages):
+        turn_manager.TurnManager(
+            Observation(messages, step), {"MAX_CITIES": 100, "MAX_UNITS": 100}
+        ).play_turn()
+
+    print(
+        f"{'':>12} {'state':>10} {'new blocks':>11} {'new bytes':>10}"
+        f" {'peak bytes':>11}  (per turn, median)"
+    )
+    for name, turn_fn in [("Game._update", update), ("agent turn", agent_turn)]:
+        held, blocks, sizes, peaks = measure_game(game, turn_fn)
+        print(
+            f"{name:>12} {held / 1024:>8.0f}KB {statistics.median(blocks):>11.0f}"
+            f" {statistics.median(sizes):>10.0f} {statistics.median(peaks):>11.0f}"
+        )
+    turn_manager.end_game()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Compare the streaming turn parser (TurnReader + Game._update_block) with
+reading stdin line by line and parsing each line with split and an if/elif
+chain, as main.py and Game._update used to do.
+
+    python -m benchmarks.bench_parser [--units 400] [--resource-ratio 0.6]
+"""
+
+import argparse
+import io
+import time
+from typing import List
+
+from lux.constants import Constants
+from lux.game import Game
+from lux.game_objects import City, Unit
+from lux.parser import TurnReader
+
+from simulator.observations import synthetic_game
+
+INPUT_CONSTANTS = Constants.INPUT_CONSTANTS
+
+
+def line_by_line_update(game: Game, messages: List[str]):
+    """
+    Reference parser: split every line and dispatch on its identifier with an
+    if/elif chain, writing to the game state like Game._update_tokens
+    """
+    game.turn += 1
+    game.map._begin_update()
+    for player in game.players:
+        player._begin_update()
+
+    for update in messages:
+        if update == INPUT_CONSTANTS.DONE:
+            break
+        strs = update.split(" ")
+        input_identifier = strs[0]
+        if input_identifier == INPUT_CONSTANTS.RESEARCH_POINTS:
+            game.players[int(strs[1])].research_points = int(strs[2])
+        elif input_identifier == INPUT_CONSTANTS.RESOURCES:
+            x, y = int(strs[2]), int(strs[3])
+            game.map._setResource(strs[1], x, y, int(float(strs[4])))
+        elif input_identifier == INPUT_CONSTANTS.UNITS:
+            team = int(strs[2])
+            x, y = int(strs[4]), int(strs[5])
+            args = [float(strs[6]), int(strs[7]), int(strs[8]), int(strs[9])]
+            player = game.players[team]
+            pos = game.map.positions.get(x, y)
+            unit = player._prev_units.get(strs[3])
+            if unit is None:
+                unit = Unit(team, int(strs[1]), strs[3], x, y, *args, pos)
+            else:
+                unit._update(pos, *args)
+            player.units.append(unit)
+            game.map._set_unit(x, y, unit)
+        elif input_identifier == INPUT_CONSTANTS.CITY:
+            team = int(strs[1])
+            player = game.players[team]
+            fuel, light_upkeep = float(strs[3]), float(strs[4])
+            city = player._prev_cities.get(strs[2])
+            if city is None:
+                city = City(team, strs[2], fuel, light_upkeep)
+            else:
+                city._update(fuel, light_upkeep)
+            player.cities[strs[2]] = city
+        elif input_identifier == INPUT_CONSTANTS.CITY_TILES:
+            team = int(strs[1])
+            x, y = int(strs[3]), int(strs[4])
+            city = game.players[team].cities[strs[2]]
+            citytile = game.map.get_cell(x, y).citytile
+            if citytile is not None and citytile.cityid == strs[2]:
+                citytile.cooldown = float(strs[5])
+                city.citytiles.append(citytile)
+            else:
+                citytile = city._add_city_tile(x, y, float(strs[5]))
+            game.map._set_citytile(x, y, citytile)
+            game.players[team].city_tile_count += 1
+        elif input_identifier == INPUT_CONSTANTS.ROADS:
+            game.map._set_road(int(strs[1]), int(strs[2]), float(strs[3]))
+
+    game.map._end_update()
+
+
+def new_game(size: int) -> Game:
+    game = Game()
+    game._initialize(["0", f"{size} {size}"])
+    return game
+
+
+def time_line_by_line(data: bytes, size: int, turns: int) -> float:
+    game = new_game(size)
+    stream = io.TextIOWrapper(io.BytesIO(data))
+    start = time.perf_counter()
+    for _ in range(turns):
+        messages = []
+        while True:
+            line = stream.readline().rstrip("\n")
+            messages.append(line)
+            if line == INPUT_CONSTANTS.DONE:
+                break
+        line_by_line_update(game, messages)
+    return (time.perf_counter() - start) / turns
+
+
+def time_streaming(data: bytes, size: int, turns: int) -> float:
+    game = new_game(size)
+    reader = TurnReader(io.BufferedReader(io.BytesIO(data)))
+    start = time.perf_counter()
+    for _ in range(turns):
+        game._update_block(reader.read_turn())
+    return (time.perf_counter() - start) / turns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=32)
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--units", type=int, default=400)
+    parser.add_argument("--resource-ratio", type=float, default=0.6)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    game = synthetic_game(
+        size=args.size,
+        turns=args.turns,
+        units_per_team=args.units,
+        city_tiles_per_team=60,
+        resource_ratio=args.resource_ratio,
+    )
+    # the header lines of the first turn are handled by Game._initialize
+    game[0] = game[0][2:]
+    lines = sum(len(messages) for messages in game) // len(game)
+    data = "".join(line + "\n" for messages in game for line in messages).encode()
+    print(f"{lines} lines per turn")
+
+    for label, timer in [
+        ("line by line", time_line_by_line),
+        ("streaming", time_streaming),
+    ]:
+        best = min(timer(data, args.size, args.turns) for _ in range(args.repeat))
+        print(f"{label:>12}: {best * 1e3:.3f} ms/turn")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compare bfs and astar on random grids of the Lux map sizes.
+
+    python -m benchmarks.bench_path_finder
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+from utils.path_finder import END, EMPTY, START, WALL, astar, bfs
+
+
+def random_grids(size: int, count: int, wall_ratio: float, seed: int = 0):
+    """
+    Grids with a START and an END cell at opposite corners of the map
+    """
+    rng = random.Random(seed)
+    grids = []
+    for _ in range(count):
+        grid = np.full((size, size), EMPTY, dtype=np.int8)
+        for y in range(size):
+            for x in range(size):
+                if rng.random() < wall_ratio:
+                    grid[y][x] = WALL
+        start = (rng.randrange(size // 4), rng.randrange(size // 4))
+        end = (size - 1 - rng.randrange(size // 4), size - 1 - rng.randrange(size // 4))
+        grid[end[1]][end[0]] = END
+        grid[start[1]][start[0]] = START
+        grids.append((grid, start))
+    return grids
+
+
+def time_search(search, grids) -> float:
+    """
+    Return the mean time in seconds of one search
+    """
+    start = time.perf_counter()
+    for grid, start_pos in grids:
+        search(grid, start_pos)
+    return (time.perf_counter() - start) / len(grids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=50)
+    parser.add_argument("--wall-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    for size in [12, 16, 24, 32]:
+        grids = random_grids(size, args.count, args.wall_ratio)
+        bfs_time = time_search(bfs, grids)
+        astar_time = time_search(astar, grids)
+        print(
+            f"{size:>2}x{size:<2} bfs: {bfs_time * 1e3:.3f} ms  "
+            f"astar: {astar_time * 1e3:.3f} ms  x{bfs_time / astar_time:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Time full agent turns as the number of units grows.
+
+    python -m benchmarks.bench_planning [--size 32] [--budget 0.005]
+"""
+
+import argparse
+import time
+from typing import Optional
+
+from agent import agent
+
+from simulator.observations import Observation, synthetic_game
+
+_CONFIG = {"MAX_CITIES": 100, "MAX_UNITS": 100}
+
+
+def time_turns(
+    size: int, units: int, turns: int, budget: Optional[float] = None
+) -> float:
+    """
+    Return the mean time in seconds of an agent turn, game parsing included
+    """
+    game = synthetic_game(size=size, turns=turns, units_per_team=units)
+    config = dict(_CONFIG, TURN_BUDGET=budget)
+    start = time.perf_counter()
+    for step, messages in enumerate(game):
+        agent(Observation(messages, step), config.copy())
+    return (time.perf_counter() - start) / turns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=32)
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument(
+        "--budget", type=float, help="seconds per turn before units fall back"
+    )
+    args = parser.parse_args()
+
+    for units in [5, 10, 20, 40, 80]:
+        elapsed = time_turns(args.size, units, args.turns, args.budget)
+        print(f"{units:>3} units: {elapsed * 1e3:.3f} ms/turn")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Forks and child states per second of the simulator on late-game states,
+compared to deep copies of the state.
+
+    python -m benchmarks.bench_snapshot [--size 32] [--turn 300]
+"""
+
+import argparse
+import copy
+import time
+from typing import Callable, List
+
+from simulator.engine import Simulation
+from simulator.observations import Observation
+from simulator.run import load_agent
+
+_CONFIG = {"MAX_CITIES": 40, "MAX_UNITS": 40}
+
+
+def late_game(size: int, turn: int, seed: int):
+    """
+    Simulation played by the agent against itself up to turn, with the actions
+    of both teams for that turn
+    """
+    simulation = Simulation(size, seed)
+    agents = [load_agent(), load_agent()]
+    while True:
+        actions = [
+            agent(
+                Observation(simulation.updates(team), simulation.turn, team),
+                dict(_CONFIG),
+            )
+            for team, agent in enumerate(agents)
+        ]
+        if simulation.turn == turn or simulation.is_over():
+            for agent in agents:
+                agent.close()
+            return simulation, actions
+        simulation.step(actions)
+
+
+def rate(fn: Callable[[], object], duration: float) -> float:
+    """
+    Calls of fn per second over about duration seconds
+    """
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < duration:
+        for _ in range(100):
+            fn()
+        calls += 100
+        elapsed = time.perf_counter() - start
+    return calls / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=32)
+    parser.add_argument("--turn", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--duration", type=float, default=1.0)
+    args = parser.parse_args()
+
+    simulation, actions = late_game(args.size, args.turn, args.seed)
+    idle: List[List[str]] = [[], []]
+    print(
+        f"turn {simulation.turn}: {len(simulation.units)} units,"
+        f" {simulation.city_tile_count(0) + simulation.city_tile_count(1)}"
+        f" city tiles, {sum(map(len, actions))} actions"
+    )
+
+    results = {
+        "fork": rate(simulation.fork, args.duration),
+        "deepcopy": rate(lambda: copy.deepcopy(simulation), args.duration),
+        "child (no action)": rate(lambda: simulation.child(idle), args.duration),
+        "child (agent actions)": rate(lambda: simulation.child(actions), args.duration),
+        "deepcopy + step": rate(
+            lambda: copy.deepcopy(simulation).step(actions), args.duration
+        ),
+    }
+    for name, per_second in results.items():
+        print(f"{name:<24} {per_second:>12,.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Compare the per-turn parse cost of Game._update when the map is rebuilt every
+turn and when it is updated in place.
+
+    python -m benchmarks.bench_update [--size 32] [--observations stdin.txt]
+"""
+
+import argparse
+import time
+from typing import List
+
+from lux.game import Game
+
+from simulator.observations import TurnMessages, load_observations, synthetic_game
+
+
+def time_game(game: List[TurnMessages], in_place_update: bool) -> float:
+    """
+    Return the mean time in seconds spent in Game._update per turn
+    """
+    state = Game()
+    state._initialize(game[0])
+    state.in_place_update = in_place_update
+
+    elapsed = 0.0
+    for turn, messages in enumerate(game):
+        if turn == 0:
+            messages = messages[2:]
+        start = time.perf_counter()
+        state._update(messages)
+        elapsed += time.perf_counter() - start
+    return elapsed / len(game)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=32)
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--observations", help="stdin of main.py recorded during a real game"
+    )
+    args = parser.parse_args()
+
+    if args.observations:
+        game = load_observations(args.observations)
+    else:
+        game = synthetic_game(size=args.size, turns=args.turns)
+
+    for in_place_update, label in [(False, "rebuild"), (True, "in place")]:
+        best = min(time_game(game, in_place_update) for _ in range(args.repeat))
+        print(f"{label:>10}: {best * 1e3:.3f} ms/turn")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Benchmark suite of the agent hot paths on synthetic games of every map size,
+with a few and with many units.
+
+    python -m benchmarks.suite [--output results.json]
+    python -m benchmarks.suite --baseline results.json [--threshold 0.25]
+
+With --baseline, the min time of each benchmark is compared to the saved
+results and the run fails when one of them got slower than its threshold
+allows, also when its case is run a second time.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from lux.game import Game
+from lux.game_map import Position
+from utils.features import FeatureEncoder
+from utils.path_finder import bfs, game_map_to_array
+
+from simulator.observations import Observation, TurnMessages, synthetic_game
+from simulator.run import load_turn_manager
+
+SIZES = [12, 16, 24, 32]
+# units per team, relative to the map size
+UNIT_RATIOS = [0.25, 1]
+# shortest sample of time_calls, in seconds
+MIN_SAMPLE_TIME = 0.002
+# relative slowdown of the min time flagged as a regression
+DEFAULT_THRESHOLD = 0.25
+# thresholds of the benchmarks noisier than the others: lookups of a few
+# microseconds, whose time moves with the state of the caches
+THRESHOLDS = {
+    "resource_tiles": 0.5,
+    "city_tiles": 0.5,
+    "get_closest_resource_tile": 0.5,
+}
+
+_CONFIG = {"MAX_CITIES": 100, "MAX_UNITS": 100}
+
+Results = Dict[str, Dict[str, float]]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """
+    Statistics of the per-call times in seconds, the min being the least noisy
+    """
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.mean(samples),
+        "samples": len(samples),
+    }
+
+
+def time_calls(fn: Callable, calls: Sequence[tuple], repeat: int) -> List[float]:
+    """
+    Mean time of a call of fn over all the argument tuples, once per repeat.
+    The calls are looped over until a sample lasts MIN_SAMPLE_TIME, like
+    timeit does, so that fast calls are not lost in the timer resolution.
+    """
+    start = time.perf_counter()
+    for args in calls:
+        fn(*args)
+    elapsed = time.perf_counter() - start
+    loops = max(1, int(MIN_SAMPLE_TIME / max(elapsed, 1e-9)))
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            for args in calls:
+                fn(*args)
+        samples.append((time.perf_counter() - start) / (loops * len(calls)))
+    return samples
+
+
+def time_game(game: List[TurnMessages], repeat: int):
+    """
+    Mean time of Game._update and of a full agent turn over the game, once per
+    repeat, and the TurnManager of the last turn
+    """
+    update_samples, agent_samples = [], []
+    for _ in range(repeat):
+        state = Game()
+        state._initialize(game[0])
+        start = time.perf_counter()
+        for turn, messages in enumerate(game):
+            state._update(messages[2:] if turn == 0 else messages)
+        update_samples.append((time.perf_counter() - start) / len(game))
+
+        turn_manager = load_turn_manager()
+        start = time.perf_counter()
+        for step, messages in enumerate(game):
+            manager = turn_manager.TurnManager(
+                Observation(messages, step), _CONFIG.copy()
+            )
+            manager.play_turn()
+        agent_samples.append((time.perf_counter() - start) / len(game))
+        turn_manager.end_game()
+    return update_samples, agent_samples, manager
+
+
+def calibrate(repeat: int) -> float:
+    """
+    Time of a fixed pure Python workload, to tell slower code from a slower
+    machine when comparing runs
+    """
+
+    def workload():
+        total = 0
+        for i in range(20000):
+            total += i * i % 7
+        return total
+
+    return min(time_calls(workload, [()], repeat))
+
+
+def run_case(size: int, units: int, turns: int, repeat: int) -> Results:
+    """
+    Run every benchmark on a synthetic game, the garbage collector being
+    paused like timeit does to make the timings less noisy
+    """
+    gc.disable()
+    try:
+        return _run_case(size, units, turns, repeat)
+    finally:
+        gc.enable()
+
+
+def _run_case(size: int, units: int, turns: int, repeat: int) -> Results:
+    game = synthetic_game(
+        size=size,
+        turns=turns,
+        units_per_team=units,
+        city_tiles_per_team=max(2, units // 2),
+    )
+    update_samples, agent_samples, manager = time_game(game, repeat)
+    game_map = manager.map
+    player_units = manager.player.units
+
+    # a path from every unit to the resource tile the furthest from it
+    resource_cells = manager.resource_tiles
+    paths = []
+    for unit in player_units:
+        target = max(
+            resource_cells,
+            key=lambda cell: abs(cell.pos.x - unit.pos.x)
+            + abs(cell.pos.y - unit.pos.y),
+        ).pos
+        paths.append((unit.pos, target))
+
+    def search_bfs(start: Position, end: Position):
+        grid = game_map_to_array(game_map, start, end)
+        bfs(grid, (start.x, start.y))
+
+    def resource_tiles():
+        manager._resource_tiles = None
+        return manager.resource_tiles
+
+    def city_tiles():
+        manager._city_tiles = None
+        return manager.city_tiles
+
+    obstacles = [unit.pos for unit in player_units]
+    state = Game()
+    state._initialize(game[0])
+    for turn, messages in enumerate(game):
+        state._update(messages[2:] if turn == 0 else messages)
+    encoder = FeatureEncoder()
+    planes = encoder.new_buffer()
+    results = {
+        "bfs": time_calls(search_bfs, paths, repeat),
+        "get_path_direction": time_calls(
+            lambda start, end: game_map.get_path_direction(
+                start, end, [manager.player.team], obstacles
+            ),
+            paths,
+            repeat,
+        ),
+        "game_update": update_samples,
+        "resource_tiles": time_calls(resource_tiles, [()], repeat),
+        "city_tiles": time_calls(city_tiles, [()], repeat),
+        "get_closest_resource_tile": time_calls(
+            manager.get_closest_resource_tile,
+            [(unit,) for unit in player_units],
+            repeat,
+        ),
+        "features": time_calls(lambda: encoder.encode(state, out=planes), [()], repeat),
+        "agent_turn": agent_samples,
+    }
+    return {
+        f"{name}/size={size}/units={units}": summarize(samples)
+        for name, samples in results.items()
+    }
+
+
+def compare(
+    results: Results, baseline: Results, threshold: float, speed: float = 1.0
+) -> List[str]:
+    """
+    Print the change of every benchmark against the baseline and return the
+    ones that are slower by more than their threshold in THRESHOLDS, or than
+    threshold. Timings are divided by speed, the relative time of the
+    calibration workload of the two runs.
+    """
+    regressions = []
+    print(f"{'benchmark':<48} {'baseline':>11} {'current':>11} {'change':>8}")
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]["min"], stats["min"]
+        change = after / speed / before - 1
+        flag = ""
+        if change > THRESHOLDS.get(name.split("/")[0], threshold):
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(
+            f"{name:<48} {before * 1e6:>9.1f}us {after * 1e6:>9.1f}us"
+            f" {change:>+7.0%}{flag}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=21)
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="results of a previous run to compare to")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="relative slowdown flagged as a regression, for the benchmarks"
+        " without a threshold of their own",
+    )
+    parser.add_argument(
+        "--no-calibration",
+        action="store_true",
+        help="compare raw timings, without correcting for the machine speed",
+    )
+    args = parser.parse_args()
+
+    # the machine speed is sampled along the run, its load changes over time
+    calibrations = []
+    results: Results = {}
+    # map size and units of the case of each benchmark
+    cases: Dict[str, Tuple[int, int]] = {}
+    for size in args.sizes:
+        for ratio in UNIT_RATIOS:
+            units = max(1, int(size * ratio))
+            calibrations.append(calibrate(args.repeat))
+            case_results = run_case(size, units, args.turns, args.repeat)
+            results.update(case_results)
+            cases.update({name: (size, units) for name in case_results})
+
+    calibration = statistics.median(calibrations)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "calibration": calibration,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        speed = 1.0
+        if not args.no_calibration:
+            speed = calibration / baseline["calibration"]
+            print(f"machine speed against the baseline: x{1 / speed:.2f}")
+        regressions = compare(results, baseline["results"], args.threshold, speed)
+        if regressions:
+            # the machine may just have been busy, a benchmark is only reported
+            # if it is still slower when its case is run again
+            print("running the cases of the regressions again")
+            for size, units in sorted({cases[name] for name in regressions}):
+                rerun = run_case(size, units, args.turns, args.repeat)
+                for name, stats in rerun.items():
+                    if stats["min"] < results[name]["min"]:
+                        results[name] = stats
+            regressions = compare(
+                {name: results[name] for name in regressions},
+                baseline["results"],
+                args.threshold,
+                speed,
+            )
+        if regressions:
+            print(f"{len(regressions)} regressions")
+            sys.exit(1)
+    else:
+        print(f"{'benchmark':<48} {'min':>11} {'median':>11}")
+        for name, stats in results.items():
+            print(
+                f"{name:<48} {stats['min'] * 1e6:>9.1f}us"
+                f" {stats['median'] * 1e6:>9.1f}us"
+            )
+
+
+if __name__ == "__main__":
+    main()
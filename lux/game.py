@@ -1,3 +1,6 @@
+from itertools import islice, takewhile
+from typing import Callable, Dict, List
+
 from .constants import Constants
 from .game_map import GameMap
 from .game_objects import City, Player, Unit
@@ -18,6 +21,9 @@ class Game:
         self.map_height = int(mapInfo[1])
         self.map = GameMap(self.map_width, self.map_height)
         self.players = [Player(0), Player(1)]
+        # keep the map, cells and game objects alive across turns instead of
+        # rebuilding them from scratch in _update
+        self.in_place_update = True
 
     def _end_turn(self):
         print("D_FINISH")
@@ -30,61 +36,181 @@ class Game:
         self.players[1].cities = {}
         self.players[1].city_tile_count = 0
 
-    def _update(self, messages):
+    def _update(self, messages: List[str]):
         """
         update state
         """
-        self.map = GameMap(self.map_width, self.map_height)
+        self._update_tokens(" ".join(messages).split(), lambda: messages)
+
+    def _update_block(self, block: bytes):
+        """
+        update state from the raw bytes of a turn, as read by lux.parser.TurnReader
+        """
+        text = block.decode()
+        self._update_tokens(text.split(), lambda: text.split("\n"))
+
+    def _update_tokens(self, tokens: List[str], lines: Callable[[], List[str]]):
+        """
+        update state from the whitespace separated tokens of a turn
+
+        Every record has a fixed number of fields, so records are parsed in
+        place in the token list by the handler registered for their identifier
+        in _RECORDS, without splitting the turn into lines first. The lines of
+        the turn are only needed to skip the records of unknown kinds.
+        """
+        if not self.in_place_update:
+            self.map = GameMap(self.map_width, self.map_height)
+            self._reset_player_states()
         self.turn += 1
-        self._reset_player_states()
 
-        for update in messages:
-            if update == "D_DONE":
+        self.map._begin_update()
+        for player in self.players:
+            player._begin_update()
+
+        i = 0
+        n_tokens = len(tokens)
+        line_ends = None
+        while i < n_tokens:
+            input_identifier = tokens[i]
+            if input_identifier == INPUT_CONSTANTS.DONE:
                 break
-            strs = update.split(" ")
-            input_identifier = strs[0]
-            if input_identifier == INPUT_CONSTANTS.RESEARCH_POINTS:
-                team = int(strs[1])
-                self.players[team].research_points = int(strs[2])
-            elif input_identifier == INPUT_CONSTANTS.RESOURCES:
-                r_type = strs[1]
-                x = int(strs[2])
-                y = int(strs[3])
-                amt = int(float(strs[4]))
-                self.map._setResource(r_type, x, y, amt)
-            elif input_identifier == INPUT_CONSTANTS.UNITS:
-                unittype = int(strs[1])
-                team = int(strs[2])
-                unitid = strs[3]
-                x = int(strs[4])
-                y = int(strs[5])
-                cooldown = float(strs[6])
-                wood = int(strs[7])
-                coal = int(strs[8])
-                uranium = int(strs[9])
-                unit = Unit(team, unittype, unitid, x, y, cooldown, wood, coal, uranium)
-                self.players[team].units.append(unit)
-                self.map[(x, y)].unit = unit
-            elif input_identifier == INPUT_CONSTANTS.CITY:
-                team = int(strs[1])
-                cityid = strs[2]
-                fuel = float(strs[3])
-                lightupkeep = float(strs[4])
-                self.players[team].cities[cityid] = City(
-                    team, cityid, fuel, lightupkeep
+            record = _RECORDS.get(input_identifier)
+            if record is None:
+                # unknown records are ignored, their fields may be anything up
+                # to the end of their line
+                if line_ends is None:
+                    line_ends = _line_ends(lines())
+                i = line_ends.get(i, i + 1)
+                continue
+            handler, n_fields = record
+            # records of a kind come in a row, they are parsed all at once
+            stride = n_fields + 1
+            count = len(
+                list(
+                    takewhile(input_identifier.__eq__, islice(tokens, i, None, stride))
+                )
+            )
+            end = i + count * stride
+            handler(self, tokens, i, end)
+            i = end
+
+        self.map._end_update()
+
+    # each handler parses the records in strs[start:end], the fields of a kind
+    # are converted at once with strided slices
+
+    def _parse_research_points(self, strs: List[str], start: int, end: int):
+        teams = map(int, strs[start + 1 : end : 3])
+        points = map(int, strs[start + 2 : end : 3])
+        for team, research_points in zip(teams, points):
+            self.players[team].research_points = research_points
+
+    def _parse_resources(self, strs: List[str], start: int, end: int):
+        r_types = strs[start + 1 : end : 5]
+        xs = list(map(int, strs[start + 2 : end : 5]))
+        ys = list(map(int, strs[start + 3 : end : 5]))
+        amounts = list(map(int, map(float, strs[start + 4 : end : 5])))
+        self.map._set_resources(r_types, xs, ys, amounts)
+
+    def _parse_units(self, strs: List[str], start: int, end: int):
+        xs = list(map(int, strs[start + 4 : end : 10]))
+        ys = list(map(int, strs[start + 5 : end : 10]))
+        positions = self.map.positions
+        units = []
+        for unittype, team, unitid, x, y, cooldown, wood, coal, uranium in zip(
+            map(int, strs[start + 1 : end : 10]),
+            map(int, strs[start + 2 : end : 10]),
+            strs[start + 3 : end : 10],
+            xs,
+            ys,
+            map(float, strs[start + 6 : end : 10]),
+            map(int, strs[start + 7 : end : 10]),
+            map(int, strs[start + 8 : end : 10]),
+            map(int, strs[start + 9 : end : 10]),
+        ):
+            player = self.players[team]
+            pos = positions.get(x, y)
+            unit = player._prev_units.get(unitid)
+            if unit is None:
+                unit = Unit(
+                    team, unittype, unitid, x, y, cooldown, wood, coal, uranium, pos
+                )
+            else:
+                unit._update(pos, cooldown, wood, coal, uranium)
+            player.units.append(unit)
+            units.append(unit)
+        self.map._set_units(xs, ys, units)
+
+    def _parse_cities(self, strs: List[str], start: int, end: int):
+        for team, cityid, fuel, lightupkeep in zip(
+            map(int, strs[start + 1 : end : 5]),
+            strs[start + 2 : end : 5],
+            map(float, strs[start + 3 : end : 5]),
+            map(float, strs[start + 4 : end : 5]),
+        ):
+            player = self.players[team]
+            city = player._prev_cities.get(cityid)
+            if city is None:
+                city = City(team, cityid, fuel, lightupkeep)
+            else:
+                city._update(fuel, lightupkeep)
+            player.cities[cityid] = city
+
+    def _parse_city_tiles(self, strs: List[str], start: int, end: int):
+        xs = list(map(int, strs[start + 3 : end : 6]))
+        ys = list(map(int, strs[start + 4 : end : 6]))
+        citytiles = []
+        for team, cityid, x, y, cooldown in zip(
+            map(int, strs[start + 1 : end : 6]),
+            strs[start + 2 : end : 6],
+            xs,
+            ys,
+            map(float, strs[start + 5 : end : 6]),
+        ):
+            player = self.players[team]
+            city = player.cities[cityid]
+            citytile = self.map.get_cell(x, y).citytile
+            if (
+                citytile is not None
+                and citytile.team == team
+                and citytile.cityid == cityid
+            ):
+                citytile.cooldown = cooldown
+                city.citytiles.append(citytile)
+            else:
+                citytile = city._add_city_tile(
+                    x, y, cooldown, self.map.positions.get(x, y)
                 )
-            elif input_identifier == INPUT_CONSTANTS.CITY_TILES:
-                team = int(strs[1])
-                cityid = strs[2]
-                x = int(strs[3])
-                y = int(strs[4])
-                cooldown = float(strs[5])
-                city = self.players[team].cities[cityid]
-                citytile = city._add_city_tile(x, y, cooldown)
-                self.map.get_cell(x, y).citytile = citytile
-                self.players[team].city_tile_count += 1
-            elif input_identifier == INPUT_CONSTANTS.ROADS:
-                x = int(strs[1])
-                y = int(strs[2])
-                road = float(strs[3])
-                self.map.get_cell(x, y).road = road
+            player.city_tile_count += 1
+            citytiles.append(citytile)
+        self.map._set_citytiles(xs, ys, citytiles)
+
+    def _parse_roads(self, strs: List[str], start: int, end: int):
+        xs = list(map(int, strs[start + 1 : end : 4]))
+        ys = list(map(int, strs[start + 2 : end : 4]))
+        roads = list(map(float, strs[start + 3 : end : 4]))
+        self.map._set_roads(xs, ys, roads)
+
+
+def _line_ends(lines: List[str]) -> Dict[int, int]:
+    """
+    Index of the token after each line, by the index of its first token
+    """
+    ends = {}
+    start = 0
+    for line in lines:
+        end = start + len(line.split())
+        ends[start] = end
+        start = end
+    return ends
+
+
+# handler and number of fields of each kind of update record
+_RECORDS = {
+    INPUT_CONSTANTS.RESEARCH_POINTS: (Game._parse_research_points, 2),
+    INPUT_CONSTANTS.RESOURCES: (Game._parse_resources, 4),
+    INPUT_CONSTANTS.UNITS: (Game._parse_units, 9),
+    INPUT_CONSTANTS.CITY: (Game._parse_cities, 4),
+    INPUT_CONSTANTS.CITY_TILES: (Game._parse_city_tiles, 5),
+    INPUT_CONSTANTS.ROADS: (Game._parse_roads, 3),
+}
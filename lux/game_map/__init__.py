@@ -1,3 +1,5 @@
 from .cell import Cell, Resource
 from .game_map import GameMap
-from .position import Position
+from .index_grid import IndexGrid, index_grid
+from .position import Position, PositionPool, position_pool
+from .spatial_index import SpatialIndex
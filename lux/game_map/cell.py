@@ -2,14 +2,18 @@ from .position import Position
 
 
 class Resource:
+    __slots__ = ("type", "amount")
+
     def __init__(self, r_type: str, amount: int):
         self.type = r_type
         self.amount = amount
 
 
 class Cell:
-    def __init__(self, x, y):
-        self.pos = Position(x, y)
+    __slots__ = ("pos", "resource", "citytile", "road", "unit")
+
+    def __init__(self, x, y, pos: Position = None):
+        self.pos = pos if pos is not None else Position(x, y)
         self.resource: Resource = None
         self.citytile = None
         self.road = 0
@@ -1,25 +1,76 @@
 import math
-from typing import List, Optional, Set, Tuple, Union
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
 
-from utils.path_finder import bfs, game_map_to_array
+import numpy as np
+from utils.path_finder import astar_indices
 
 from ..constants import Constants
 from .cell import Cell, Resource
-from .position import Position
+from .index_grid import index_grid
+from .position import Position, position_pool
+from .spatial_index import SpatialIndex
 
 DIRECTIONS = Constants.DIRECTIONS
 RESOURCE_TYPES = Constants.RESOURCE_TYPES
 
+# codes of the resource_type layer
+NO_RESOURCE = -1
+RESOURCE_TYPE_IDS = {
+    RESOURCE_TYPES.WOOD: 0,
+    RESOURCE_TYPES.COAL: 1,
+    RESOURCE_TYPES.URANIUM: 2,
+}
+# value of the citytile_team and unit_team layers on empty cells
+NO_TEAM = -1
+
 
 class GameMap:
     def __init__(self, width, height):
         self.height = height
         self.width = width
+        # shared positions of the cells, also used for the units and city tiles
+        self.positions = position_pool(width, height)
         self.map: List[List[Cell]] = [None] * height
         for y in range(0, self.height):
             self.map[y] = [None] * width
             for x in range(0, self.width):
-                self.map[y][x] = Cell(x, y)
+                self.map[y][x] = Cell(x, y, self.positions.get(x, y))
+
+        # cells can also be identified by their index y * width + x, see
+        # IndexGrid for the coordinates and neighbours of each index
+        self.grid = index_grid(width, height)
+        self.cells: List[Cell] = [cell for row in self.map for cell in row]
+
+        # structure of arrays view of the map, indexed by [y, x]. It is filled
+        # by the same setters as the cells, which remain the object view.
+        self.resource_type = np.full((height, width), NO_RESOURCE, dtype=np.int8)
+        self.resource_amount = np.zeros((height, width), dtype=np.int32)
+        self.citytile_team = np.full((height, width), NO_TEAM, dtype=np.int8)
+        self.road = np.zeros((height, width), dtype=np.float32)
+        self.unit_team = np.full((height, width), NO_TEAM, dtype=np.int8)
+
+        # cells holding a resource and city tiles, for nearest neighbour queries
+        self.resource_index = SpatialIndex(width, height)
+        self.citytile_index = SpatialIndex(width, height)
+
+        # cells holding a resource of each type and city tiles of each team,
+        # keyed by cell index and kept up to date by the setters so that they
+        # can be listed without scanning the map
+        self.resource_cells: Dict[str, Dict[int, Cell]] = {
+            r_type: {} for r_type in RESOURCE_TYPE_IDS
+        }
+        self.citytile_cells: Dict[int, Dict[int, Cell]] = {0: {}, 1: {}}
+        # total amount of each resource type left on the map
+        self.resource_totals: Dict[str, int] = dict.fromkeys(RESOURCE_TYPE_IDS, 0)
+
+        # cells touched by the updates of the current turn, see _begin_update
+        self._unit_cells: List[Cell] = []
+        self._resource_cells: Set[Cell] = set()
+        self._citytile_cells: Set[Cell] = set()
+        self._road_cells: Set[Cell] = set()
+        self._prev_resource_cells: Set[Cell] = set()
+        self._prev_citytile_cells: Set[Cell] = set()
+        self._prev_road_cells: Set[Cell] = set()
 
     def get_cell_by_pos(self, pos: Position) -> Cell:
         return self.map[pos.y][pos.x]
@@ -27,58 +78,275 @@ class GameMap:
     def get_cell(self, x: int, y: int) -> Cell:
         return self.map[y][x]
 
+    def get_cell_by_index(self, idx: int) -> Cell:
+        return self.cells[idx]
+
+    def index(self, pos: Position) -> int:
+        return pos.y * self.width + pos.x
+
+    def position(self, idx: int) -> Position:
+        return self.positions.get_index(idx)
+
     def _setResource(self, r_type, x, y, amount):
         """
         do not use this function, this is for internal tracking of state
         """
-        cell = self.get_cell(x, y)
-        cell.resource = Resource(r_type, amount)
+        self._set_resources([r_type], [x], [y], [amount])
+
+    def _set_unit(self, x, y, unit):
+        """
+        do not use this function, this is for internal tracking of state
+        """
+        self._set_units([x], [y], [unit])
+
+    def _set_citytile(self, x, y, citytile):
+        """
+        do not use this function, this is for internal tracking of state
+        """
+        self._set_citytiles([x], [y], [citytile])
+
+    def _set_road(self, x, y, road):
+        """
+        do not use this function, this is for internal tracking of state
+        """
+        self._set_roads([x], [y], [road])
+
+    def _set_resources(
+        self, r_types: List[str], xs: List[int], ys: List[int], amounts: List[int]
+    ):
+        """
+        do not use this function, this is for internal tracking of state
+        """
+        self.resource_type[ys, xs] = [RESOURCE_TYPE_IDS[r_type] for r_type in r_types]
+        self.resource_amount[ys, xs] = amounts
+        rows = self.map
+        width = self.width
+        resource_cells = self._resource_cells
+        cells_by_type = self.resource_cells
+        totals = self.resource_totals
+        for r_type, x, y, amount in zip(r_types, xs, ys, amounts):
+            cell = rows[y][x]
+            resource = cell.resource
+            if resource is None:
+                cell.resource = Resource(r_type, amount)
+                self.resource_index.add(cell.pos, cell)
+                cells_by_type[r_type][y * width + x] = cell
+            else:
+                if resource.type != r_type:
+                    del cells_by_type[resource.type][y * width + x]
+                    cells_by_type[r_type][y * width + x] = cell
+                resource.type = r_type
+                resource.amount = amount
+            totals[r_type] += amount
+            resource_cells.add(cell)
+
+    def _set_units(self, xs: List[int], ys: List[int], units: list):
+        """
+        do not use this function, this is for internal tracking of state
+        """
+        self.unit_team[ys, xs] = [unit.team for unit in units]
+        rows = self.map
+        unit_cells = self._unit_cells
+        for x, y, unit in zip(xs, ys, units):
+            cell = rows[y][x]
+            cell.unit = unit
+            unit_cells.append(cell)
+
+    def _set_citytiles(self, xs: List[int], ys: List[int], citytiles: list):
+        """
+        do not use this function, this is for internal tracking of state
+        """
+        self.citytile_team[ys, xs] = [citytile.team for citytile in citytiles]
+        rows = self.map
+        for x, y, citytile in zip(xs, ys, citytiles):
+            cell = rows[y][x]
+            if cell.citytile is not citytile:
+                self._replace_citytile(y * self.width + x, cell, citytile)
+            self._citytile_cells.add(cell)
+
+    def _replace_citytile(self, idx: int, cell: Cell, citytile):
+        """
+        do not use this function, this is for internal tracking of state
+        """
+        if cell.citytile is not None:
+            del self.citytile_cells[cell.citytile.team][idx]
+        cell.citytile = citytile
+        self.citytile_index.add(cell.pos, citytile)
+        self.citytile_cells[citytile.team][idx] = cell
+
+    def _set_roads(self, xs: List[int], ys: List[int], roads: List[float]):
+        """
+        do not use this function, this is for internal tracking of state
+        """
+        self.road[ys, xs] = roads
+        rows = self.map
+        for x, y, road in zip(xs, ys, roads):
+            cell = rows[y][x]
+            cell.road = road
+            self._road_cells.add(cell)
+
+    def _begin_update(self):
+        """
+        do not use this function, this is for internal tracking of state
+
+        Units are cleared right away. Resources, city tiles and roads are kept
+        so their objects can be reused; the cells that are not updated again
+        this turn are cleared by _end_update.
+        """
+        for cell in self._unit_cells:
+            cell.unit = None
+        self._unit_cells = []
+        self.unit_team.fill(NO_TEAM)
+
+        self._prev_resource_cells, self._resource_cells = self._resource_cells, set()
+        for r_type in self.resource_totals:
+            self.resource_totals[r_type] = 0
+        self._prev_citytile_cells, self._citytile_cells = self._citytile_cells, set()
+        self._prev_road_cells, self._road_cells = self._road_cells, set()
+
+    def _end_update(self):
+        """
+        do not use this function, this is for internal tracking of state
+        """
+        for cell in self._prev_resource_cells - self._resource_cells:
+            del self.resource_cells[cell.resource.type][self.index(cell.pos)]
+            cell.resource = None
+            self.resource_index.remove(cell.pos)
+            self.resource_type[cell.pos.y, cell.pos.x] = NO_RESOURCE
+            self.resource_amount[cell.pos.y, cell.pos.x] = 0
+        for cell in self._prev_citytile_cells - self._citytile_cells:
+            del self.citytile_cells[cell.citytile.team][self.index(cell.pos)]
+            cell.citytile = None
+            self.citytile_index.remove(cell.pos)
+            self.citytile_team[cell.pos.y, cell.pos.x] = NO_TEAM
+        for cell in self._prev_road_cells - self._road_cells:
+            cell.road = 0
+            self.road[cell.pos.y, cell.pos.x] = 0
+
+        self._prev_resource_cells = set()
+        self._prev_citytile_cells = set()
+        self._prev_road_cells = set()
 
     def get_path_direction(
         self,
-        start_pos: Position,
-        end_pos: Position,
+        start_pos: Union[Position, int],
+        end_pos: Union[Position, int],
         allowed_city_teams: Optional[List[int]] = None,
-        unit_positions: Optional[List[Position]] = None,
+        unit_positions: Optional[List[Union[Position, int]]] = None,
     ) -> Optional[DIRECTIONS]:
+        """
+        Direction of the first move of a shortest path, positions being given
+        as Position objects or cell indices
+        """
+        start_idx = start_pos if type(start_pos) is int else self.index(start_pos)
+        end_idx = end_pos if type(end_pos) is int else self.index(end_pos)
+        unit_indices = [
+            pos if type(pos) is int else self.index(pos) for pos in unit_positions or []
+        ]
+
+        obstacles = self.obstacle_mask(allowed_city_teams).ravel()
+        obstacles[unit_indices] = True
+        walls = obstacles.tolist()
+        walls[end_idx] = False
+        path = astar_indices(walls, self.width, start_idx, end_idx)
+
+        if path is None or len(path) < 2:
+            return DIRECTIONS.CENTER
+        return self.grid.direction(path[0], path[1])
+
+    def get_resource_cells(self, r_types: Optional[Iterable[str]] = None) -> List[Cell]:
+        """
+        Cells holding resources, restricted to r_types if given, by type then
+        in the order they first appeared in the updates
+        """
+        if r_types is None:
+            r_types = RESOURCE_TYPE_IDS
+        cells = []
+        for r_type in r_types:
+            cells.extend(self.resource_cells[r_type].values())
+        return cells
 
-        allowed_city_teams: List[int] = allowed_city_teams or []
-        forbidden_pos: Set[Position] = set()
+    def get_citytile_cells(self, team: int) -> List[Cell]:
+        """
+        Cells holding a city tile of team, in the order they were built
+        """
+        return list(self.citytile_cells[team].values())
 
-        if unit_positions:
-            forbidden_pos = set(unit_positions)
+    def resource_cell_count(self, r_types: Optional[Iterable[str]] = None) -> int:
+        if r_types is None:
+            r_types = RESOURCE_TYPE_IDS
+        return sum(len(self.resource_cells[r_type]) for r_type in r_types)
 
-        for cell in self:
-            if cell.citytile and cell.citytile.team not in allowed_city_teams:
-                forbidden_pos.add(cell.pos)
+    def resource_mask(self, r_types: Optional[Iterable[str]] = None) -> np.ndarray:
+        """
+        Boolean [y, x] mask of the cells holding resources, restricted to
+        r_types if given
+        """
+        mask = self.resource_amount > 0
+        if r_types is not None:
+            type_ids = [RESOURCE_TYPE_IDS[r_type] for r_type in r_types]
+            mask &= np.isin(self.resource_type, type_ids)
+        return mask
 
-        matrix = game_map_to_array(self, start_pos, end_pos, forbidden_pos)
-        path = bfs(matrix, (start_pos.x, start_pos.y))
+    def citytile_mask(self, teams: Optional[Iterable[int]] = None) -> np.ndarray:
+        """
+        Boolean [y, x] mask of the city tiles, restricted to teams if given
+        """
+        if teams is None:
+            return self.citytile_team != NO_TEAM
+        return np.isin(self.citytile_team, list(teams))
 
-        if path is None or len(path) < 2:
-            return DIRECTIONS.CENTER
+    def obstacle_mask(
+        self,
+        allowed_city_teams: Optional[List[int]] = None,
+        unit_positions: Optional[Iterable[Position]] = None,
+    ) -> np.ndarray:
+        """
+        Boolean [y, x] mask of the cells a unit cannot walk through: city tiles
+        not owned by allowed_city_teams and the cells in unit_positions
+        """
+        mask = self.citytile_mask()
+        if allowed_city_teams:
+            mask &= ~np.isin(self.citytile_team, allowed_city_teams)
+        for pos in unit_positions or []:
+            mask[pos.y, pos.x] = True
+        return mask
+
+    def cells_from_mask(self, mask: np.ndarray) -> List[Cell]:
+        """
+        Cells where mask is True, in row-major order
+        """
+        ys, xs = np.nonzero(mask)
+        return [self.map[y][x] for y, x in zip(ys.tolist(), xs.tolist())]
 
-        x, y = path[1]
-        next_pos = Position(x, y)
-        disp = next_pos - start_pos
-        direction = DIRECTIONS.get_from_coord(disp.x, disp.y)
-        return direction
+    def has_resource(self, pos: Position) -> bool:
+        return self.resource_amount[pos.y, pos.x] > 0
 
     def is_valid_position(self, obj: Union[Position, Tuple[int, int]]) -> bool:
         x, y = self.get_tuple(obj)
         return 0 <= x < self.width and 0 <= y < self.height
 
     def get_plus_neighbors(self, pos: Position) -> List[Position]:
-        pos_list: List[Position] = []
-        for x, y in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            check_pos = pos + Position(x, y)
-            if self.is_valid_position(check_pos):
-                cell: Cell = self.get_cell_by_pos(check_pos)
-                if not cell.has_resource() and cell.citytile is None:
-                    pos_list.append(check_pos)
-        return pos_list
-
-    def __getitem__(self, key: Union[Position, Tuple[int, int]]) -> Cell:
+        positions = self.positions
+        return [
+            positions.get_index(idx)
+            for idx in self.get_plus_neighbor_indices(self.index(pos))
+        ]
+
+    def get_plus_neighbor_indices(self, idx: int) -> List[int]:
+        """
+        Neighbours of the cell without resource nor city tile
+        """
+        cells = self.cells
+        return [
+            idx2
+            for idx2 in self.grid.neighbors[idx]
+            if not cells[idx2].has_resource() and cells[idx2].citytile is None
+        ]
+
+    def __getitem__(self, key: Union[Position, Tuple[int, int], int]) -> Cell:
+        if type(key) is int:
+            return self.cells[key]
         x, y = self.get_tuple(key)
         return self.get_cell(x, y)
 
@@ -90,8 +358,10 @@ class GameMap:
         if type(obj) is Position:
             return (obj.x, obj.y)
 
-        if isinstance(obj, tuple) and list(map(type, obj)) == [int, int]:
-            return obj
+        if type(obj) is tuple and len(obj) == 2:
+            x, y = obj
+            if type(x) is int and type(y) is int:
+                return obj
 
         raise ValueError("key must be of type Position or Tuple(int, int)")
 
@@ -0,0 +1,82 @@
+from typing import Dict, List, Tuple
+
+from ..constants import Constants
+
+DIRECTIONS = Constants.DIRECTIONS
+
+# same order as GameMap.get_plus_neighbors
+_PLUS_OFFSETS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+_MOVES = [
+    (DIRECTIONS.NORTH, 0, -1),
+    (DIRECTIONS.EAST, 1, 0),
+    (DIRECTIONS.SOUTH, 0, 1),
+    (DIRECTIONS.WEST, -1, 0),
+]
+
+
+class IndexGrid:
+    """
+    Tables of a map size for cells identified by their flat index
+    y * width + x: coordinates and neighbours of every index are looked up
+    instead of being computed, without creating any object.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.xs: List[int] = [idx % width for idx in range(self.size)]
+        self.ys: List[int] = [idx // width for idx in range(self.size)]
+        # neighbours inside the map of every cell
+        self.neighbors: List[Tuple[int, ...]] = []
+        # (direction, neighbour) pairs of every cell
+        self.moves: List[List[Tuple[str, int]]] = []
+        for y in range(height):
+            for x in range(width):
+                self.neighbors.append(
+                    tuple(
+                        (y + dy) * width + x + dx
+                        for dx, dy in _PLUS_OFFSETS
+                        if 0 <= x + dx < width and 0 <= y + dy < height
+                    )
+                )
+                self.moves.append(
+                    [
+                        (direction, (y + dy) * width + x + dx)
+                        for direction, dx, dy in _MOVES
+                        if 0 <= x + dx < width and 0 <= y + dy < height
+                    ]
+                )
+
+    def index(self, x: int, y: int) -> int:
+        return y * self.width + x
+
+    def is_valid(self, idx: int) -> bool:
+        return 0 <= idx < self.size
+
+    def distance(self, idx: int, idx2: int) -> int:
+        """
+        Manhattan distance between two cells
+        """
+        return abs(self.xs[idx] - self.xs[idx2]) + abs(self.ys[idx] - self.ys[idx2])
+
+    def direction(self, idx: int, idx2: int) -> str:
+        """
+        Direction of the move from a cell to a neighbouring one
+        """
+        return DIRECTIONS.get_from_coord(
+            self.xs[idx2] - self.xs[idx], self.ys[idx2] - self.ys[idx]
+        )
+
+
+_grids: Dict[Tuple[int, int], IndexGrid] = {}
+
+
+def index_grid(width: int, height: int) -> IndexGrid:
+    """
+    Tables of a map size, computed once and shared by all the maps of that size
+    """
+    grid = _grids.get((width, height))
+    if grid is None:
+        grid = _grids[(width, height)] = IndexGrid(width, height)
+    return grid
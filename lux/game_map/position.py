@@ -10,6 +10,8 @@ RESOURCE_TYPES = Constants.RESOURCE_TYPES
 
 
 class Position:
+    __slots__ = ("x", "y")
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
@@ -29,7 +31,8 @@ class Position:
         return (self - pos) <= 1
 
     def __eq__(self, pos) -> bool:
-        return self.x == pos.x and self.y == pos.y
+        # positions of the cells are shared, see PositionPool
+        return self is pos or (self.x == pos.x and self.y == pos.y)
 
     def equals(self, pos):
         return self == pos
@@ -76,4 +79,41 @@ class Position:
         return Position(self.x - other.x, self.y - other.y)
 
     def __hash__(self):
-        return hash((self.x, self.y))
+        return (self.y << 16) ^ self.x
+
+
+class PositionPool:
+    """
+    One shared Position per cell of a map size, so that the cells, units and
+    city tiles on a cell hold the same object instead of one copy each.
+    Positions are treated as immutable.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self._positions = [Position(x, y) for y in range(height) for x in range(width)]
+
+    def get(self, x: int, y: int) -> Position:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self._positions[y * self.width + x]
+        return Position(x, y)
+
+    def get_index(self, idx: int) -> Position:
+        """
+        Position of the cell at index y * width + x
+        """
+        return self._positions[idx]
+
+
+_pools: Dict[Tuple[int, int], PositionPool] = {}
+
+
+def position_pool(width: int, height: int) -> PositionPool:
+    """
+    Pool of the positions of a map size, shared by all the maps of that size
+    """
+    pool = _pools.get((width, height))
+    if pool is None:
+        pool = _pools[(width, height)] = PositionPool(width, height)
+    return pool
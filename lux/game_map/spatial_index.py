@@ -0,0 +1,108 @@
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+from .position import Position
+
+# offsets of the cells at each Manhattan distance, shared by all indexes
+_rings: List[List[Tuple[int, int]]] = [[(0, 0)]]
+
+
+def _ring(radius: int) -> List[Tuple[int, int]]:
+    while len(_rings) <= radius:
+        r = len(_rings)
+        ring = []
+        for dx in range(-r, r + 1):
+            dy = r - abs(dx)
+            ring.append((dx, -dy))
+            if dy:
+                ring.append((dx, dy))
+        _rings.append(ring)
+    return _rings[radius]
+
+
+class SpatialIndex:
+    """
+    At most one item per cell of the map, queried by Manhattan distance.
+
+    Queries scan rings of growing radius around the query position and stop as
+    soon as enough items are found, or once every item has been seen, so
+    they cost O(r²) for a result at distance r instead of O(number of items).
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self._items: List[Any] = [None] * (width * height)
+        self._count = 0
+
+    def add(self, pos: Position, item: Any) -> None:
+        """
+        Put item on the cell at pos, replacing the previous one if any
+        """
+        idx = pos.y * self.width + pos.x
+        if self._items[idx] is None:
+            self._count += 1
+        self._items[idx] = item
+
+    def remove(self, pos: Position) -> None:
+        idx = pos.y * self.width + pos.x
+        if self._items[idx] is not None:
+            self._count -= 1
+            self._items[idx] = None
+
+    def get(self, pos: Position) -> Any:
+        return self._items[pos.y * self.width + pos.x]
+
+    def clear(self) -> None:
+        self._items = [None] * (self.width * self.height)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def iter_by_distance(self, pos: Position) -> Iterator[Tuple[int, Any]]:
+        """
+        (distance, item) pairs sorted by distance to pos
+        """
+        width, height, items = self.width, self.height, self._items
+        seen = 0
+        radius = 0
+        max_radius = width + height
+        while seen < self._count and radius <= max_radius:
+            for dx, dy in _ring(radius):
+                x, y = pos.x + dx, pos.y + dy
+                if 0 <= x < width and 0 <= y < height:
+                    item = items[y * width + x]
+                    if item is not None:
+                        seen += 1
+                        yield radius, item
+            radius += 1
+
+    def nearest(
+        self, pos: Position, predicate: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
+        """
+        Closest item to pos for which predicate is True, None if there is none
+        """
+        for _, item in self.iter_by_distance(pos):
+            if predicate is None or predicate(item):
+                return item
+        return None
+
+    def k_nearest(
+        self,
+        pos: Position,
+        k: int,
+        predicate: Optional[Callable[[Any], bool]] = None,
+    ) -> List[Any]:
+        """
+        Up to k items closest to pos for which predicate is True
+        """
+        result = []
+        if k <= 0:
+            return result
+        for _, item in self.iter_by_distance(pos):
+            if predicate is None or predicate(item):
+                result.append(item)
+                if len(result) == k:
+                    break
+        return result
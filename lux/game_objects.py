@@ -15,6 +15,20 @@ class Player:
         self.cities: Dict[str, City] = {}
         self.city_tile_count = 0
 
+        # objects of the previous turn, reused by Game._update
+        self._prev_units: Dict[str, Unit] = {}
+        self._prev_cities: Dict[str, City] = {}
+
+    def _begin_update(self):
+        """
+        do not use this function, this is for internal tracking of state
+        """
+        self._prev_units = {unit.id: unit for unit in self.units}
+        self._prev_cities = self.cities
+        self.units = []
+        self.cities = {}
+        self.city_tile_count = 0
+
     def researched_coal(self) -> bool:
         return (
             self.research_points
@@ -29,6 +43,8 @@ class Player:
 
 
 class City:
+    __slots__ = ("cityid", "team", "fuel", "citytiles", "light_upkeep")
+
     def __init__(self, teamid, cityid, fuel, light_upkeep):
         self.cityid = cityid
         self.team = teamid
@@ -36,20 +52,30 @@ class City:
         self.citytiles: list[CityTile] = []
         self.light_upkeep = light_upkeep
 
-    def _add_city_tile(self, x, y, cooldown):
-        ct = CityTile(self.team, self.cityid, x, y, cooldown)
+    def _add_city_tile(self, x, y, cooldown, pos: Position = None):
+        ct = CityTile(self.team, self.cityid, x, y, cooldown, pos)
         self.citytiles.append(ct)
         return ct
 
+    def _update(self, fuel, light_upkeep):
+        """
+        do not use this function, this is for internal tracking of state
+        """
+        self.fuel = fuel
+        self.light_upkeep = light_upkeep
+        self.citytiles = []
+
     def get_light_upkeep(self):
         return self.light_upkeep
 
 
 class CityTile:
-    def __init__(self, teamid, cityid, x, y, cooldown):
+    __slots__ = ("cityid", "team", "pos", "cooldown")
+
+    def __init__(self, teamid, cityid, x, y, cooldown, pos: Position = None):
         self.cityid = cityid
         self.team = teamid
-        self.pos = Position(x, y)
+        self.pos = pos if pos is not None else Position(x, y)
         self.cooldown = cooldown
 
     def can_act(self) -> bool:
@@ -78,6 +104,8 @@ class CityTile:
 
 
 class Cargo:
+    __slots__ = ("wood", "coal", "uranium")
+
     def __init__(self):
         self.wood = 0
         self.coal = 0
@@ -88,8 +116,12 @@ class Cargo:
 
 
 class Unit:
-    def __init__(self, teamid, u_type, unitid, x, y, cooldown, wood, coal, uranium):
-        self.pos = Position(x, y)
+    __slots__ = ("pos", "team", "id", "type", "cooldown", "cargo")
+
+    def __init__(
+        self, teamid, u_type, unitid, x, y, cooldown, wood, coal, uranium, pos=None
+    ):
+        self.pos = pos if pos is not None else Position(x, y)
         self.team = teamid
         self.id = unitid
         self.type = u_type
@@ -99,6 +131,16 @@ class Unit:
         self.cargo.coal = coal
         self.cargo.uranium = uranium
 
+    def _update(self, pos: Position, cooldown, wood, coal, uranium):
+        """
+        do not use this function, this is for internal tracking of state
+        """
+        self.pos = pos
+        self.cooldown = cooldown
+        self.cargo.wood = wood
+        self.cargo.coal = coal
+        self.cargo.uranium = uranium
+
     def is_worker(self) -> bool:
         return self.type == UNIT_TYPES.WORKER
 
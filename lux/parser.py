@@ -0,0 +1,54 @@
+from typing import BinaryIO
+
+from .constants import Constants
+
+INPUT_CONSTANTS = Constants.INPUT_CONSTANTS
+
+_DONE = INPUT_CONSTANTS.DONE.encode()
+_CHUNK_SIZE = 1 << 16
+
+
+class TurnReader:
+    """
+    Reads the updates of a turn in bulk from a binary stream such as
+    sys.stdin.buffer, instead of one line at a time.
+    """
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self._buffer = b""
+        # the newline after D_DONE had not been read yet with the last turn
+        self._skip_newline = False
+
+    def read_turn(self) -> bytes:
+        """
+        Raw bytes of the next turn, up to and including the D_DONE line
+
+        Raises EOFError once the stream is closed.
+        """
+        buffer = self._buffer
+        start = 0
+        while True:
+            if self._skip_newline and buffer:
+                self._skip_newline = False
+                if buffer.startswith(b"\n"):
+                    buffer = buffer[1:]
+
+            end = buffer.find(_DONE, start)
+            if end != -1:
+                end += len(_DONE)
+                if end < len(buffer):
+                    if buffer[end : end + 1] == b"\n":
+                        end += 1
+                else:
+                    self._skip_newline = True
+                self._buffer = buffer[end:]
+                return buffer[:end]
+
+            chunk = self.stream.read1(_CHUNK_SIZE)
+            if not chunk:
+                self._buffer = buffer
+                raise EOFError("end of stream before D_DONE")
+            # D_DONE may be split between two chunks
+            start = max(0, len(buffer) - len(_DONE))
+            buffer += chunk
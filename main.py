@@ -1,18 +1,27 @@
+import json
 import sys
 from typing import Dict
 
 from agent import agent
+from lux.game_constants import GAME_CONSTANTS
+from lux.parser import TurnReader
+from utils.replay import ReplayWriter
 
 _CONFIG = {"MAX_CITIES": 2, "MAX_UNITS": 2}
 
 if __name__ == "__main__":
+    # configuration overrides given as JSON, e.g. python main.py '{"MAX_CITIES": 4}'
+    if len(sys.argv) > 1:
+        _CONFIG.update(json.loads(sys.argv[1]))
+
+    reader = TurnReader(sys.stdin.buffer)
 
     def read_input():
         """
-        Reads input from stdin
+        Reads the updates of a turn from stdin
         """
         try:
-            return input()
+            return reader.read_turn()
         except EOFError as eof:
             raise SystemExit(eof)
 
@@ -25,20 +34,33 @@ if __name__ == "__main__":
             # self.step = 0
 
     observation = Observation()
-    observation["updates"] = []
     observation["step"] = 0
     player_id = 0
-    while True:
-        inputs = read_input()
-        observation["updates"].append(inputs)
-
-        if step == 0:
-            player_id = int(observation["updates"][0])
-            observation.player = player_id
-        if inputs == "D_DONE":
+    # opt-in record of the game, to be replayed with python -m utils.replay
+    recorder = None
+    try:
+        while True:
+            block = read_input()
+            # raw bytes of the turn, parsed in one go by Game._update_block
+            observation["block"] = block
+
+            if step == 0:
+                player_id = int(block.split(maxsplit=1)[0])
+                observation.player = player_id
+                if _CONFIG.get("RECORD"):
+                    recorder = ReplayWriter(_CONFIG["RECORD"], player_id, _CONFIG)
             actions = agent(observation, _CONFIG.copy())
-            observation["updates"] = []
             step += 1
             observation["step"] = step
+            if recorder is not None:
+                recorder.write(block, actions)
+                # the agent may be stopped as soon as it answers its last turn
+                if step == GAME_CONSTANTS["PARAMETERS"]["MAX_DAYS"]:
+                    recorder.close()
+                    recorder = None
             print(",".join(actions))
-            print("D_FINISH")
+            print("D_FINISH", flush=True)
+    finally:
+        # the game ends with the end of stdin
+        if recorder is not None:
+            recorder.close()
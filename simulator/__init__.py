@@ -0,0 +1,2 @@
+from .engine import Simulation
+from .map_generator import generate_map
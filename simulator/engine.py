@@ -0,0 +1,617 @@
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from lux.constants import Constants
+from lux.game import Game
+from lux.game_constants import GAME_CONSTANTS
+from lux.game_map.game_map import NO_RESOURCE, NO_TEAM, RESOURCE_TYPE_IDS
+
+from simulator.map_generator import generate_map
+
+DIRECTIONS = Constants.DIRECTIONS
+INPUT_CONSTANTS = Constants.INPUT_CONSTANTS
+UNIT_TYPES = Constants.UNIT_TYPES
+PARAMETERS = GAME_CONSTANTS["PARAMETERS"]
+
+_RESOURCE_NAMES = {type_id: name for name, type_id in RESOURCE_TYPE_IDS.items()}
+# keys of the resources in GAME_CONSTANTS, indexed by resource type id
+_RESOURCE_KEYS = [name.upper() for _, name in sorted(_RESOURCE_NAMES.items())]
+_FUEL_RATES = [PARAMETERS["RESOURCE_TO_FUEL_RATE"][key] for key in _RESOURCE_KEYS]
+_COLLECTION_RATES = [
+    PARAMETERS["WORKER_COLLECTION_RATE"][key] for key in _RESOURCE_KEYS
+]
+_RESEARCH_REQUIREMENTS = [
+    PARAMETERS["RESEARCH_REQUIREMENTS"].get(key, 0) for key in _RESOURCE_KEYS
+]
+_UNIT_KEYS = {UNIT_TYPES.WORKER: "WORKER", UNIT_TYPES.CART: "CART"}
+
+# layers shared with forked states until one of them writes to them
+_LAYERS = (
+    "resource_type",
+    "resource_amount",
+    "road",
+    "citytile_team",
+    "citytile_city",
+    "citytile_cooldown",
+)
+
+_DELTAS = {
+    DIRECTIONS.NORTH: (0, -1),
+    DIRECTIONS.EAST: (1, 0),
+    DIRECTIONS.SOUTH: (0, 1),
+    DIRECTIONS.WEST: (-1, 0),
+    DIRECTIONS.CENTER: (0, 0),
+}
+
+
+def _id_number(object_id: str) -> int:
+    """
+    Number ending a unit or city id like u_12, -1 if there is none
+    """
+    suffix = object_id.rsplit("_", 1)[-1]
+    return int(suffix) if suffix.isdigit() else -1
+
+
+class SimUnit:
+    __slots__ = ("id", "team", "type", "x", "y", "cooldown", "cargo")
+
+    def __init__(self, unit_id: str, team: int, u_type: int, x: int, y: int):
+        self.id = unit_id
+        self.team = team
+        self.type = u_type
+        self.x = x
+        self.y = y
+        self.cooldown = 0.0
+        # indexed by resource type id
+        self.cargo = [0, 0, 0]
+
+    @property
+    def capacity(self) -> int:
+        return PARAMETERS["RESOURCE_CAPACITY"][_UNIT_KEYS[self.type]]
+
+    def space_left(self) -> int:
+        return self.capacity - sum(self.cargo)
+
+    def copy(self) -> "SimUnit":
+        unit = SimUnit(self.id, self.team, self.type, self.x, self.y)
+        unit.cooldown = self.cooldown
+        unit.cargo = self.cargo[:]
+        return unit
+
+
+class SimCity:
+    __slots__ = ("id", "team", "fuel")
+
+    def __init__(self, city_id: str, team: int):
+        self.id = city_id
+        self.team = team
+        self.fuel = 0.0
+
+    def copy(self) -> "SimCity":
+        city = SimCity(self.id, self.team)
+        city.fuel = self.fuel
+        return city
+
+
+class Simulation:
+    """
+    Headless forward model of the Lux AI 2021 rules, driven by GAME_CONSTANTS.
+
+    The map is a set of NumPy layers indexed [y, x], like GameMap. Every turn,
+    updates(team) gives the messages main.py would receive and step() plays
+    the actions of both teams.
+
+    It covers movement and collisions, resource collection and research,
+    fuel deposits, city building and merging, the day/night cycle with city
+    and unit upkeep, cooldowns, roads, pillage, transfers and wood regrowth.
+    Simultaneous collection from a depleted tile is split evenly, and road
+    levels shorten the action cooldown of the units standing on them.
+
+    States are cheap to fork for lookahead: a fork shares the map layers,
+    units and cities of its parent, and each state copies a layer the first
+    time it writes to it and its units and cities the first time it steps.
+    """
+
+    def __init__(self, size: int = 12, seed: int = 0, max_turns: Optional[int] = None):
+        self.width = self.height = size
+        self.turn = 0
+        self.max_turns = max_turns or PARAMETERS["MAX_DAYS"]
+
+        self.resource_type, self.resource_amount, starts = generate_map(size, seed)
+        self.road = np.zeros((size, size), dtype=np.float64)
+        self.citytile_team = np.full((size, size), NO_TEAM, dtype=np.int8)
+        self.citytile_city = np.full((size, size), -1, dtype=np.int32)
+        self.citytile_cooldown = np.zeros((size, size), dtype=np.float64)
+
+        self.research_points = [0, 0]
+        self.units: Dict[str, SimUnit] = {}
+        self.cities: Dict[int, SimCity] = {}
+        self._next_id = 1
+        # layers, units and cities still shared with other states
+        self._shared_layers = set()
+        self._shared_objects = False
+
+        for team, (x, y) in enumerate(starts):
+            self._build_city_tile(team, x, y)
+            self._spawn_unit(team, UNIT_TYPES.WORKER, x, y)
+
+    @classmethod
+    def from_game(cls, game: Game, max_turns: Optional[int] = None) -> "Simulation":
+        """
+        State of the game as seen by the agent, to look ahead from it
+        """
+        game_map = game.map
+        sim = cls.__new__(cls)
+        sim.width, sim.height = game_map.width, game_map.height
+        sim.turn = game.turn
+        sim.max_turns = max_turns or PARAMETERS["MAX_DAYS"]
+
+        sim.resource_type = game_map.resource_type.copy()
+        sim.resource_type[game_map.resource_amount <= 0] = NO_RESOURCE
+        sim.resource_amount = game_map.resource_amount.astype(np.float64)
+        sim.road = game_map.road.astype(np.float64)
+        sim.citytile_team = game_map.citytile_team.copy()
+        sim.citytile_city = np.full(sim.citytile_team.shape, -1, dtype=np.int32)
+        sim.citytile_cooldown = np.zeros(sim.citytile_team.shape, dtype=np.float64)
+
+        sim.research_points = [player.research_points for player in game.players]
+        sim.units = {}
+        sim.cities = {}
+        # cities are keyed by their position in the game, new ids are numbered
+        # after both these keys and the numbers ending the ids of the game
+        next_id = -1
+        for player in game.players:
+            for city in player.cities.values():
+                city_id = len(sim.cities)
+                sim_city = SimCity(city.cityid, city.team)
+                sim_city.fuel = city.fuel
+                sim.cities[city_id] = sim_city
+                next_id = max(next_id, city_id, _id_number(city.cityid))
+                for city_tile in city.citytiles:
+                    x, y = city_tile.pos.x, city_tile.pos.y
+                    sim.citytile_city[y, x] = city_id
+                    sim.citytile_cooldown[y, x] = city_tile.cooldown
+            for unit in player.units:
+                sim_unit = SimUnit(
+                    unit.id, unit.team, unit.type, unit.pos.x, unit.pos.y
+                )
+                sim_unit.cooldown = unit.cooldown
+                sim_unit.cargo = [unit.cargo.wood, unit.cargo.coal, unit.cargo.uranium]
+                sim.units[unit.id] = sim_unit
+                next_id = max(next_id, _id_number(unit.id))
+        sim._next_id = next_id + 1
+        sim._shared_layers = set()
+        sim._shared_objects = False
+        return sim
+
+    def fork(self) -> "Simulation":
+        """
+        Copy of the state sharing all of its data with this one until either
+        of them changes it
+        """
+        child = Simulation.__new__(Simulation)
+        child.__dict__.update(self.__dict__)
+        self._shared_layers = set(_LAYERS)
+        child._shared_layers = set(_LAYERS)
+        self._shared_objects = True
+        child._shared_objects = True
+        return child
+
+    def child(self, actions: List[List[str]]) -> "Simulation":
+        """
+        State after playing one turn with the actions of both teams
+        """
+        child = self.fork()
+        child.step(actions)
+        return child
+
+    def is_night(self) -> bool:
+        cycle = PARAMETERS["DAY_LENGTH"] + PARAMETERS["NIGHT_LENGTH"]
+        return self.turn % cycle >= PARAMETERS["DAY_LENGTH"]
+
+    def is_over(self) -> bool:
+        if self.turn >= self.max_turns:
+            return True
+        for team in (0, 1):
+            if not self.city_tile_count(team) and not self.unit_count(team):
+                return True
+        return False
+
+    def city_tile_count(self, team: int) -> int:
+        return int((self.citytile_team == team).sum())
+
+    def unit_count(self, team: int) -> int:
+        return sum(1 for unit in self.units.values() if unit.team == team)
+
+    def winner(self) -> Optional[int]:
+        """
+        Team with the most city tiles, then the most units, None on a draw
+        """
+        for count in (self.city_tile_count, self.unit_count):
+            counts = [count(0), count(1)]
+            if counts[0] != counts[1]:
+                return int(counts[1] > counts[0])
+        return None
+
+    def light_upkeep(self) -> Dict[int, float]:
+        """
+        Fuel each city burns per night turn
+        """
+        own = self.citytile_team != NO_TEAM
+        same_team = np.zeros(own.shape, dtype=np.int32)
+        team = self.citytile_team
+        same_team[1:, :] += own[1:, :] & (team[1:, :] == team[:-1, :])
+        same_team[:-1, :] += own[:-1, :] & (team[:-1, :] == team[1:, :])
+        same_team[:, 1:] += own[:, 1:] & (team[:, 1:] == team[:, :-1])
+        same_team[:, :-1] += own[:, :-1] & (team[:, :-1] == team[:, 1:])
+        upkeep = (
+            PARAMETERS["LIGHT_UPKEEP"]["CITY"]
+            - PARAMETERS["CITY_ADJACENCY_BONUS"] * same_team
+        )
+        city_ids = self.citytile_city[own]
+        totals = np.bincount(city_ids, weights=upkeep[own])
+        return {city_id: float(totals[city_id]) for city_id in self.cities}
+
+    # observations
+
+    def updates(self, team: int) -> List[str]:
+        """
+        Messages of the current turn for team, as read by main.py
+        """
+        messages = []
+        if self.turn == 0:
+            messages += [str(team), f"{self.width} {self.height}"]
+
+        for t in (0, 1):
+            messages.append(
+                f"{INPUT_CONSTANTS.RESEARCH_POINTS} {t} {self.research_points[t]}"
+            )
+
+        ys, xs = np.nonzero(self.resource_amount > 0)
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            name = _RESOURCE_NAMES[int(self.resource_type[y, x])]
+            amount = int(self.resource_amount[y, x])
+            messages.append(f"{INPUT_CONSTANTS.RESOURCES} {name} {x} {y} {amount}")
+
+        for unit in self.units.values():
+            wood, coal, uranium = unit.cargo
+            messages.append(
+                f"{INPUT_CONSTANTS.UNITS} {unit.type} {unit.team} {unit.id} "
+                f"{unit.x} {unit.y} {unit.cooldown} {wood} {coal} {uranium}"
+            )
+
+        upkeep = self.light_upkeep()
+        for city_id, city in self.cities.items():
+            messages.append(
+                f"{INPUT_CONSTANTS.CITY} {city.team} {city.id} {city.fuel} "
+                f"{upkeep[city_id]}"
+            )
+        ys, xs = np.nonzero(self.citytile_team != NO_TEAM)
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            city = self.cities[int(self.citytile_city[y, x])]
+            messages.append(
+                f"{INPUT_CONSTANTS.CITY_TILES} {city.team} {city.id} {x} {y} "
+                f"{self.citytile_cooldown[y, x]}"
+            )
+
+        ys, xs = np.nonzero(self.road > 0)
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            messages.append(f"{INPUT_CONSTANTS.ROADS} {x} {y} {self.road[y, x]}")
+
+        messages.append(INPUT_CONSTANTS.DONE)
+        return messages
+
+    # turn
+
+    def step(self, actions: List[List[str]]) -> None:
+        """
+        Play one turn with the actions of team 0 and team 1
+        """
+        if self._shared_objects:
+            self.units = {unit_id: unit.copy() for unit_id, unit in self.units.items()}
+            self.cities = {
+                city_id: city.copy() for city_id, city in self.cities.items()
+            }
+            self.research_points = self.research_points[:]
+            self._shared_objects = False
+
+        acted = set()
+        moves: Dict[str, Tuple[int, int]] = {}
+        for team, team_actions in enumerate(actions):
+            for action in team_actions:
+                self._apply_action(team, action.split(" "), acted, moves)
+
+        self._move_units(moves)
+        self._develop_roads()
+        self._collect_resources()
+        self._deposit_resources()
+        self._grow_wood()
+        if self.is_night():
+            self._consume_fuel()
+
+        for unit in self.units.values():
+            unit.cooldown = max(0.0, unit.cooldown - 1)
+        if self.citytile_cooldown.any():
+            cooldown = self._layer("citytile_cooldown")
+            np.maximum(cooldown - 1, 0, out=cooldown)
+        self.turn += 1
+
+    def _apply_action(self, team: int, args: List[str], acted: set, moves: dict):
+        """
+        Apply an action, or record it for moves. Invalid actions are ignored.
+        """
+        command = args[0]
+        if command in ("r", "bw", "bc") and len(args) == 3:
+            x, y = int(args[1]), int(args[2])
+            if (
+                not self.is_valid(x, y)
+                or self.citytile_team[y, x] != team
+                or self.citytile_cooldown[y, x] >= 1
+                or (x, y) in acted
+            ):
+                return
+            if command == "r":
+                self.research_points[team] += 1
+            elif self.unit_count(team) < self.city_tile_count(team):
+                u_type = UNIT_TYPES.WORKER if command == "bw" else UNIT_TYPES.CART
+                self._spawn_unit(team, u_type, x, y)
+            else:
+                return
+            acted.add((x, y))
+            self._layer("citytile_cooldown")[y, x] = PARAMETERS["CITY_ACTION_COOLDOWN"]
+            return
+
+        if len(args) < 2:
+            return
+        unit = self.units.get(args[1])
+        if unit is None or unit.team != team or unit.cooldown >= 1:
+            return
+        if unit.id in acted:
+            return
+
+        if command == "m" and len(args) == 3 and args[2] in _DELTAS:
+            dx, dy = _DELTAS[args[2]]
+            if dx or dy:
+                moves[unit.id] = (unit.x + dx, unit.y + dy)
+                acted.add(unit.id)
+        elif command == "bcity" and unit.type == UNIT_TYPES.WORKER:
+            if (
+                self.resource_amount[unit.y, unit.x] <= 0
+                and self.citytile_team[unit.y, unit.x] == NO_TEAM
+                and sum(unit.cargo) >= PARAMETERS["CITY_BUILD_COST"]
+            ):
+                cost = PARAMETERS["CITY_BUILD_COST"]
+                for r_id in range(3):
+                    spent = min(cost, unit.cargo[r_id])
+                    unit.cargo[r_id] -= spent
+                    cost -= spent
+                self._build_city_tile(team, unit.x, unit.y)
+                self._reset_cooldown(unit)
+                acted.add(unit.id)
+        elif command == "p" and unit.type == UNIT_TYPES.WORKER:
+            if self.citytile_team[unit.y, unit.x] == NO_TEAM:
+                self._layer("road")[unit.y, unit.x] = max(
+                    PARAMETERS["MIN_ROAD"],
+                    self.road[unit.y, unit.x] - PARAMETERS["PILLAGE_RATE"],
+                )
+                self._reset_cooldown(unit)
+                acted.add(unit.id)
+        elif command == "t" and len(args) == 5:
+            other = self.units.get(args[2])
+            r_id = RESOURCE_TYPE_IDS.get(args[3])
+            if other is None or other.team != team or r_id is None:
+                return
+            if abs(other.x - unit.x) + abs(other.y - unit.y) != 1:
+                return
+            amount = min(int(args[4]), unit.cargo[r_id], other.space_left())
+            if amount > 0:
+                unit.cargo[r_id] -= amount
+                other.cargo[r_id] += amount
+                self._reset_cooldown(unit)
+                acted.add(unit.id)
+
+    def _move_units(self, moves: Dict[str, Tuple[int, int]]) -> None:
+        """
+        Units cannot leave the map nor enter enemy city tiles. Units that would
+        end up on the same cell outside of a city tile all stay in place, which
+        can block more units, until no collision is left.
+        """
+        targets = {}
+        for unit_id, (x, y) in moves.items():
+            unit = self.units[unit_id]
+            if self.is_valid(x, y) and self.citytile_team[y, x] in (NO_TEAM, unit.team):
+                targets[unit_id] = (x, y)
+
+        while True:
+            occupants: Dict[Tuple[int, int], List[str]] = {}
+            for unit in self.units.values():
+                cell = targets.get(unit.id, (unit.x, unit.y))
+                occupants.setdefault(cell, []).append(unit.id)
+
+            blocked = [
+                unit_id
+                for (x, y), unit_ids in occupants.items()
+                if len(unit_ids) > 1 and self.citytile_team[y, x] == NO_TEAM
+                for unit_id in unit_ids
+                if unit_id in targets
+            ]
+            if not blocked:
+                break
+            for unit_id in blocked:
+                del targets[unit_id]
+
+        for unit_id, (x, y) in targets.items():
+            unit = self.units[unit_id]
+            unit.x, unit.y = x, y
+            self._reset_cooldown(unit)
+
+    def _develop_roads(self) -> None:
+        for unit in self.units.values():
+            if unit.type == UNIT_TYPES.CART:
+                if self.citytile_team[unit.y, unit.x] == NO_TEAM:
+                    self._layer("road")[unit.y, unit.x] = min(
+                        PARAMETERS["MAX_ROAD"],
+                        self.road[unit.y, unit.x]
+                        + PARAMETERS["CART_ROAD_DEVELOPMENT_RATE"],
+                    )
+
+    def _collect_resources(self) -> None:
+        """
+        Workers collect from the resource tiles they are on or next to, the
+        most valuable resources first
+        """
+        ys, xs = np.nonzero(self.resource_amount > 0)
+        # type of each resource tile, read once instead of cell by cell
+        tile_types = dict(
+            zip(zip(xs.tolist(), ys.tolist()), self.resource_type[ys, xs].tolist())
+        )
+        requests: Dict[Tuple[int, int], List[SimUnit]] = {}
+        for unit in self.units.values():
+            if unit.type != UNIT_TYPES.WORKER:
+                continue
+            for dx, dy in _DELTAS.values():
+                cell = (unit.x + dx, unit.y + dy)
+                if cell in tile_types:
+                    requests.setdefault(cell, []).append(unit)
+
+        for r_id in sorted(_RESOURCE_NAMES, reverse=True):
+            rate = _COLLECTION_RATES[r_id]
+            for (x, y), workers in requests.items():
+                if tile_types[x, y] != r_id:
+                    continue
+                workers = [
+                    unit
+                    for unit in workers
+                    if self.research_points[unit.team] >= _RESEARCH_REQUIREMENTS[r_id]
+                    and unit.space_left() > 0
+                ]
+                if not workers:
+                    continue
+                amount = int(self.resource_amount[y, x])
+                if rate * len(workers) <= amount:
+                    shares = [rate] * len(workers)
+                else:
+                    # the remainder goes one unit at a time to the first
+                    # workers, so that the whole tile is taken
+                    share, remainder = divmod(amount, len(workers))
+                    shares = [share + 1] * remainder
+                    shares += [share] * (len(workers) - remainder)
+                for unit, share in zip(workers, shares):
+                    collected = int(min(share, unit.space_left()))
+                    unit.cargo[r_id] += collected
+                    amount -= collected
+                self._set_resource_amount(x, y, amount)
+
+    def _deposit_resources(self) -> None:
+        for unit in self.units.values():
+            if self.citytile_team[unit.y, unit.x] == unit.team:
+                city = self.cities[int(self.citytile_city[unit.y, unit.x])]
+                city.fuel += sum(
+                    amount * rate for amount, rate in zip(unit.cargo, _FUEL_RATES)
+                )
+                unit.cargo = [0, 0, 0]
+
+    def _grow_wood(self) -> None:
+        wood = (self.resource_type == RESOURCE_TYPE_IDS["wood"]) & (
+            self.resource_amount > 0
+        )
+        grown = np.ceil(self.resource_amount * PARAMETERS["WOOD_GROWTH_RATE"])
+        grown = np.minimum(grown, PARAMETERS["MAX_WOOD_AMOUNT"])
+        grown = np.maximum(self.resource_amount, grown)
+        if (grown[wood] != self.resource_amount[wood]).any():
+            self._layer("resource_amount")[wood] = grown[wood]
+
+    def _consume_fuel(self) -> None:
+        """
+        Cities burn their light upkeep and go dark without enough fuel, units
+        outside of cities burn their cargo and die without enough of it
+        """
+        for city_id, upkeep in self.light_upkeep().items():
+            city = self.cities[city_id]
+            if city.fuel >= upkeep:
+                city.fuel -= upkeep
+            else:
+                self._destroy_city(city_id)
+
+        for unit in list(self.units.values()):
+            if self.citytile_team[unit.y, unit.x] == unit.team:
+                continue
+            need = PARAMETERS["LIGHT_UPKEEP"][_UNIT_KEYS[unit.type]]
+            for r_id, rate in enumerate(_FUEL_RATES):
+                burnt = min(unit.cargo[r_id], math.ceil(need / rate))
+                unit.cargo[r_id] -= burnt
+                need -= burnt * rate
+                if need <= 0:
+                    break
+            if need > 0:
+                del self.units[unit.id]
+
+    # helpers
+
+    def _layer(self, name: str) -> np.ndarray:
+        """
+        Layer to write to, copied first if it is shared with another state
+        """
+        if name in self._shared_layers:
+            setattr(self, name, getattr(self, name).copy())
+            self._shared_layers.discard(name)
+        return getattr(self, name)
+
+    def is_valid(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def _new_id(self, prefix: str) -> str:
+        new_id = f"{prefix}_{self._next_id}"
+        self._next_id += 1
+        return new_id
+
+    def _spawn_unit(self, team: int, u_type: int, x: int, y: int) -> None:
+        unit = SimUnit(self._new_id("u"), team, u_type, x, y)
+        self.units[unit.id] = unit
+
+    def _reset_cooldown(self, unit: SimUnit) -> None:
+        base = PARAMETERS["UNIT_ACTION_COOLDOWN"][_UNIT_KEYS[unit.type]]
+        unit.cooldown = float(max(1, base - self.road[unit.y, unit.x]))
+
+    def _set_resource_amount(self, x: int, y: int, amount: float) -> None:
+        resource_amount = self._layer("resource_amount")
+        resource_amount[y, x] = amount
+        if amount <= 0:
+            resource_amount[y, x] = 0
+            self._layer("resource_type")[y, x] = NO_RESOURCE
+
+    def _build_city_tile(self, team: int, x: int, y: int) -> None:
+        """
+        New city tile, joining (and merging) the cities of the team next to it
+        """
+        neighbor_cities = set()
+        for dx, dy in _DELTAS.values():
+            x2, y2 = x + dx, y + dy
+            if self.is_valid(x2, y2) and self.citytile_team[y2, x2] == team:
+                neighbor_cities.add(int(self.citytile_city[y2, x2]))
+
+        if neighbor_cities:
+            city_id = min(neighbor_cities)
+            city = self.cities[city_id]
+            for other_id in neighbor_cities - {city_id}:
+                city.fuel += self.cities.pop(other_id).fuel
+                citytile_city = self._layer("citytile_city")
+                citytile_city[citytile_city == other_id] = city_id
+        else:
+            city_id = self._next_id
+            self.cities[city_id] = SimCity(self._new_id("c"), team)
+
+        self._layer("citytile_team")[y, x] = team
+        self._layer("citytile_city")[y, x] = city_id
+        self._layer("citytile_cooldown")[y, x] = 0
+        self._layer("road")[y, x] = PARAMETERS["MAX_ROAD"]
+
+    def _destroy_city(self, city_id: int) -> None:
+        tiles = self.citytile_city == city_id
+        self._layer("citytile_team")[tiles] = NO_TEAM
+        self._layer("citytile_city")[tiles] = -1
+        self._layer("citytile_cooldown")[tiles] = 0
+        self._layer("road")[tiles] = PARAMETERS["MIN_ROAD"]
+        del self.cities[city_id]
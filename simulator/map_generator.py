@@ -0,0 +1,62 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from lux.game_map.game_map import NO_RESOURCE, RESOURCE_TYPE_IDS
+from lux.constants import Constants
+
+RESOURCE_TYPES = Constants.RESOURCE_TYPES
+
+WOOD = RESOURCE_TYPE_IDS[RESOURCE_TYPES.WOOD]
+COAL = RESOURCE_TYPE_IDS[RESOURCE_TYPES.COAL]
+URANIUM = RESOURCE_TYPE_IDS[RESOURCE_TYPES.URANIUM]
+
+# (type, clusters per half of a 12x12 map, cluster size, amount range per tile)
+_CLUSTERS = [
+    (WOOD, 3, 8, (150, 500)),
+    (COAL, 1, 5, (300, 450)),
+    (URANIUM, 1, 3, (300, 350)),
+]
+
+
+def generate_map(
+    size: int, seed: int = 0
+) -> Tuple[np.ndarray, np.ndarray, List[Tuple[int, int]]]:
+    """
+    Random map, mirrored left to right so that both teams get the same
+    resources.
+
+    Returns the resource type layer, the resource amount layer (both indexed
+    [y, x]) and the start cell of each team.
+    """
+    rng = np.random.default_rng(seed)
+    half = (size + 1) // 2
+    resource_type = np.full((size, half), NO_RESOURCE, dtype=np.int8)
+    resource_amount = np.zeros((size, half), dtype=np.float64)
+
+    scale = max(1, (size * size) // (12 * 12))
+    for r_type, n_clusters, cluster_size, (low, high) in _CLUSTERS:
+        for _ in range(n_clusters * scale):
+            x, y = int(rng.integers(half)), int(rng.integers(size))
+            for _ in range(cluster_size):
+                if resource_type[y, x] == NO_RESOURCE:
+                    resource_type[y, x] = r_type
+                    resource_amount[y, x] = rng.integers(low, high + 1)
+                dx, dy = [(1, 0), (-1, 0), (0, 1), (0, -1)][rng.integers(4)]
+                x = min(max(x + dx, 0), half - 1)
+                y = min(max(y + dy, 0), size - 1)
+
+    # start next to a forest, on an empty cell of the left half
+    free = np.argwhere(resource_type[:, : size // 2] == NO_RESOURCE)
+    wood = np.argwhere(resource_type == WOOD)
+    distances = np.abs(free[:, None, :] - wood[None, :, :]).sum(axis=2).min(axis=1)
+    candidates = free[distances == 1] if (distances == 1).any() else free
+    start_y, start_x = candidates[rng.integers(len(candidates))]
+
+    mirrored = slice(size - half - 1, None, -1) if size % 2 else slice(None, None, -1)
+    resource_type = np.concatenate([resource_type, resource_type[:, mirrored]], axis=1)
+    resource_amount = np.concatenate(
+        [resource_amount, resource_amount[:, mirrored]], axis=1
+    )
+    starts = [(int(start_x), int(start_y)), (size - 1 - int(start_x), int(start_y))]
+    return resource_type, resource_amount, starts
@@ -0,0 +1,116 @@
+import random
+from typing import List
+
+from lux.constants import Constants
+
+INPUT_CONSTANTS = Constants.INPUT_CONSTANTS
+RESOURCE_TYPES = Constants.RESOURCE_TYPES
+
+TurnMessages = List[str]
+
+
+def synthetic_game(
+    size: int = 32,
+    turns: int = 40,
+    units_per_team: int = 10,
+    city_tiles_per_team: int = 8,
+    resource_ratio: float = 0.2,
+    seed: int = 0,
+) -> List[TurnMessages]:
+    """
+    Generate the update messages of a fake game, one list per turn.
+
+    The first turn starts with the player id and map size lines, exactly like
+    the messages received by main.py. Units wander randomly, resources deplete
+    and city tiles are spread over the map so that every kind of update line
+    shows up in realistic proportions.
+    """
+    rng = random.Random(seed)
+    cells = [(x, y) for y in range(size) for x in range(size)]
+    rng.shuffle(cells)
+
+    n_resources = int(resource_ratio * size * size)
+    resources = {}
+    for x, y in cells[:n_resources]:
+        r_type = rng.choices(
+            [RESOURCE_TYPES.WOOD, RESOURCE_TYPES.COAL, RESOURCE_TYPES.URANIUM],
+            weights=[6, 3, 1],
+        )[0]
+        resources[(x, y)] = [r_type, rng.randint(100, 500)]
+
+    free_cells = cells[n_resources:]
+    city_tiles = {}
+    for i, pos in enumerate(free_cells[: 2 * city_tiles_per_team]):
+        team = i % 2
+        city_tiles[pos] = (team, f"c_{team}_{i // 6}")
+
+    units = {}
+    unit_cells = free_cells[2 * city_tiles_per_team :]
+    for i, pos in enumerate(unit_cells[: 2 * units_per_team]):
+        units[f"u_{i}"] = [i % 2, list(pos)]
+
+    game = []
+    for turn in range(turns):
+        messages = ["0", f"{size} {size}"] if turn == 0 else []
+
+        for team in (0, 1):
+            messages.append(f"{INPUT_CONSTANTS.RESEARCH_POINTS} {team} {turn}")
+
+        for (x, y), (r_type, amount) in list(resources.items()):
+            messages.append(f"{INPUT_CONSTANTS.RESOURCES} {r_type} {x} {y} {amount}")
+            amount -= rng.randint(0, 20)
+            if amount <= 0:
+                del resources[(x, y)]
+            else:
+                resources[(x, y)][1] = amount
+
+        for unit_id, (team, pos) in units.items():
+            pos[0] = min(size - 1, max(0, pos[0] + rng.randint(-1, 1)))
+            pos[1] = min(size - 1, max(0, pos[1] + rng.randint(-1, 1)))
+            messages.append(
+                f"{INPUT_CONSTANTS.UNITS} 0 {team} {unit_id} {pos[0]} {pos[1]} "
+                f"{rng.randint(0, 2)} {rng.randint(0, 100)} 0 0"
+            )
+
+        city_ids = sorted(set(city_tiles.values()))
+        for team, city_id in city_ids:
+            messages.append(f"{INPUT_CONSTANTS.CITY} {team} {city_id} 150 23")
+        for (x, y), (team, city_id) in city_tiles.items():
+            messages.append(
+                f"{INPUT_CONSTANTS.CITY_TILES} {team} {city_id} {x} {y} "
+                f"{rng.randint(0, 10)}"
+            )
+        for x, y in city_tiles:
+            messages.append(f"{INPUT_CONSTANTS.ROADS} {x} {y} 6")
+
+        messages.append(INPUT_CONSTANTS.DONE)
+        game.append(messages)
+
+    return game
+
+
+def load_observations(path: str) -> List[TurnMessages]:
+    """
+    Read the messages received by main.py, as recorded from its stdin, and
+    split them into turns.
+    """
+    game = []
+    messages: TurnMessages = []
+    with open(path) as f:
+        for line in f:
+            line = line.rstrip("\n")
+            messages.append(line)
+            if line == INPUT_CONSTANTS.DONE:
+                game.append(messages)
+                messages = []
+    return game
+
+
+class Observation(dict):
+    """
+    Same observation object as the one main.py hands to agent.agent
+    """
+
+    def __init__(self, updates: TurnMessages, step: int, player: int = 0) -> None:
+        super().__init__(updates=updates, step=step)
+        self.player = player
@@ -0,0 +1,147 @@
+"""
+Play games of the agent against itself, or against an idle opponent, on the
+headless simulator and measure the number of turns simulated per second.
+
+    python -m simulator.run [--size 12] [--games 5] [--opponent self]
+
+With --profile DIR, the agents write the time spent in each phase of their
+turns to DIR/game_<size>_<seed>_<team>.json (or .csv with --profile-format).
+"""
+
+import argparse
+import importlib.util
+import os
+import time
+from types import ModuleType
+from typing import Callable, Dict, List, Optional
+
+from simulator.engine import Simulation
+from simulator.observations import Observation
+
+Agent = Callable[[Observation, dict], List[str]]
+
+
+def load_turn_manager() -> ModuleType:
+    """
+    Fresh copy of utils.turn_manager. It keeps the game state in module
+    globals, so each player of a game needs its own copy of the module.
+    """
+    spec = importlib.util.find_spec("utils.turn_manager")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_agent() -> Agent:
+    """
+    Fresh copy of the agent, see load_turn_manager
+    """
+    module = load_turn_manager()
+
+    def agent(observation, configuration):
+        return module.TurnManager(observation, configuration).play_turn()
+
+    # games may end before the last turn the agent closes its log on
+    agent.close = module.end_game
+    return agent
+
+
+def idle_agent(observation, configuration) -> List[str]:
+    return []
+
+
+def play_game(
+    agents: List[Agent],
+    size: int = 12,
+    seed: int = 0,
+    configurations: Optional[List[dict]] = None,
+    max_turns: Optional[int] = None,
+) -> Dict:
+    """
+    Play a game between agents[0] and agents[1] and return its result
+    """
+    configurations = configurations or [{}, {}]
+    simulation = Simulation(size, seed, max_turns)
+    agent_time = 0.0
+    start = time.perf_counter()
+    try:
+        while not simulation.is_over():
+            actions = []
+            for team, agent in enumerate(agents):
+                observation = Observation(
+                    simulation.updates(team), simulation.turn, player=team
+                )
+                agent_start = time.perf_counter()
+                actions.append(agent(observation, configurations[team]))
+                agent_time += time.perf_counter() - agent_start
+            simulation.step(actions)
+    finally:
+        for agent in agents:
+            if hasattr(agent, "close"):
+                agent.close()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "winner": simulation.winner(),
+        "turns": simulation.turn,
+        "city_tiles": [simulation.city_tile_count(team) for team in (0, 1)],
+        "units": [simulation.unit_count(team) for team in (0, 1)],
+        "research_points": list(simulation.research_points),
+        "elapsed": elapsed,
+        "agent_time": agent_time,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=12)
+    parser.add_argument("--games", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--opponent", choices=["self", "idle"], default="self")
+    parser.add_argument("--profile", metavar="DIR")
+    parser.add_argument("--profile-format", choices=["json", "csv"], default="json")
+    args = parser.parse_args()
+    if args.profile:
+        os.makedirs(args.profile, exist_ok=True)
+
+    print(
+        f"{'seed':>6} {'winner':>7} {'turns':>6} {'tiles':>8} {'units':>8}"
+        f" {'turns/s':>9} {'sim turns/s':>12}"
+    )
+    total_turns = total_elapsed = total_sim = 0.0
+    for seed in range(args.seed, args.seed + args.games):
+        opponent = load_agent() if args.opponent == "self" else idle_agent
+        configurations = [{}, {}]
+        if args.profile:
+            configurations = [
+                {
+                    "PROFILE": os.path.join(
+                        args.profile,
+                        f"game_{args.size}_{seed}_{team}.{args.profile_format}",
+                    )
+                }
+                for team in (0, 1)
+            ]
+        result = play_game(
+            [load_agent(), opponent], args.size, seed, configurations=configurations
+        )
+        sim_time = result["elapsed"] - result["agent_time"]
+        total_turns += result["turns"]
+        total_elapsed += result["elapsed"]
+        total_sim += sim_time
+        tiles = "{}-{}".format(*result["city_tiles"])
+        units = "{}-{}".format(*result["units"])
+        print(
+            f"{seed:>6} {str(result['winner']):>7} {result['turns']:>6}"
+            f" {tiles:>8} {units:>8}"
+            f" {result['turns'] / result['elapsed']:>9.0f}"
+            f" {result['turns'] / sim_time:>12.0f}"
+        )
+    print(
+        f"total: {total_turns / total_elapsed:.0f} turns/s with the agents,"
+        f" {total_turns / total_sim:.0f} turns/s for the simulator alone"
+    )
+
+
+if __name__ == "__main__":
+    main()
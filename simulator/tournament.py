@@ -0,0 +1,287 @@
+"""
+Round-robin tournament between configurations of the agent.
+
+Every agent is a main.py process with its own configuration, talking the
+stdin/stdout protocol of the competition with a local referee that runs the
+game on the simulator. Matches run in parallel in a process pool.
+
+    python -m simulator.tournament --config a='{"MAX_CITIES": 2}' \
+        --config b='{"MAX_CITIES": 5, "MAX_UNITS": 5}' [--games 4] [--size 12]
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import selectors
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from simulator.engine import Simulation
+
+# per turn time limit and time bank of the competition
+DEFAULT_TURN_TIMEOUT = 3.0
+DEFAULT_OVERAGE = 60.0
+ELO_K = 32
+ELO_START = 1500
+
+_FINISH = b"D_FINISH\n"
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class AgentTimeout(Exception):
+    pass
+
+
+class AgentProcess:
+    """
+    main.py running in a child process with the given configuration
+    """
+
+    def __init__(
+        self,
+        config: dict,
+        turn_timeout: float = DEFAULT_TURN_TIMEOUT,
+        overage: float = DEFAULT_OVERAGE,
+    ):
+        self.turn_timeout = turn_timeout
+        self.overage = overage
+        self.max_turn_time = 0.0
+        self.process = subprocess.Popen(
+            [sys.executable, "main.py", json.dumps(config)],
+            cwd=_ROOT,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            bufsize=0,
+        )
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self.process.stdout, selectors.EVENT_READ)
+        self._buffer = b""
+
+    def act(self, updates: List[str]) -> List[str]:
+        """
+        Send the updates of a turn and wait for the actions
+
+        Time spent over the turn timeout is taken from the overage time, the
+        agent times out once it is spent. Raises AgentTimeout.
+        """
+        start = time.perf_counter()
+        deadline = start + self.turn_timeout + self.overage
+        try:
+            self.process.stdin.write(("\n".join(updates) + "\n").encode())
+        except BrokenPipeError:
+            raise AgentTimeout("agent process exited")
+
+        while _FINISH not in self._buffer:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or not self._selector.select(remaining):
+                raise AgentTimeout("turn timeout")
+            chunk = os.read(self.process.stdout.fileno(), 1 << 16)
+            if not chunk:
+                raise AgentTimeout("agent process exited")
+            self._buffer += chunk
+
+        elapsed = time.perf_counter() - start
+        self.max_turn_time = max(self.max_turn_time, elapsed)
+        self.overage -= max(0.0, elapsed - self.turn_timeout)
+
+        output, self._buffer = self._buffer.split(_FINISH, 1)
+        lines = output.decode().splitlines()
+        actions_line = lines[-1] if lines else ""
+        return [action for action in actions_line.split(",") if action]
+
+    def close(self) -> None:
+        self._selector.close()
+        self.process.kill()
+        self.process.wait()
+        self.process.stdin.close()
+        self.process.stdout.close()
+
+
+def play_match(match: Tuple) -> Dict:
+    """
+    Referee a game between two configurations, the one that times out loses
+    """
+    index, names, configs, seed, size, turn_timeout, overage = match
+    simulation = Simulation(size, seed)
+    agents = [AgentProcess(config, turn_timeout, overage) for config in configs]
+    winner = None
+    timeouts = [False, False]
+    try:
+        while not simulation.is_over():
+            actions = []
+            for team, agent in enumerate(agents):
+                try:
+                    actions.append(agent.act(simulation.updates(team)))
+                except AgentTimeout:
+                    timeouts[team] = True
+            if any(timeouts):
+                break
+            simulation.step(actions)
+    finally:
+        for agent in agents:
+            agent.close()
+
+    if timeouts[0] != timeouts[1]:
+        winner = timeouts.index(False)
+    elif not any(timeouts):
+        winner = simulation.winner()
+    return {
+        "index": index,
+        "names": names,
+        "seed": seed,
+        "winner": winner,
+        "turns": simulation.turn,
+        "city_tiles": [simulation.city_tile_count(team) for team in (0, 1)],
+        "timeouts": timeouts,
+        "max_turn_time": [agent.max_turn_time for agent in agents],
+    }
+
+
+def schedule(
+    configs: Dict[str, dict],
+    games: int,
+    size: int,
+    turn_timeout: float,
+    overage: float,
+) -> List[Tuple]:
+    """
+    Matches of a round robin, each pair plays games seeds on both sides
+    """
+    matches = []
+    for name_a, name_b in itertools.combinations(configs, 2):
+        for seed in range(games):
+            for names in ((name_a, name_b), (name_b, name_a)):
+                matches.append(
+                    (
+                        len(matches),
+                        names,
+                        [configs[name] for name in names],
+                        seed,
+                        size,
+                        turn_timeout,
+                        overage,
+                    )
+                )
+    return matches
+
+
+def standings(names: List[str], results: List[Dict]) -> Dict[str, Dict]:
+    """
+    Win rate, Elo rating and timeouts of each configuration. Ratings are
+    updated in the order the matches were scheduled so they do not depend on
+    which match finished first.
+    """
+    table = {
+        name: {
+            "games": 0,
+            "wins": 0,
+            "draws": 0,
+            "losses": 0,
+            "timeouts": 0,
+            "max_turn_time": 0.0,
+            "elo": float(ELO_START),
+        }
+        for name in names
+    }
+    for result in sorted(results, key=lambda result: result["index"]):
+        rows = [table[name] for name in result["names"]]
+        winner = result["winner"]
+        expected = 1 / (1 + 10 ** ((rows[1]["elo"] - rows[0]["elo"]) / 400))
+        score = 0.5 if winner is None else float(winner == 0)
+        rows[0]["elo"] += ELO_K * (score - expected)
+        rows[1]["elo"] -= ELO_K * (score - expected)
+
+        for team, row in enumerate(rows):
+            row["games"] += 1
+            if winner is None:
+                row["draws"] += 1
+            elif winner == team:
+                row["wins"] += 1
+            else:
+                row["losses"] += 1
+            row["timeouts"] += result["timeouts"][team]
+            row["max_turn_time"] = max(
+                row["max_turn_time"], result["max_turn_time"][team]
+            )
+
+    for row in table.values():
+        row["win_rate"] = (row["wins"] + 0.5 * row["draws"]) / max(1, row["games"])
+    return table
+
+
+def default_configs() -> Dict[str, dict]:
+    return {
+        f"c{max_cities}u{max_units}": {
+            "MAX_CITIES": max_cities,
+            "MAX_UNITS": max_units,
+        }
+        for max_cities, max_units in [(2, 2), (3, 2), (5, 5)]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--config",
+        action="append",
+        default=[],
+        metavar="NAME=JSON",
+        help="configuration of an agent, can be repeated",
+    )
+    parser.add_argument("--games", type=int, default=2, help="seeds per pairing")
+    parser.add_argument("--size", type=int, default=12)
+    parser.add_argument("--turn-timeout", type=float, default=DEFAULT_TURN_TIMEOUT)
+    parser.add_argument("--overage", type=float, default=DEFAULT_OVERAGE)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--output", help="write the match results as JSON")
+    args = parser.parse_args()
+
+    configs = default_configs()
+    if args.config:
+        configs = {}
+        for config in args.config:
+            name, value = config.split("=", 1)
+            configs[name] = json.loads(value)
+    if len(configs) < 2:
+        parser.error("a tournament needs at least two configurations")
+
+    matches = schedule(configs, args.games, args.size, args.turn_timeout, args.overage)
+    results = []
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.processes) as pool:
+        for result in pool.imap_unordered(play_match, matches):
+            results.append(result)
+            print(
+                f"[{len(results)}/{len(matches)}] {result['names'][0]} vs"
+                f" {result['names'][1]} seed {result['seed']}: winner"
+                f" {result['winner']} after {result['turns']} turns",
+                file=sys.stderr,
+            )
+    elapsed = time.perf_counter() - start
+
+    table = standings(list(configs), results)
+    print(
+        f"{'config':>12} {'games':>6} {'W-D-L':>10} {'win rate':>9} {'elo':>7}"
+        f" {'timeouts':>9} {'max turn':>9}"
+    )
+    for name, row in sorted(table.items(), key=lambda item: -item[1]["elo"]):
+        record = "{wins}-{draws}-{losses}".format(**row)
+        print(
+            f"{name:>12} {row['games']:>6} {record:>10} {row['win_rate']:>9.2f}"
+            f" {row['elo']:>7.0f} {row['timeouts']:>9} {row['max_turn_time']:>8.3f}s"
+        )
+    print(f"{len(matches)} matches in {elapsed:.1f}s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": results, "standings": table}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
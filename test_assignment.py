@@ -0,0 +1,62 @@
+import itertools
+
+import numpy as np
+
+from utils.assignment import (
+    UNREACHABLE_COST,
+    assign,
+    greedy_assignment,
+    hungarian,
+)
+
+
+def best_cost(cost):
+    n_rows, n_cols = cost.shape
+    if n_rows > n_cols:
+        return best_cost(cost.T)
+    return min(
+        sum(cost[row, col] for row, col in enumerate(cols))
+        for cols in itertools.permutations(range(n_cols), n_rows)
+    )
+
+
+def total(cost, assignment):
+    return sum(cost[row, col] for row, col in assignment.items())
+
+
+def assert_valid(cost, assignment):
+    assert len(set(assignment.values())) == len(assignment)
+    assert len(assignment) == min(cost.shape)
+
+
+def test_hungarian_is_optimal():
+    rng = np.random.default_rng(0)
+    for n_rows, n_cols in [(1, 1), (3, 3), (4, 6), (6, 4), (5, 5)]:
+        for _ in range(20):
+            cost = rng.integers(0, 20, (n_rows, n_cols)).astype(float)
+            assignment = hungarian(cost)
+            assert_valid(cost, assignment)
+            assert total(cost, assignment) == best_cost(cost)
+
+
+def test_greedy_assignment():
+    cost = np.array([[1.0, 2.0], [1.0, 10.0]])
+    assignment = greedy_assignment(cost)
+    assert_valid(cost, assignment)
+    assert total(cost, assignment) == 11
+    assert total(cost, hungarian(cost)) == 3
+
+
+def test_assign_deadline_falls_back_to_greedy():
+    rng = np.random.default_rng(1)
+    cost = rng.random((30, 40))
+    assignment = hungarian(cost, deadline=0)
+    assert_valid(cost, assignment)
+    assert assignment == greedy_assignment(cost)
+
+
+def test_assign_drops_unreachable_pairs():
+    cost = np.array([[1.0, UNREACHABLE_COST], [UNREACHABLE_COST, UNREACHABLE_COST]])
+    assert assign(cost) == {0: 0}
+    assert assign(cost, max_hungarian_size=0) == {0: 0}
+    assert assign(np.zeros((0, 3))) == {}
@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+import time
+
+from lux.game import Game
+
+from utils.beam_planner import BeamPlanner, split_actions
+
+
+def make_game(messages):
+    game = Game()
+    game._initialize(["0", "12 12"])
+    game._update(messages + ["D_DONE"])
+    return game
+
+
+# a worker full of wood next to a city that has fuel for the night
+MESSAGES = [
+    "rp 0 0",
+    "rp 1 0",
+    "u 0 0 u_1 2 1 0 100 0 0",
+    "c 0 c_2 1000 23",
+    "ct 0 c_2 1 1 0",
+    "u 0 1 u_3 10 10 0 0 0 0",
+    "c 1 c_4 1000 23",
+    "ct 1 c_4 11 11 0",
+]
+
+
+def test_split_actions():
+    annotations, joint = split_actions(["dc 1 2", "m u_1 n", "bw 3 4", "bcity u_2"])
+    assert annotations == ["dc 1 2"]
+    assert joint == {"u_1": "m u_1 n", (3, 4): "bw 3 4", "u_2": "bcity u_2"}
+
+
+def test_planner_builds_city_that_survives_the_night():
+    game = make_game(MESSAGES)
+    planner = BeamPlanner(0, depth=3, width=4)
+    actions = planner.plan(game, ["dc 2 1"], time.perf_counter() + 5)
+
+    assert actions[0] == "dc 2 1"
+    assert "bcity u_1" in actions
+    assert planner.rollouts > 1
+
+
+def test_planner_keeps_actions_without_time():
+    game = make_game(MESSAGES)
+    planner = BeamPlanner(0)
+    actions = ["m u_1 e", "bw 1 1"]
+    assert planner.plan(game, actions, time.perf_counter()) == actions
+    assert planner.rollouts == 0
+
+
+def test_planner_reserves_time_for_a_rollout():
+    game = make_game(MESSAGES)
+    # rollouts are known to take longer than what is left of the budget
+    planner = BeamPlanner(0, rollout_time=1.0)
+    actions = ["m u_1 e", "bw 1 1"]
+    assert planner.plan(game, actions, time.perf_counter() + 0.5) == actions
+    assert planner.rollouts == 0
+
+    planner = BeamPlanner(0)
+    deadline = time.perf_counter() + 0.05
+    planner.plan(game, actions, deadline)
+    assert time.perf_counter() < deadline
+    assert planner.rollouts > 0 and planner.rollout_time > 0
+
+
+def test_agent_only_loads_the_features_it_uses():
+    code = (
+        "import sys, agent;"
+        "print('simulator.engine' in sys.modules, 'utils.inference' in sys.modules)"
+    )
+    output = subprocess.check_output(
+        [sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    assert output.split() == [b"False", b"False"]
@@ -0,0 +1,79 @@
+import numpy as np
+
+from lux.game import Game
+
+from utils.features import CHANNEL_INDEX, CHANNELS, FeatureEncoder
+
+from simulator.observations import synthetic_game
+
+
+def play(size, turns, seed):
+    messages = synthetic_game(size=size, turns=turns, units_per_team=8, seed=seed)
+    game = Game()
+    game._initialize(messages[0])
+    for i, turn in enumerate(messages):
+        game._update(turn[2:] if i == 0 else turn)
+    return game
+
+
+def reference_planes(game, team):
+    """
+    Same planes computed cell by cell from the game objects
+    """
+    planes = {name: np.zeros((32, 32)) for name, _ in CHANNELS}
+    for cell in game.map:
+        x, y = cell.pos.x, cell.pos.y
+        planes["map"][y, x] = 1
+        if cell.has_resource():
+            planes[cell.resource.type][y, x] = cell.resource.amount
+        planes["road"][y, x] = cell.road
+        if cell.citytile is not None:
+            prefix = "own" if cell.citytile.team == team else "enemy"
+            city = game.players[cell.citytile.team].cities[cell.citytile.cityid]
+            planes[f"{prefix}_city_tiles"][y, x] = 1
+            planes[f"{prefix}_city_fuel"][y, x] = city.fuel / city.light_upkeep
+            planes[f"{prefix}_city_cooldown"][y, x] = cell.citytile.cooldown
+        planes["day_night"][y, x] = game.turn % 40
+        planes["night"][y, x] = game.turn % 40 >= 30
+        planes["turn"][y, x] = game.turn
+        planes["own_research"][y, x] = game.players[team].research_points
+        planes["enemy_research"][y, x] = game.players[1 - team].research_points
+    for player in game.players:
+        prefix = "own" if player.team == team else "enemy"
+        for unit in player.units:
+            x, y = unit.pos.x, unit.pos.y
+            kind = "workers" if unit.is_worker() else "carts"
+            planes[f"{prefix}_{kind}"][y, x] += 1
+            planes[f"{prefix}_cargo"][y, x] += 100 - unit.get_cargo_space_left()
+            cooldown = planes[f"{prefix}_unit_cooldown"]
+            cooldown[y, x] = max(cooldown[y, x], unit.cooldown)
+    return np.stack(
+        [np.clip(planes[name] / scale, 0, 1) for name, scale in CHANNELS]
+    ).astype(np.float32)
+
+
+def test_planes_match_game_objects():
+    encoder = FeatureEncoder()
+    for size, seed in [(12, 0), (32, 1)]:
+        game = play(size, 45, seed)
+        for team in (0, 1):
+            planes = encoder.encode(game, team)
+            assert planes.shape == (len(CHANNELS), 32, 32)
+            assert planes.dtype == np.float32
+            np.testing.assert_allclose(planes, reference_planes(game, team), atol=1e-6)
+        # padding stays empty
+        assert not planes[:, size:, :].any() and not planes[:, :, size:].any()
+
+
+def test_uint8_and_batch_planes():
+    games = [play(12, 10, 2), play(16, 35, 3), play(24, 20, 4)]
+    encoder = FeatureEncoder()
+    quantized = FeatureEncoder(np.uint8)
+
+    out = quantized.new_buffer(len(games))
+    batch = quantized.encode_batch(games, teams=[0, 1, 0], out=out)
+    assert batch is out and batch.dtype == np.uint8
+    for i, (game, team) in enumerate(zip(games, [0, 1, 0])):
+        planes = encoder.encode(game, team)
+        np.testing.assert_array_equal(batch[i], np.rint(planes * 255))
+    assert (batch[1, CHANNEL_INDEX["night"]] == 255).sum() == 16 * 16
@@ -0,0 +1,62 @@
+import numpy as np
+
+from lux.game_objects import City
+
+from utils.fuel_forecast import FuelForecast, nights_to_dawn, survivable_turns
+
+
+def brute_force_turns(fuel, upkeep, turn):
+    survived = 0
+    while turn < 360:
+        if turn % 40 >= 30:
+            if fuel < upkeep:
+                break
+            fuel -= upkeep
+        survived += 1
+        turn += 1
+    return survived
+
+
+def test_survivable_turns():
+    rng = np.random.default_rng(0)
+    fuel = rng.integers(0, 3000, 50).astype(float)
+    upkeep = rng.integers(1, 100, 50).astype(float)
+    for turn in [0, 12, 29, 30, 35, 39, 40, 200, 355, 359]:
+        assert survivable_turns(fuel, upkeep, turn).tolist() == [
+            brute_force_turns(f, u, turn) for f, u in zip(fuel, upkeep)
+        ]
+    assert [nights_to_dawn(turn) for turn in [0, 29, 30, 35, 39, 40, 355]] == [
+        10,
+        10,
+        10,
+        5,
+        1,
+        10,
+        5,
+    ]
+
+
+def test_fuel_forecast_priority():
+    cities = [
+        City(0, "c_1", 300, 23),
+        City(0, "c_2", 100, 23),
+        City(0, "c_3", 100, 46),
+    ]
+    forecast = FuelForecast(cities, 25)
+    assert forecast.get("c_3") == (7, 360)
+    assert forecast.get("c_2") == (9, 130)
+    assert forecast.get("c_1") == (48, 0)
+    assert forecast.most_urgent().cityid == "c_3"
+
+    forecast.deliver("c_3", 400)
+    assert forecast.get("c_3") == (45, 0)
+    assert forecast.most_urgent().cityid == "c_2"
+    forecast.deliver("c_2", 100)
+    assert forecast.get("c_2") == (13, 30)
+    assert forecast.most_urgent().cityid == "c_2"
+    forecast.deliver("c_2", 1000)
+    assert forecast.most_urgent().cityid == "c_3"
+    forecast.deliver("c_3", 1000)
+    assert forecast.most_urgent().cityid == "c_1"
+
+    assert FuelForecast([], 0).most_urgent() is None
@@ -0,0 +1,243 @@
+import pytest
+
+from lux.game import Game
+from lux.game_map import Position
+from lux.game_map.game_map import NO_TEAM, RESOURCE_TYPE_IDS
+from lux.parser import TurnReader
+
+from simulator.observations import synthetic_game
+
+
+def snapshot(game: Game):
+    cells = [
+        (
+            (cell.resource.type, cell.resource.amount) if cell.has_resource() else None,
+            cell.unit.id if cell.unit else None,
+            (cell.citytile.cityid, cell.citytile.cooldown) if cell.citytile else None,
+            cell.road,
+        )
+        for cell in game.map
+    ]
+    players = [
+        (
+            player.research_points,
+            player.city_tile_count,
+            [(u.id, u.pos.x, u.pos.y, u.cooldown, u.cargo.wood) for u in player.units],
+            {
+                city_id: (city.fuel, [(t.pos.x, t.pos.y) for t in city.citytiles])
+                for city_id, city in player.cities.items()
+            },
+        )
+        for player in game.players
+    ]
+    return cells, players
+
+
+def test_in_place_update_matches_rebuild():
+    turns = synthetic_game(size=12, turns=30, units_per_team=6, seed=3)
+
+    games = []
+    for in_place_update in (False, True):
+        game = Game()
+        game._initialize(turns[0])
+        game.in_place_update = in_place_update
+        games.append(game)
+
+    for i, messages in enumerate(turns):
+        messages = messages[2:] if i == 0 else messages
+        for game in games:
+            game._update(messages)
+        assert snapshot(games[0]) == snapshot(games[1])
+
+
+def test_in_place_update_clears_removed_objects():
+    game = Game()
+    game._initialize(["0", "4 4"])
+    game._update(
+        ["r wood 1 1 50", "u 0 0 u_1 2 2 0 0 0 0", "c 0 c_1 10 23", "ct 0 c_1 3 3 0"]
+        + ["ccd 3 3 6", "D_DONE"]
+    )
+    unit = game.players[0].units[0]
+    game._update(["u 0 0 u_1 2 1 0 10 0 0", "D_DONE"])
+
+    assert game.players[0].units[0] is unit
+    assert (unit.pos.x, unit.pos.y) == (2, 1)
+    assert game.map.get_cell(2, 2).unit is None
+    assert game.map.get_cell(2, 1).unit is unit
+    assert not game.map.get_cell(1, 1).has_resource()
+    assert game.map.get_cell(3, 3).citytile is None
+    assert game.map.get_cell(3, 3).road == 0
+    assert game.players[0].cities == {}
+
+
+def test_map_layers_match_cells():
+    turns = synthetic_game(size=12, turns=20, units_per_team=6, seed=5)
+    game = Game()
+    game._initialize(turns[0])
+    for i, messages in enumerate(turns):
+        game._update(messages[2:] if i == 0 else messages)
+
+        for cell in game.map:
+            x, y = cell.pos.x, cell.pos.y
+            assert game.map.has_resource(cell.pos) == cell.has_resource()
+            assert game.map.road[y, x] == cell.road
+            citytile_team = cell.citytile.team if cell.citytile else NO_TEAM
+            assert game.map.citytile_team[y, x] == citytile_team
+            unit_team = cell.unit.team if cell.unit else NO_TEAM
+            assert game.map.unit_team[y, x] == unit_team
+            if cell.has_resource():
+                assert game.map.resource_amount[y, x] == cell.resource.amount
+                r_type_id = RESOURCE_TYPE_IDS[cell.resource.type]
+                assert game.map.resource_type[y, x] == r_type_id
+
+        resource_cells = [cell for cell in game.map if cell.has_resource()]
+        assert game.map.cells_from_mask(game.map.resource_mask()) == resource_cells
+
+
+def row_major(cell):
+    return cell.pos.y, cell.pos.x
+
+
+def test_spatial_indexes_follow_updates():
+    turns = synthetic_game(size=12, turns=30, units_per_team=6, seed=7)
+    game = Game()
+    game._initialize(turns[0])
+    for i, messages in enumerate(turns):
+        game._update(messages[2:] if i == 0 else messages)
+
+        resource_cells = [cell for cell in game.map if cell.has_resource()]
+        assert len(game.map.resource_index) == len(resource_cells)
+        for cell in resource_cells:
+            assert game.map.resource_index.get(cell.pos) is cell
+        citytiles = [cell.citytile for cell in game.map if cell.citytile]
+        assert len(game.map.citytile_index) == len(citytiles)
+
+        # per type and per team indexes maintained by the update
+        for r_type in RESOURCE_TYPE_IDS:
+            cells = [cell for cell in resource_cells if cell.resource.type == r_type]
+            assert sorted(game.map.get_resource_cells([r_type]), key=row_major) == cells
+            assert game.map.resource_cell_count([r_type]) == len(cells)
+            assert game.map.resource_totals[r_type] == sum(
+                cell.resource.amount for cell in cells
+            )
+        assert sorted(game.map.get_resource_cells(), key=row_major) == resource_cells
+        for player in game.players:
+            assert sorted(game.map.get_citytile_cells(player.team), key=row_major) == [
+                cell
+                for cell in game.map
+                if cell.citytile and cell.citytile.team == player.team
+            ]
+            assert player.city_tile_count == len(game.map.citytile_cells[player.team])
+
+        for pos in [Position(0, 0), Position(5, 7), Position(11, 3)]:
+
+            def distance(cell):
+                return abs(cell.pos.x - pos.x) + abs(cell.pos.y - pos.y)
+
+            nearest = game.map.resource_index.nearest(pos)
+            assert distance(nearest) == min(map(distance, resource_cells))
+            wood = game.map.resource_index.k_nearest(
+                pos, 3, lambda cell: cell.resource.type == "wood"
+            )
+            assert len(wood) == 3
+            assert all(cell.resource.type == "wood" for cell in wood)
+
+
+def test_index_mode_matches_positions():
+    turns = synthetic_game(size=12, turns=10, units_per_team=6, seed=3)
+    game = Game()
+    game._initialize(turns[0])
+    for i, messages in enumerate(turns):
+        game._update(messages[2:] if i == 0 else messages)
+    game_map = game.map
+    grid = game_map.grid
+
+    for cell in game_map:
+        idx = game_map.index(cell.pos)
+        assert game_map[idx] is cell
+        assert game_map.position(idx) is cell.pos
+        assert [game_map.position(i) for i in grid.neighbors[idx]] == [
+            pos
+            for pos in (cell.pos.translate(d, 1) for d in "wens")
+            if game_map.is_valid_position(pos)
+        ]
+        assert game_map.get_plus_neighbors(cell.pos) == [
+            game_map.position(i) for i in game_map.get_plus_neighbor_indices(idx)
+        ]
+
+    units = [unit.pos for unit in game.players[1].units]
+    for unit in game.players[0].units:
+        for target in [Position(0, 0), Position(11, 11), Position(6, 2)]:
+            assert game_map.get_path_direction(
+                unit.pos, target, [0], units
+            ) == game_map.get_path_direction(
+                game_map.index(unit.pos),
+                game_map.index(target),
+                [0],
+                [game_map.index(pos) for pos in units],
+            )
+        assert grid.distance(
+            game_map.index(unit.pos), game_map.index(Position(11, 0))
+        ) == abs(unit.pos.x - 11) + abs(unit.pos.y)
+
+
+class ChunkedStream:
+    """
+    Binary stream returning a few bytes at a time, like a pipe
+    """
+
+    def __init__(self, data: bytes, chunk_size: int):
+        self.data = data
+        self.chunk_size = chunk_size
+
+    def read1(self, size: int) -> bytes:
+        chunk = self.data[: min(size, self.chunk_size)]
+        self.data = self.data[len(chunk) :]
+        return chunk
+
+
+def test_turn_reader_and_block_update_match_line_update():
+    turns = synthetic_game(size=12, turns=10, units_per_team=6, seed=9)
+    data = "".join(line + "\n" for messages in turns for line in messages).encode()
+    reader = TurnReader(ChunkedStream(data, chunk_size=7))
+
+    by_lines = Game()
+    by_lines._initialize(turns[0])
+    by_block = Game()
+    by_block._initialize(turns[0])
+
+    for i, messages in enumerate(turns):
+        block = reader.read_turn()
+        assert block.decode().splitlines() == messages
+        if i == 0:
+            block = block.split(b"\n", 2)[2]
+            messages = messages[2:]
+        by_lines._update(messages)
+        by_block._update_block(block)
+        assert snapshot(by_lines) == snapshot(by_block)
+
+    with pytest.raises(EOFError):
+        reader.read_turn()
+
+
+def test_unknown_records_are_ignored():
+    turns = synthetic_game(size=12, turns=3, units_per_team=4, seed=4)
+    expected = Game()
+    expected._initialize(turns[0])
+    game = Game()
+    game._initialize(turns[0])
+    by_block = Game()
+    by_block._initialize(turns[0])
+    for i, messages in enumerate(turns):
+        messages = messages[2:] if i == 0 else messages
+        expected._update(messages)
+        # records added by a newer referee, with fields named like known ones
+        messages = (
+            ["xx 1 u abc", messages[0], "yy"]
+            + messages[1:-1]
+            + ["zz c 0 c_0_9 3 ct", messages[-1]]
+        )
+        game._update(messages)
+        by_block._update_block("".join(line + "\n" for line in messages).encode())
+        assert snapshot(game) == snapshot(expected)
+        assert snapshot(by_block) == snapshot(expected)
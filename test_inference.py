@@ -0,0 +1,168 @@
+import socket
+import threading
+import time
+
+import numpy as np
+
+from lux.game import Game
+
+from utils.features import CHANNELS, PLANE_SIZE
+from utils.inference import (
+    UNIT_ACTIONS,
+    InferenceClient,
+    InferenceServer,
+    LinearPolicy,
+)
+
+from simulator.observations import synthetic_game
+from simulator.run import idle_agent, load_agent, play_game
+
+
+def start_server(path, policy, **kwargs):
+    server = InferenceServer(path, policy, **kwargs)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    return server, thread
+
+
+def test_inference_server(tmp_path):
+    policy = LinearPolicy.random(seed=1)
+    server, thread = start_server(
+        str(tmp_path / "policy.sock"), policy, max_batch=4, max_delay=0.2
+    )
+    try:
+        clients = [InferenceClient(server.path) for _ in range(3)]
+        assert clients[0].actions == UNIT_ACTIONS
+
+        rng = np.random.default_rng(0)
+        features = rng.random((3,) + server.encoder.shape, dtype=np.float32)
+        cells = [[0, 5, 1023], [], [PLANE_SIZE * 3 + 7]]
+        results = [None] * 3
+
+        def request(i):
+            results[i] = clients[i].logits(features[i], cells[i])
+
+        threads = [threading.Thread(target=request, args=(i,)) for i in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        expected = policy(features).reshape(3, len(UNIT_ACTIONS), -1)
+        for i in range(3):
+            assert results[i].shape == (len(cells[i]), len(UNIT_ACTIONS))
+            assert np.allclose(results[i], expected[i][:, cells[i]].T, atol=1e-5)
+
+        metrics = clients[0].metrics()
+        assert metrics["requests"] == 3
+        assert metrics["units"] == 4
+        # the three requests arrived within the latency window
+        assert metrics["batches"] == 1
+        assert metrics["latency_ms"]["max"] >= metrics["latency_ms"]["p50"] > 0
+        for client in clients:
+            client.close()
+    finally:
+        server.shutdown()
+        thread.join()
+        server.close()
+
+
+def test_policy_unit_actions(tmp_path):
+    turns = synthetic_game(size=12, turns=5, units_per_team=4, seed=2)
+    game = Game()
+    game._initialize(turns[0])
+    for i, messages in enumerate(turns):
+        game._update(messages[2:] if i == 0 else messages)
+
+    # a policy always going west, then building a city
+    weights = np.zeros((len(UNIT_ACTIONS), len(CHANNELS)))
+    bias = np.zeros(len(UNIT_ACTIONS))
+    bias[UNIT_ACTIONS.index("w")] = 2
+    bias[UNIT_ACTIONS.index("bcity")] = 1
+    server, thread = start_server(
+        str(tmp_path / "policy.sock"),
+        LinearPolicy(weights, bias),
+        dtype=np.uint8,
+        max_delay=0,
+    )
+    try:
+        client = InferenceClient(server.path)
+        assert client.encoder.dtype == np.uint8
+        actions = client.unit_actions(game, 1)
+        client.close()
+    finally:
+        server.shutdown()
+        thread.join()
+        server.close()
+
+    units = [unit for unit in game.players[1].units if unit.can_act()]
+    assert units
+    assert actions == {
+        unit.id: f"bcity {unit.id}" if unit.pos.x == 0 else f"m {unit.id} w"
+        for unit in units
+    }
+
+
+def test_agent_falls_back_to_the_rules(tmp_path):
+    path = str(tmp_path / "policy.sock")
+    log_config = {"LOG_PATH": str(tmp_path / "log.txt")}
+    rules = play_game(
+        [load_agent(), load_agent()],
+        size=12,
+        seed=3,
+        configurations=[log_config, {}],
+        max_turns=20,
+    )
+
+    # no server listening
+    config = dict(log_config, POLICY_SOCKET=path, POLICY_TIMEOUT=0.01)
+    result = play_game(
+        [load_agent(), load_agent()],
+        size=12,
+        seed=3,
+        configurations=[config, {}],
+        max_turns=20,
+    )
+    assert result["city_tiles"] == rules["city_tiles"]
+
+    # a server that never answers
+    stalled = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stalled.bind(path)
+    stalled.listen()
+    try:
+        result = play_game(
+            [load_agent(), load_agent()],
+            size=12,
+            seed=3,
+            configurations=[config, {}],
+            max_turns=20,
+        )
+    finally:
+        stalled.close()
+    assert result["city_tiles"] == rules["city_tiles"]
+
+
+def test_agent_closes_its_connection(tmp_path):
+    server, thread = start_server(str(tmp_path / "policy.sock"), LinearPolicy.random())
+    try:
+        config = {
+            "POLICY_SOCKET": server.path,
+            "LOG_PATH": str(tmp_path / "log.txt"),
+        }
+        for seed in range(2):
+            play_game(
+                [load_agent(), idle_agent],
+                size=12,
+                seed=seed,
+                configurations=[config, {}],
+                max_turns=5,
+            )
+        deadline = time.perf_counter() + 1
+        while server.clients and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        assert server.clients == 0
+        assert server.metrics.requests > 0
+    finally:
+        server.shutdown()
+        thread.join()
+        server.close()
@@ -0,0 +1,41 @@
+import json
+
+from utils.logger import DEBUG, INFO, WARNING, TurnLogger
+
+
+def test_logger_levels_and_cap(tmp_path):
+    path = tmp_path / "log.txt"
+    logger = TurnLogger(str(path), level=INFO, background=False, max_records=2)
+    logger.start_turn(3, 0)
+    logger.debug("hidden")
+    logger.info("first")
+    logger.log("second", WARNING)
+    logger.error("dropped")
+    assert not path.exists()
+
+    logger.end_turn()
+    logger.close()
+    assert path.read_text() == "[Turn 3]Team 0: first\n[Turn 3]Team 0: second\n"
+    assert logger.dropped == 1
+
+
+def test_background_structured_logger(tmp_path):
+    path = tmp_path / "log.jsonl"
+    logger = TurnLogger(str(path), level=DEBUG, structured=True)
+    for turn in range(3):
+        logger.start_turn(turn, 1)
+        logger.debug("move", unit="u_1", x=turn)
+        logger.end_turn()
+    logger.flush()
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [record["x"] for record in records] == [0, 1, 2]
+    assert records[0] == {
+        "turn": 0,
+        "team": 1,
+        "level": "DEBUG",
+        "message": "move",
+        "unit": "u_1",
+        "x": 0,
+    }
+    logger.close()
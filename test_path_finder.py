@@ -1,44 +1,152 @@
+import random
+
 import numpy as np
 
-from utils.path_finder import bfs, get_path
+from lux.game_map import Position
 
-if __name__ == "__main__":
+from utils.path_cache import PathCache
+from utils.path_finder import (
+    END,
+    START,
+    UNREACHABLE,
+    WALL,
+    astar,
+    bfs,
+    multi_source_bfs,
+)
 
-    matrix_list = [
-        [
-            [0, 3, 0, 1, 3],
-            [3, 0, 3, 3, 3],
-            [2, 3, 3, 3, 3],
-            [0, 3, 3, 3, 3],
-        ],
-        [
-            [0, 3, 0, 1, 3],
-            [3, 0, 3, 3, 3],
-            [2, 3, 3, 3, 0],
-            [0, 3, 3, 0, 3],
-        ],
-        [
-            [0, 3, 0, 1, 3],
-            [3, 3, 3, 3, 3],
-            [3, 3, 3, 2, 3],
-            [0, 3, 3, 3, 3],
-        ],
+matrix_list = [
+    [
+        [0, 3, 0, 1, 3],
+        [3, 0, 3, 3, 3],
+        [2, 3, 3, 3, 3],
+        [0, 3, 3, 3, 3],
+    ],
+    [
+        [0, 3, 0, 1, 3],
+        [3, 0, 3, 3, 3],
+        [2, 3, 3, 3, 0],
+        [0, 3, 3, 0, 3],
+    ],
+    [
+        [0, 3, 0, 1, 3],
+        [3, 3, 3, 3, 3],
+        [3, 3, 3, 2, 3],
+        [0, 3, 3, 3, 3],
+    ],
+    [
+        [0, 3, 0, 1],
+        [0, 0, 3, 3],
+        [2, 0, 3, 3],
+        [0, 3, 3, 3],
+    ],
+]
+start_pos = (3, 0)
+
+
+def random_grid(width, height, wall_ratio, seed):
+    rng = random.Random(seed)
+    grid = np.full((height, width), 3)
+    for y in range(height):
+        for x in range(width):
+            if rng.random() < wall_ratio:
+                grid[y][x] = WALL
+    start = (rng.randrange(width), rng.randrange(height))
+    end = (rng.randrange(width), rng.randrange(height))
+    grid[end[1]][end[0]] = END
+    grid[start[1]][start[0]] = START
+    return grid, start
+
+
+def assert_valid_path(grid, path, start):
+    assert path[0] == start
+    assert grid[path[-1][1]][path[-1][0]] == END
+    for (x1, y1), (x2, y2) in zip(path, path[1:]):
+        assert abs(x1 - x2) + abs(y1 - y2) == 1
+        assert grid[y2][x2] != WALL
+
+
+def test_astar_matches_bfs_length():
+    for matrix in matrix_list:
+        grid = np.array(matrix)
+        path = astar(grid, start_pos)
+        expected = bfs(grid, start_pos)
+        if expected is None:
+            assert path is None
+        else:
+            assert_valid_path(grid, path, start_pos)
+            assert len(path) == len(expected)
+
+
+def test_astar_on_random_grids():
+    for seed in range(200):
+        grid, start = random_grid(12, 10, 0.3, seed)
+        path = astar(grid, start)
+        expected = bfs(grid, start)
+        assert (path is None) == (expected is None)
+        if path is not None:
+            assert_valid_path(grid, path, start)
+            assert len(path) == len(expected)
+
+
+def test_astar_start_on_end():
+    grid = np.full((3, 3), 3)
+    grid[1][1] = END
+    assert astar(grid, (1, 1)) == [(1, 1)]
+
+
+def test_multi_source_bfs():
+    passable = np.array(
         [
-            [0, 3, 0, 1],
-            [0, 0, 3, 3],
-            [2, 0, 3, 3],
-            [0, 3, 3, 3],
-        ],
+            [True, True, True, True],
+            [True, False, False, True],
+            [True, True, False, True],
+        ]
+    )
+    sources = np.zeros_like(passable)
+    sources[0][0] = True
+    sources[1][2] = True
+
+    dist = multi_source_bfs(passable, sources)
+
+    assert dist.tolist() == [
+        [0, 1, 1, 2],
+        [1, UNREACHABLE, 0, 1],
+        [2, 3, UNREACHABLE, 2],
     ]
 
-    for matrix in matrix_list:
 
-        matrix = np.array(matrix)
+def test_path_cache():
+    cache = PathCache()
+    blocked = np.zeros((3, 4), dtype=bool)
+    objective = Position(3, 0)
+    path = [(0, 0), (1, 0), (2, 0), (3, 0)]
 
-        # calling isPath method
-        # res = get_path(matrix)
-        start_pos = (3, 0)
-        res = bfs(matrix, start_pos)
+    assert cache.get("u_1", objective, Position(0, 0), blocked) is None
+    cache.put("u_1", objective, path)
 
-        print(res)
+    # the unit waited, then moved along its path
+    assert cache.get("u_1", objective, Position(0, 0), blocked) == path
+    assert cache.get("u_1", objective, Position(1, 0), blocked) == path[1:]
+    assert (cache.hits, cache.misses) == (2, 1)
+
+    # a city tile got built on the path
+    blocked[0, 2] = True
+    assert cache.get("u_1", objective, Position(1, 0), blocked) is None
+    assert cache.invalidations == 1
+
+    blocked[0, 2] = False
+    cache.put("u_1", objective, path)
+    assert cache.get("u_1", Position(0, 2), Position(0, 0), blocked) is None
+    cache.put("u_1", objective, path)
+    is_next_blocked = Position(1, 0).__eq__
+    assert cache.get("u_1", objective, Position(0, 0), blocked, is_next_blocked) is None
+    assert cache.invalidations == 3
+
+
+if __name__ == "__main__":
+    for matrix in matrix_list:
+        matrix = np.array(matrix)
+        print(bfs(matrix, start_pos))
+        print(astar(matrix, start_pos))
         print("\n\n\n\n")
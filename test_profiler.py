@@ -0,0 +1,53 @@
+import json
+
+from lux.game_constants import GAME_CONSTANTS
+from simulator.run import idle_agent, load_agent, play_game
+from utils.profiler import Profiler
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler()
+    profiler.start_turn()
+    with profiler.phase("update"):
+        profiler.add("bfs")
+    profiler.end_turn(0)
+    assert profiler.turns == []
+
+
+def test_profiler_summary(tmp_path):
+    profiler = Profiler(enabled=True)
+    for turn in range(3):
+        profiler.start_turn()
+        with profiler.phase("pathfinding"):
+            profiler.add("bfs", turn)
+        with profiler.phase("pathfinding"):
+            pass
+        profiler.end_turn(turn)
+
+    stats = profiler.summary()["stats"]
+    assert stats["bfs"] == {"total": 3, "mean": 1, "max": 2}
+    assert 0 < stats["pathfinding"]["total"] <= stats["total"]["total"]
+
+    path = tmp_path / "profile.json"
+    profiler.write(str(path))
+    assert len(json.loads(path.read_text())["per_turn"]) == 3
+
+    path = tmp_path / "profile.csv"
+    profiler.write(str(path))
+    assert path.read_text().splitlines()[0] == "turn,bfs,pathfinding,total"
+
+
+def test_profile_of_a_game_ending_early(tmp_path):
+    path = tmp_path / "profile.json"
+    result = play_game(
+        [load_agent(), idle_agent],
+        size=12,
+        seed=0,
+        configurations=[
+            {"PROFILE": str(path), "LOG_PATH": str(tmp_path / "log.txt")},
+            {},
+        ],
+    )
+    # one side ran out of units and city tiles
+    assert result["turns"] < GAME_CONSTANTS["PARAMETERS"]["MAX_DAYS"] - 1
+    assert json.loads(path.read_text())["turns"] == result["turns"]
@@ -0,0 +1,75 @@
+import gzip
+import json
+import os
+import subprocess
+import sys
+
+from lux.game_constants import GAME_CONSTANTS
+from simulator.observations import synthetic_game
+from utils.replay import ReplayReader, ReplayWriter
+
+
+def test_replay_round_trip(tmp_path):
+    path = str(tmp_path / "replay.gz")
+    turns = [
+        (b"0\n12 12\nrp 0 0\nrp 1 0\nD_DONE\n", ["m u_1 n", "bw 3 4"]),
+        (b"rp 0 0\nrp 1 0\nD_DONE\n", []),
+        (b"rp 0 1\nrp 1 0\nD_DONE\n", ["r 3 4"]),
+    ]
+    writer = ReplayWriter(path, 1, {"MAX_CITIES": 4})
+    for block, actions in turns:
+        writer.write(block, actions)
+    writer.close()
+
+    reader = ReplayReader(path)
+    assert reader.player == 1
+    assert reader.config == {"MAX_CITIES": 4}
+    assert list(reader) == turns
+
+
+def test_truncated_replay(tmp_path):
+    path = str(tmp_path / "replay.gz")
+    writer = ReplayWriter(path, 0, {})
+    writer.write(b"rp 0 0\nD_DONE\n", ["r 1 1"])
+    writer.write(b"rp 0 1\nD_DONE\n", ["r 1 1"])
+    # the process was killed before the file was closed
+    writer.file.fileobj.close()
+
+    assert list(ReplayReader(path)) == [
+        (b"rp 0 0\nD_DONE\n", ["r 1 1"]),
+        (b"rp 0 1\nD_DONE\n", ["r 1 1"]),
+    ]
+
+
+def test_main_closes_its_recording(tmp_path):
+    path = str(tmp_path / "replay.gz")
+    config = {"RECORD": path, "LOG_PATH": str(tmp_path / "log.txt")}
+    days = GAME_CONSTANTS["PARAMETERS"]["MAX_DAYS"]
+    turns = synthetic_game(size=12, turns=days, units_per_team=2)
+    data = "".join(line + "\n" for messages in turns for line in messages)
+    process = subprocess.Popen(
+        [sys.executable, "main.py", json.dumps(config)],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    answered = 0
+    try:
+        process.stdin.write(data.encode())
+        process.stdin.flush()
+        for line in process.stdout:
+            answered += line == b"D_FINISH\n"
+            if answered == days:
+                break
+    finally:
+        # the referee stops the agent once the game is over
+        process.kill()
+        process.wait()
+        process.stdin.close()
+        process.stdout.close()
+    assert answered == days
+
+    # a truncated gzip stream raises EOFError
+    with gzip.open(path, "rb") as f:
+        f.read()
+    assert len(list(ReplayReader(path))) == days
@@ -0,0 +1,71 @@
+import numpy as np
+
+from lux.constants import Constants
+from lux.game_map import Position
+
+from utils.distance_field import DistanceField
+from utils.reservation import CooperativePathFinder, ReservationTable
+
+DIRECTIONS = Constants.DIRECTIONS
+
+
+def field_to(passable, x, y):
+    sources = np.zeros_like(passable)
+    sources[y, x] = True
+    return DistanceField(passable, sources)
+
+
+def test_reservation_table():
+    shared = np.zeros((3, 4), dtype=bool)
+    shared[0, 0] = True
+    table = ReservationTable(4, 3, shared=shared)
+
+    table.reserve(Position(1, 2), 1, "u_1")
+    table.reserve(Position(0, 0), 1, "u_1")
+
+    assert table.is_reserved(Position(1, 2), 1)
+    assert table.is_reserved(Position(1, 2), 1, "u_2")
+    assert not table.is_reserved(Position(1, 2), 1, "u_1")
+    assert not table.is_reserved(Position(1, 2), 2)
+    assert not table.is_reserved(Position(0, 0), 1)
+
+    table.release("u_1")
+    assert not table.is_reserved(Position(1, 2), 1)
+
+
+def test_units_cross_without_collision():
+    passable = np.ones((3, 5), dtype=bool)
+    table = ReservationTable(5, 3)
+    finder = CooperativePathFinder(passable, table, window=4)
+
+    positions = {"a": Position(0, 1), "b": Position(4, 1)}
+    fields = {"a": field_to(passable, 4, 1), "b": field_to(passable, 0, 1)}
+
+    for _ in range(6):
+        previous = dict(positions)
+        for unit_id, pos in positions.items():
+            table.reserve(pos, 1, unit_id)
+        for unit_id in positions:
+            direction = finder.plan(unit_id, positions[unit_id], fields[unit_id])
+            positions[unit_id] = positions[unit_id].translate(direction)
+        assert positions["a"] != positions["b"]
+        assert not (positions["a"] == previous["b"] and positions["b"] == previous["a"])
+        table.release("a")
+        table.release("b")
+
+    assert positions["a"] == Position(4, 1)
+    assert positions["b"] == Position(0, 1)
+
+
+def test_unit_waits_for_reserved_cell():
+    # single lane, the cell in front of the unit is taken next turn
+    passable = np.ones((1, 4), dtype=bool)
+    table = ReservationTable(4, 1)
+    finder = CooperativePathFinder(passable, table, window=3)
+    table.reserve(Position(1, 0), 1, "b")
+
+    direction = finder.plan("a", Position(0, 0), field_to(passable, 3, 0))
+
+    assert direction == DIRECTIONS.CENTER
+    assert table.is_reserved(Position(0, 0), 1)
+    assert table.is_reserved(Position(1, 0), 2)
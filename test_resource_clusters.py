@@ -0,0 +1,123 @@
+from lux.game import Game
+from lux.game_map import GameMap, Position
+
+from utils.resource_clusters import ResourceClusters
+
+from simulator.observations import Observation, synthetic_game
+from simulator.run import load_turn_manager
+
+# W W . C .
+# W . . C .
+# . . U . .
+# W W . . .
+RESOURCES = {
+    (0, 0): ("wood", 100),
+    (1, 0): ("wood", 200),
+    (0, 1): ("wood", 300),
+    (3, 0): ("coal", 50),
+    (3, 1): ("coal", 50),
+    (2, 2): ("uranium", 10),
+    (0, 3): ("wood", 20),
+    (1, 3): ("wood", 20),
+}
+
+
+def update_map(game_map: GameMap, resources):
+    game_map._begin_update()
+    for (x, y), (r_type, amount) in resources.items():
+        game_map._setResource(r_type, x, y, amount)
+    game_map._end_update()
+
+
+def test_resource_clusters():
+    game_map = GameMap(5, 4)
+    update_map(game_map, RESOURCES)
+    clusters = ResourceClusters(5, 4)
+    clusters.update(game_map)
+
+    assert len(clusters) == 4
+    forest = clusters.get(Position(0, 0))
+    assert forest is clusters.get(Position(0, 1))
+    assert forest.type == "wood"
+    assert forest.amount == 600
+    assert forest.centroid == Position(0, 0)
+    assert sorted(forest.perimeter()) == [2, 6, 10]
+    assert clusters.get(Position(2, 0)) is None
+
+    assert clusters.nearest(Position(4, 3)).type == "uranium"
+    assert clusters.nearest(Position(4, 3), min_amount=50).type == "coal"
+    assert clusters.nearest(Position(4, 3), r_types=["wood"]).amount == 40
+    assert clusters.nearest(Position(4, 3), min_amount=1000) is None
+
+    # a wood tile gets mined out and another one mined
+    resources = dict(RESOURCES)
+    del resources[(0, 0)]
+    resources[(1, 0)] = ("wood", 150)
+    update_map(game_map, resources)
+    clusters.update(game_map)
+
+    assert len(clusters) == 4
+    assert clusters.get(Position(0, 0)) is None
+    assert clusters.get(Position(1, 0)) is forest
+    assert forest.amount == 450
+    assert sorted(forest.perimeter()) == [0, 2, 6, 10]
+    assert Position(0, 0) in clusters.free_perimeter(forest, game_map)
+
+
+def test_resource_clusters_follow_updates():
+    turns = synthetic_game(size=16, turns=40, units_per_team=6, seed=5)
+    game = Game()
+    game._initialize(turns[0])
+    clusters = ResourceClusters(16, 16)
+    for i, messages in enumerate(turns):
+        game._update(messages[2:] if i == 0 else messages)
+        clusters.update(game.map)
+
+        cells = game.map.cells
+        seen = set()
+        for cluster in clusters:
+            assert not seen & cluster.tiles
+            seen |= cluster.tiles
+            assert cluster.amount == sum(
+                cells[idx].resource.amount for idx in cluster.tiles
+            )
+            assert all(
+                cells[idx].resource.type == cluster.type for idx in cluster.tiles
+            )
+            around = {
+                idx2 for idx in cluster.tiles for idx2 in game.map.grid.neighbors[idx]
+            }
+            assert set(cluster.perimeter()) == around - cluster.tiles
+        assert len(seen) == game.map.resource_cell_count()
+
+
+def next_city_cell(city_tiles, unit_pos, config):
+    """
+    City cell chosen for a worker at unit_pos, next to a forest of 1600 wood
+    and a wood tile of 100
+    """
+    messages = ["0", "8 8", "rp 0 0", "rp 1 0"]
+    for x, y in [(4, 1), (5, 1), (4, 2), (5, 2)]:
+        messages.append(f"r wood {x} {y} 400")
+    messages.append("r wood 1 4 100")
+    messages.append(f"u 0 0 u_1 {unit_pos.x} {unit_pos.y} 0 100 0 0")
+    if city_tiles:
+        messages.append("c 0 c_1 100 23")
+    for pos in city_tiles:
+        messages.append(f"ct 0 c_1 {pos.x} {pos.y} 0")
+    messages.append("D_DONE")
+
+    turn_manager = load_turn_manager()
+    manager = turn_manager.TurnManager(Observation(messages, 0), config)
+    return manager.get_next_city_cell(unit_pos).pos
+
+
+def test_city_tiles_are_built_next_to_clusters():
+    city = [Position(2, 1)]
+    # the side of the city facing the forest rather than the nearest one
+    assert next_city_cell(city, Position(2, 3), {}) == Position(3, 1)
+    config = {"BUILD_CLUSTER_AMOUNT": None}
+    assert next_city_cell(city, Position(2, 3), config) == Position(2, 2)
+
+    # without city, next to the forest rather than the small wood tile
+    assert next_city_cell([], Position(1, 2), {}) == Position(3, 2)
@@ -0,0 +1,288 @@
+import threading
+
+from lux.constants import Constants
+from lux.game import Game
+from lux.game_map.game_map import RESOURCE_TYPE_IDS
+
+from simulator import Simulation
+from simulator.observations import Observation
+from simulator.run import idle_agent, load_agent, load_turn_manager, play_game
+from simulator.tournament import schedule, standings
+
+DIRECTIONS = Constants.DIRECTIONS
+
+
+def test_updates_match_game_state():
+    simulation = Simulation(12, seed=3)
+    game = Game()
+    messages = simulation.updates(1)
+    game._initialize(messages[:2])
+    game._update(messages[2:])
+
+    assert game.map_width == game.map_height == 12
+    for team in (0, 1):
+        player = game.players[team]
+        assert len(player.units) == simulation.unit_count(team)
+        assert player.city_tile_count == simulation.city_tile_count(team)
+    n_resources = sum(cell.has_resource() for row in game.map.map for cell in row)
+    assert n_resources == (simulation.resource_amount > 0).sum()
+
+
+def test_collisions_cancel_moves():
+    simulation = Simulation(12, seed=0)
+    units = sorted(simulation.units.values(), key=lambda unit: unit.team)
+    # put both workers face to face in the middle of the map
+    units[0].x, units[0].y = 5, 0
+    units[1].x, units[1].y = 7, 0
+    simulation.resource_amount[0, 5:8] = 0
+
+    simulation.step([[f"m {units[0].id} e"], [f"m {units[1].id} w"]])
+    assert (units[0].x, units[1].x) == (5, 7)
+
+    simulation.step([[f"m {units[0].id} e"], []])
+    assert (units[0].x, units[1].x) == (6, 7)
+
+
+def test_units_starve_at_night():
+    simulation = Simulation(12, seed=0, max_turns=40)
+    for unit in simulation.units.values():
+        unit.x, unit.y = 0, 0 if unit.team == 0 else 11
+        unit.cargo = [0, 0, 0]
+    simulation.resource_amount[:] = 0
+    while simulation.turn < 30:
+        simulation.step([[], []])
+    assert simulation.unit_count(0) == simulation.unit_count(1) == 1
+    simulation.step([[], []])
+    assert simulation.unit_count(0) == simulation.unit_count(1) == 0
+
+
+def test_workers_share_the_last_resources():
+    simulation = Simulation(12, seed=0)
+    units = sorted(simulation.units.values(), key=lambda unit: unit.team)
+    simulation.resource_amount[:] = 0
+    simulation.research_points = [200, 200]
+    simulation.resource_type[5, 6] = RESOURCE_TYPE_IDS["coal"]
+    simulation.resource_amount[5, 6] = 3
+    (units[0].x, units[0].y), (units[1].x, units[1].y) = (5, 5), (7, 5)
+    for unit in units:
+        unit.cargo = [0, 0, 0]
+
+    simulation.step([[], []])
+    coal = RESOURCE_TYPE_IDS["coal"]
+    assert sorted(unit.cargo[coal] for unit in units) == [1, 2]
+    assert simulation.resource_amount[5, 6] == 0
+
+
+def test_play_game(tmp_path):
+    config = {"LOG_PATH": str(tmp_path / "log.txt")}
+    result = play_game(
+        [load_agent(), idle_agent],
+        size=12,
+        seed=1,
+        configurations=[config, {}],
+        max_turns=40,
+    )
+    assert result["turns"] == 40
+    assert result["winner"] in (0, None)
+
+
+def test_tournament_standings():
+    configs = {"a": {}, "b": {"MAX_UNITS": 4}, "c": {"MAX_CITIES": 4}}
+    matches = schedule(configs, games=1, size=12, turn_timeout=3, overage=60)
+    assert len(matches) == 6
+
+    winners = {("a", "b"): 0, ("b", "a"): 1, ("a", "c"): None, ("c", "a"): None}
+    results = [
+        {
+            "index": index,
+            "names": names,
+            "winner": winners.get(names, 0),
+            "timeouts": [False, names == ("c", "b")],
+            "max_turn_time": [0.1, 0.2],
+        }
+        for index, names, *_ in matches
+    ]
+    table = standings(list(configs), results)
+    assert table["a"]["wins"] == 2 and table["a"]["draws"] == 2
+    assert table["b"]["losses"] == 3 and table["b"]["timeouts"] == 1
+    assert table["a"]["win_rate"] == 0.75
+    assert table["a"]["elo"] > table["c"]["elo"] > table["b"]["elo"]
+
+
+def test_play_game_without_turn_budget_left(tmp_path):
+    # every unit falls back to moving straight toward its target
+    result = play_game(
+        [load_agent(), idle_agent],
+        size=12,
+        seed=2,
+        configurations=[{"TURN_BUDGET": 0, "LOG_PATH": str(tmp_path / "log.txt")}, {}],
+        max_turns=40,
+    )
+    assert result["turns"] == 40
+    assert result["units"][0] >= 1
+
+
+def test_play_game_with_target_assignment(tmp_path):
+    result = play_game(
+        [load_agent(), idle_agent],
+        size=12,
+        seed=1,
+        configurations=[
+            {"ASSIGN_TARGETS": True, "LOG_PATH": str(tmp_path / "log.txt")},
+            {},
+        ],
+        max_turns=40,
+    )
+    assert result["turns"] == 40
+    assert result["city_tiles"][0] >= 1
+
+
+def test_play_game_closes_the_agent_logs(tmp_path):
+    threads = threading.active_count()
+    config = {"TURN_BUDGET": 0, "LOG_PATH": str(tmp_path / "log.txt")}
+    for seed in range(3):
+        play_game(
+            [load_agent(), load_agent()],
+            size=12,
+            seed=seed,
+            # units moved without search are logged
+            configurations=[config, config],
+            max_turns=10,
+        )
+    assert threading.active_count() == threads
+
+
+def test_path_cache_is_reported_at_the_end_of_each_game(tmp_path):
+    module = load_turn_manager()
+    config = {"LOG_PATH": str(tmp_path / "log.txt")}
+
+    def agent(observation, configuration):
+        return module.TurnManager(observation, configuration).play_turn()
+
+    agent.close = module.end_game
+    for seed in range(2):
+        play_game(
+            [agent, idle_agent],
+            size=12,
+            seed=seed,
+            configurations=[config, {}],
+            max_turns=40,
+        )
+        assert module.path_cache.hits == module.path_cache.misses == 0
+
+    reports = [
+        line
+        for line in (tmp_path / "log.txt").read_text().splitlines()
+        if "PathCache" in line
+    ]
+    assert len(reports) == 2
+
+
+def test_play_game_with_planner(tmp_path):
+    result = play_game(
+        [load_agent(), load_agent()],
+        size=12,
+        seed=1,
+        # the search always ends before the budget, the game does not depend
+        # on the speed of the machine
+        configurations=[
+            {
+                "PLANNER": True,
+                "PLANNER_BUDGET": 5,
+                "LOG_PATH": str(tmp_path / "log.txt"),
+            },
+            {},
+        ],
+        max_turns=40,
+    )
+    assert result["turns"] == 40
+    assert result["city_tiles"][0] >= 1
+
+
+def test_forks_do_not_share_changes():
+    simulation = Simulation(12, seed=2)
+    agents = [load_agent(), load_agent()]
+    history = []
+    while simulation.turn < 60:
+        actions = [
+            agent(Observation(simulation.updates(team), simulation.turn, team), {})
+            for team, agent in enumerate(agents)
+        ]
+        history.append((simulation.fork(), actions))
+        simulation.step(actions)
+
+    # replaying from forks gives the same states, and leaves the forks as
+    # they were
+    replay = history[0][0]
+    for state, actions in history:
+        before = state.updates(0)
+        assert replay.updates(0) == before
+        replay = replay.child(actions)
+        state.child([[], []])
+        assert state.updates(0) == before
+    assert replay.updates(0) == simulation.updates(0)
+
+
+def test_simulation_from_game():
+    simulation = Simulation(12, seed=4)
+    agents = [load_agent(), load_agent()]
+    game = Game()
+    while simulation.turn < 50:
+        messages = simulation.updates(0)
+        if simulation.turn == 0:
+            game._initialize(messages[:2])
+            messages = messages[2:]
+        game._update(messages)
+        simulation.step(
+            [
+                agent(Observation(simulation.updates(team), simulation.turn, team), {})
+                for team, agent in enumerate(agents)
+            ]
+        )
+    game._update(simulation.updates(0))
+
+    copy = Simulation.from_game(game)
+    assert sorted(copy.updates(0)) == sorted(simulation.updates(0))
+    for _ in range(20):
+        actions = [
+            [
+                f"m {unit.id} n"
+                for unit in simulation.units.values()
+                if unit.team == team
+            ]
+            for team in (0, 1)
+        ]
+        simulation.step(actions)
+        copy.step(actions)
+    assert sorted(copy.updates(0)) == sorted(simulation.updates(0))
+
+
+def test_simulation_from_game_keeps_every_city():
+    game = Game()
+    game._initialize(["0", "12 12"])
+    # ids that end with the same number
+    game._update(
+        [
+            "rp 0 0",
+            "rp 1 0",
+            "u 0 0 u_0_1 5 5 0 0 0 0",
+            "u 0 1 u_1_1 9 2 0 0 0 0",
+            "c 0 c_0_1 100 23",
+            "ct 0 c_0_1 1 1 0",
+            "c 1 c_1_1 200 23",
+            "ct 1 c_1_1 9 1 0",
+            "D_DONE",
+        ]
+    )
+    simulation = Simulation.from_game(game)
+    assert sorted(city.id for city in simulation.cities.values()) == [
+        "c_0_1",
+        "c_1_1",
+    ]
+    assert sorted(simulation.units) == ["u_0_1", "u_1_1"]
+    assert simulation.city_tile_count(0) == simulation.city_tile_count(1) == 1
+
+    # a new city gets an id of its own
+    simulation.units["u_0_1"].cargo = [100, 0, 0]
+    simulation.step([["bcity u_0_1"], []])
+    assert len({city.id for city in simulation.cities.values()}) == 3
@@ -0,0 +1,120 @@
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+# cost of the pairs that can never be matched, like unreachable targets
+UNREACHABLE_COST = 1e6
+
+# above this number of units x targets, hungarian is replaced by greedy
+_MAX_HUNGARIAN_SIZE = 100 * 500
+
+
+def greedy_assignment(
+    cost: np.ndarray, assignment: Optional[Dict[int, int]] = None
+) -> Dict[int, int]:
+    """
+    Approximate row -> column assignment: rows pick their cheapest free column,
+    the rows with the cheapest options first. Rows already in assignment keep
+    their column.
+    """
+    assignment = dict(assignment or {})
+    n_rows, n_cols = cost.shape
+    taken = np.zeros(n_cols, dtype=bool)
+    taken[list(assignment.values())] = True
+
+    rows = [row for row in np.argsort(cost.min(axis=1)) if row not in assignment]
+    for row in rows:
+        if taken.all():
+            break
+        costs = np.where(taken, np.inf, cost[row])
+        col = int(np.argmin(costs))
+        taken[col] = True
+        assignment[int(row)] = col
+    return assignment
+
+
+def hungarian(cost: np.ndarray, deadline: Optional[float] = None) -> Dict[int, int]:
+    """
+    Minimum cost row -> column assignment with the shortest augmenting path
+    version of the hungarian algorithm, O(n² m) with the inner loops over
+    columns vectorized.
+
+    Rows are added one at a time. If time.perf_counter() goes past deadline,
+    the rows that are left are assigned by greedy_assignment.
+    """
+    n_rows, n_cols = cost.shape
+    if n_rows > n_cols:
+        transposed = hungarian(cost.T, deadline)
+        return {row: col for col, row in transposed.items()}
+
+    # 1-indexed, column 0 is a virtual column used for the row being added
+    u = np.zeros(n_rows + 1)
+    v = np.zeros(n_cols + 1)
+    owner = np.zeros(n_cols + 1, dtype=int)
+    way = np.zeros(n_cols + 1, dtype=int)
+
+    for i in range(1, n_rows + 1):
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+
+        owner[0] = i
+        j0 = 0
+        min_v = np.full(n_cols + 1, np.inf)
+        used = np.zeros(n_cols + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            free = ~used[1:]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            improved = free & (reduced < min_v[1:])
+            min_v[1:][improved] = reduced[improved]
+            way[1:][improved] = j0
+
+            candidates = np.where(free, min_v[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+
+            u[owner[used]] += delta
+            v[used] -= delta
+            min_v[1:][free] -= delta
+
+            j0 = j1
+            if owner[j0] == 0:
+                break
+
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+
+    assignment = {
+        int(owner[col]) - 1: col - 1 for col in range(1, n_cols + 1) if owner[col]
+    }
+    if len(assignment) < n_rows:
+        assignment = greedy_assignment(cost, assignment)
+    return assignment
+
+
+def assign(
+    cost: np.ndarray,
+    budget: Optional[float] = None,
+    max_hungarian_size: int = _MAX_HUNGARIAN_SIZE,
+) -> Dict[int, int]:
+    """
+    Row -> column assignment minimizing the total cost, within budget seconds
+    if given. Problems bigger than max_hungarian_size are solved greedily.
+    Pairs of cost UNREACHABLE_COST or more are left out.
+    """
+    if cost.size == 0:
+        return {}
+
+    if cost.size > max_hungarian_size:
+        assignment = greedy_assignment(cost)
+    else:
+        deadline = None if budget is None else time.perf_counter() + budget
+        assignment = hungarian(cost, deadline)
+
+    return {
+        row: col for row, col in assignment.items() if cost[row, col] < UNREACHABLE_COST
+    }
@@ -0,0 +1,266 @@
+import time
+from typing import Dict, FrozenSet, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from lux.constants import Constants
+from lux.game import Game
+from lux.game_constants import GAME_CONSTANTS
+from lux.game_map.game_map import NO_TEAM
+
+from utils.fuel_forecast import next_dawn, nights_to_dawn, survivable_turns
+
+from simulator.engine import Simulation
+
+DIRECTIONS = Constants.DIRECTIONS
+UNIT_TYPES = Constants.UNIT_TYPES
+PARAMETERS = GAME_CONSTANTS["PARAMETERS"]
+
+# weights of the outcomes in the score of a state
+_TILE_WEIGHT = 100.0  # city tile still lit at the next dawn
+_FUEL_WEIGHT = 0.1  # fuel left at the next dawn, up to one night of upkeep
+_RESEARCH_WEIGHT = 1.0
+_CARGO_WEIGHT = 0.05  # fuel value carried by the units
+_UNIT_WEIGHT = 20.0
+# turns before the night from which city tiles only count if they have the
+# fuel to last until dawn, before that there is still time to bring it
+_NIGHT_LEAD = 10
+# before any rollout was timed, a rollout is assumed to cost this many copies
+# of the state from the game per turn of depth
+_COPIES_PER_TURN = 3
+# the estimated cost of a rollout decays toward the recent durations
+_ROLLOUT_TIME_DECAY = 0.98
+_DAY_LENGTH = PARAMETERS["DAY_LENGTH"]
+_CYCLE_LENGTH = _DAY_LENGTH + PARAMETERS["NIGHT_LENGTH"]
+
+_MOVES = {
+    DIRECTIONS.NORTH: (0, -1),
+    DIRECTIONS.EAST: (1, 0),
+    DIRECTIONS.SOUTH: (0, 1),
+    DIRECTIONS.WEST: (-1, 0),
+}
+_FUEL_RATES = [
+    PARAMETERS["RESOURCE_TO_FUEL_RATE"][key] for key in ("WOOD", "COAL", "URANIUM")
+]
+
+# action of each unit (by id) and city tile (by (x, y)), None to do nothing
+JointAction = Dict[Hashable, Optional[str]]
+
+
+def split_actions(actions: List[str]) -> Tuple[List[str], JointAction]:
+    """
+    Annotations and joint action of an action list
+    """
+    annotations = []
+    joint = {}
+    for action in actions:
+        args = action.split(" ")
+        if args[0] in ("r", "bw", "bc"):
+            joint[(int(args[1]), int(args[2]))] = action
+        elif args[0] in ("m", "bcity", "p", "t"):
+            joint[args[1]] = action
+        else:
+            annotations.append(action)
+    return annotations, joint
+
+
+def _signature(joint: JointAction) -> FrozenSet[Tuple[Hashable, str]]:
+    return frozenset(item for item in joint.items() if item[1] is not None)
+
+
+class BeamPlanner:
+    """
+    Improve the actions of a turn by looking a few turns ahead.
+
+    The search starts from the actions chosen by the rules and changes the
+    action of one unit or city tile at a time. Each joint action is played on
+    a fork of the simulator, followed by depth - 1 turns where nobody acts,
+    and the resulting state is scored. The width best joint actions are kept
+    and changed again, until the deadline or until no new joint action is
+    left. The opponent is assumed to stay idle.
+    """
+
+    def __init__(
+        self,
+        team: int,
+        depth: int = 3,
+        width: int = 4,
+        max_city_tiles: Optional[int] = None,
+        rollout_time: Optional[float] = None,
+    ):
+        self.team = team
+        self.depth = depth
+        self.width = width
+        # no city is built beyond this number of city tiles
+        self.max_city_tiles = max_city_tiles
+        self.rollouts = 0
+        # seconds a rollout is expected to take, a rollout only starts if it
+        # should end before the deadline. Given by the planner of the previous
+        # turn, estimated from the first copy of the state otherwise
+        self.rollout_time = rollout_time
+
+    def plan(self, game: Game, actions: List[str], deadline: float) -> List[str]:
+        """
+        Best actions found before deadline, a time.perf_counter() value. They
+        are the given actions if no better ones are found.
+        """
+        annotations, rule_joint = split_actions(actions)
+        start = time.perf_counter()
+        if start >= deadline:
+            return actions
+        root = Simulation.from_game(game)
+        if self.rollout_time is None:
+            self.rollout_time = (
+                (time.perf_counter() - start) * _COPIES_PER_TURN * self.depth
+            )
+        options = self.candidates(root, rule_joint)
+        if not self.has_time(deadline):
+            return actions
+
+        best_score = self.rollout(root, rule_joint)
+        best = rule_joint
+        beam = [(best_score, rule_joint)]
+        seen = {_signature(rule_joint)}
+        while self.has_time(deadline):
+            expanded = []
+            for _, joint in beam:
+                for key, key_options in options.items():
+                    for action in key_options:
+                        if joint.get(key) == action:
+                            continue
+                        child = dict(joint)
+                        child[key] = action
+                        signature = _signature(child)
+                        if signature in seen:
+                            continue
+                        if not self.has_time(deadline):
+                            break
+                        seen.add(signature)
+                        expanded.append((self.rollout(root, child), child))
+            if not expanded:
+                break
+            beam = sorted(beam + expanded, key=lambda item: -item[0])[: self.width]
+            if beam[0][0] > best_score:
+                best_score, best = beam[0]
+
+        return annotations + [action for action in best.values() if action]
+
+    def candidates(
+        self, simulation: Simulation, rule_joint: JointAction
+    ) -> Dict[Hashable, List[Optional[str]]]:
+        """
+        Legal actions of our units and city tiles that can act, the action
+        chosen by the rules first.
+
+        Units walking somewhere keep their move: a rollout of a few turns
+        cannot see the value of a trip to a far resource or city, so it would
+        always prefer them to stay and mine. They may still build a city
+        instead, and idle units may move.
+        """
+        team = self.team
+        citytile_team = simulation.citytile_team
+        may_build_city = (
+            self.max_city_tiles is None
+            or simulation.city_tile_count(team) < self.max_city_tiles
+        )
+        options = {}
+        for unit in simulation.units.values():
+            if unit.team != team or unit.cooldown >= 1:
+                continue
+            rule_action = rule_joint.get(unit.id)
+            unit_options = [rule_action]
+            if rule_action is None:
+                for direction, (dx, dy) in _MOVES.items():
+                    x, y = unit.x + dx, unit.y + dy
+                    if simulation.is_valid(x, y) and citytile_team[y, x] in (
+                        NO_TEAM,
+                        team,
+                    ):
+                        unit_options.append(f"m {unit.id} {direction}")
+            elif not rule_action.startswith("m "):
+                unit_options.append(None)
+            if (
+                may_build_city
+                and unit.type == UNIT_TYPES.WORKER
+                and sum(unit.cargo) >= PARAMETERS["CITY_BUILD_COST"]
+                and simulation.resource_amount[unit.y, unit.x] <= 0
+                and citytile_team[unit.y, unit.x] == NO_TEAM
+            ):
+                unit_options.append(f"bcity {unit.id}")
+            options[unit.id] = list(dict.fromkeys(unit_options))
+
+        can_build = simulation.unit_count(team) < simulation.city_tile_count(team)
+        ys, xs = np.nonzero(
+            (citytile_team == team) & (simulation.citytile_cooldown < 1)
+        )
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            tile_options = [rule_joint.get((x, y)), None, f"r {x} {y}"]
+            if can_build:
+                tile_options.append(f"bw {x} {y}")
+            options[(x, y)] = list(dict.fromkeys(tile_options))
+        # actions of the rules that the simulator would not allow are kept
+        for key, action in rule_joint.items():
+            options.setdefault(key, [action])
+        return options
+
+    def has_time(self, deadline: float) -> bool:
+        """
+        Whether a rollout started now should end before deadline
+        """
+        return time.perf_counter() + self.rollout_time < deadline
+
+    def rollout(self, root: Simulation, joint: JointAction) -> float:
+        start = time.perf_counter()
+        self.rollouts += 1
+        actions = [[], []]
+        actions[self.team] = [action for action in joint.values() if action]
+        state = root.child(actions)
+        for _ in range(self.depth - 1):
+            if state.turn >= state.max_turns:
+                break
+            state.step([[], []])
+        score = self.score(state)
+        self.rollout_time = max(
+            time.perf_counter() - start, (self.rollout_time or 0) * _ROLLOUT_TIME_DECAY
+        )
+        return score
+
+    def score(self, simulation: Simulation) -> float:
+        """
+        Value of a state for our team: city tiles that will still be lit at
+        the next dawn, fuel margin, research, cargo and units
+        """
+        team = self.team
+        turn = simulation.turn
+        city_ids = [
+            city_id for city_id, city in simulation.cities.items() if city.team == team
+        ]
+        score = 0.0
+        if city_ids:
+            upkeep_by_city = simulation.light_upkeep()
+            fuel = np.array([simulation.cities[i].fuel for i in city_ids])
+            upkeep = np.array([upkeep_by_city[i] for i in city_ids])
+            lit = survivable_turns(fuel, upkeep, turn) >= next_dawn(turn) - turn
+            night = turn // _CYCLE_LENGTH * _CYCLE_LENGTH + _DAY_LENGTH
+            if night - turn > _NIGHT_LEAD:
+                lit[:] = True
+            tiles = np.bincount(
+                simulation.citytile_city[simulation.citytile_team == team],
+                minlength=max(city_ids) + 1,
+            )[city_ids]
+            margin = np.minimum(
+                fuel - upkeep * nights_to_dawn(turn),
+                upkeep * PARAMETERS["NIGHT_LENGTH"],
+            )
+            score += _TILE_WEIGHT * int(tiles[lit].sum())
+            score += _FUEL_WEIGHT * float(margin.sum())
+
+        units = [unit for unit in simulation.units.values() if unit.team == team]
+        score += _RESEARCH_WEIGHT * simulation.research_points[team]
+        score += _UNIT_WEIGHT * len(units)
+        score += _CARGO_WEIGHT * sum(
+            amount * rate
+            for unit in units
+            for amount, rate in zip(unit.cargo, _FUEL_RATES)
+        )
+        return score
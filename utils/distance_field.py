@@ -0,0 +1,187 @@
+from typing import Callable, Dict, Hashable, Iterable, List, Optional
+
+import numpy as np
+
+from lux.constants import Constants
+from lux.game_map import GameMap, Position, index_grid
+
+from utils.path_finder import UNREACHABLE, multi_source_bfs
+
+DIRECTIONS = Constants.DIRECTIONS
+
+_MOVES = [
+    (DIRECTIONS.NORTH, 0, -1),
+    (DIRECTIONS.EAST, 1, 0),
+    (DIRECTIONS.SOUTH, 0, 1),
+    (DIRECTIONS.WEST, -1, 0),
+]
+
+
+class DistanceField:
+    """
+    Distance in moves from every cell to the closest of a set of source cells.
+    Any unit can read the direction toward the sources in O(1).
+    """
+
+    def __init__(self, passable: np.ndarray, sources: np.ndarray):
+        self.dist = multi_source_bfs(passable, sources)
+        self.height, self.width = self.dist.shape
+        self._flat = None
+
+    @property
+    def flat(self) -> List[int]:
+        """
+        Distances as a list indexed by y * width + x
+        """
+        if self._flat is None:
+            self._flat = self.dist.ravel().tolist()
+        return self._flat
+
+    def distance(self, pos: Position) -> int:
+        return int(self.dist[pos.y, pos.x])
+
+    def distance_index(self, idx: int) -> int:
+        return self.flat[idx]
+
+    def is_reachable(self, pos: Position) -> bool:
+        return self.distance(pos) != UNREACHABLE
+
+    def _best_move(self, x: int, y: int, is_blocked=None):
+        best = None
+        best_dist = self.dist[y, x]
+        if best_dist == UNREACHABLE:
+            # the unit may stand on a cell the field does not go through, like
+            # a city tile: any reachable neighbour is an improvement
+            best_dist = np.iinfo(np.int32).max
+
+        for direction, dx, dy in _MOVES:
+            x2, y2 = x + dx, y + dy
+            if not (0 <= x2 < self.width and 0 <= y2 < self.height):
+                continue
+            dist = self.dist[y2, x2]
+            if dist == UNREACHABLE or dist >= best_dist:
+                continue
+            if is_blocked is not None and is_blocked(Position(x2, y2)):
+                continue
+            best = (direction, x2, y2)
+            best_dist = dist
+        return best
+
+    def direction(
+        self,
+        pos: Position,
+        is_blocked: Optional[Callable[[Position], bool]] = None,
+    ) -> DIRECTIONS:
+        """
+        Direction of the neighbour that gets closest to the sources, skipping
+        the neighbours for which is_blocked returns True. CENTER when the unit
+        already is on a source or cannot get any closer.
+        """
+        move = self._best_move(pos.x, pos.y, is_blocked)
+        return DIRECTIONS.CENTER if move is None else move[0]
+
+    def direction_index(
+        self, idx: int, is_blocked: Optional[Callable[[int], bool]] = None
+    ) -> DIRECTIONS:
+        """
+        Same as direction for the cell at index y * width + x, is_blocked
+        being given cell indices
+        """
+        flat = self.flat
+        best = DIRECTIONS.CENTER
+        best_dist = flat[idx]
+        if best_dist == UNREACHABLE:
+            best_dist = np.iinfo(np.int32).max
+
+        for direction, idx2 in index_grid(self.width, self.height).moves[idx]:
+            dist = flat[idx2]
+            if dist == UNREACHABLE or dist >= best_dist:
+                continue
+            if is_blocked is not None and is_blocked(idx2):
+                continue
+            best = direction
+            best_dist = dist
+        return best
+
+    def nearest_source(self, pos: Position) -> Optional[Position]:
+        """
+        Source reached by following the field from pos, None if unreachable
+        """
+        x, y = pos.x, pos.y
+        while self.dist[y, x] != 0:
+            move = self._best_move(x, y)
+            if move is None:
+                return None
+            _, x, y = move
+        return Position(x, y)
+
+
+class DistanceFields:
+    """
+    Distance fields of one turn for one team, computed once and shared by all
+    the units of the team.
+
+    Units are not obstacles here: they move every turn and are handled when a
+    direction is read from a field.
+    """
+
+    def __init__(self, game_map: GameMap, team: int):
+        self.map = game_map
+        self.team = team
+        self.passable = ~game_map.citytile_mask()
+        self._fields: Dict[Hashable, DistanceField] = {}
+        self.bfs_count = 0
+
+    def get(self, key: Hashable, sources: Callable[[], np.ndarray]) -> DistanceField:
+        """
+        Field toward the sources mask built by sources(), cached under key
+        """
+        field = self._fields.get(key)
+        if field is None:
+            field = DistanceField(self.passable, sources())
+            self._fields[key] = field
+            self.bfs_count += 1
+        return field
+
+    def cells_expanded(self) -> int:
+        """
+        Number of cells reached by the searches of the fields computed so far
+        """
+        return sum(
+            int(np.count_nonzero(field.dist != UNREACHABLE))
+            for field in self._fields.values()
+        )
+
+    def resources(self, r_types: Iterable[str]) -> DistanceField:
+        r_types = tuple(r_types)
+        return self.get(("resources", r_types), lambda: self.map.resource_mask(r_types))
+
+    def city_tiles(self) -> DistanceField:
+        return self.get("city_tiles", lambda: self.map.citytile_mask([self.team]))
+
+    def build_sites(self) -> DistanceField:
+        return self.get("build_sites", self._build_site_mask)
+
+    def to_positions(self, key: Hashable, positions: List[Position]) -> DistanceField:
+        def sources():
+            mask = np.zeros_like(self.passable)
+            for pos in positions:
+                mask[pos.y, pos.x] = True
+            return mask
+
+        return self.get(key, sources)
+
+    def to_position(self, pos: Position) -> DistanceField:
+        return self.to_positions(("position", pos.x, pos.y), [pos])
+
+    def _build_site_mask(self) -> np.ndarray:
+        """
+        Empty cells next to a city tile of the team
+        """
+        own = self.map.citytile_mask([self.team])
+        adjacent = np.zeros_like(own)
+        adjacent[1:, :] |= own[:-1, :]
+        adjacent[:-1, :] |= own[1:, :]
+        adjacent[:, 1:] |= own[:, :-1]
+        adjacent[:, :-1] |= own[:, 1:]
+        return adjacent & self.passable & ~self.map.resource_mask()
@@ -0,0 +1,236 @@
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from lux.constants import Constants
+from lux.game import Game
+from lux.game_constants import GAME_CONSTANTS
+from lux.game_map.game_map import NO_TEAM, RESOURCE_TYPE_IDS
+
+UNIT_TYPES = Constants.UNIT_TYPES
+PARAMETERS = GAME_CONSTANTS["PARAMETERS"]
+
+# maps are padded to the largest map size, from the top left corner
+PLANE_SIZE = 32
+# scale of the amount planes of every resource type, so that they compare: a
+# wood tile grows up to MAX_WOOD_AMOUNT, coal and uranium tiles start with
+# less and never grow
+_MAX_RESOURCE_AMOUNT = PARAMETERS["MAX_WOOD_AMOUNT"]
+
+# name and scale of each plane, values are divided by their scale and clipped
+# to [0, 1]. The own planes are those of the team the state is encoded for.
+CHANNELS: List[Tuple[str, float]] = [
+    ("wood", _MAX_RESOURCE_AMOUNT),
+    ("coal", _MAX_RESOURCE_AMOUNT),
+    ("uranium", _MAX_RESOURCE_AMOUNT),
+    ("own_workers", 1),
+    ("own_carts", 1),
+    ("own_cargo", PARAMETERS["RESOURCE_CAPACITY"]["WORKER"]),
+    ("own_unit_cooldown", PARAMETERS["UNIT_ACTION_COOLDOWN"]["CART"]),
+    ("enemy_workers", 1),
+    ("enemy_carts", 1),
+    ("enemy_cargo", PARAMETERS["RESOURCE_CAPACITY"]["WORKER"]),
+    ("enemy_unit_cooldown", PARAMETERS["UNIT_ACTION_COOLDOWN"]["CART"]),
+    ("own_city_tiles", 1),
+    # fuel of the city of the tile, in nights of light upkeep
+    ("own_city_fuel", PARAMETERS["NIGHT_LENGTH"]),
+    ("own_city_cooldown", PARAMETERS["CITY_ACTION_COOLDOWN"]),
+    ("enemy_city_tiles", 1),
+    ("enemy_city_fuel", PARAMETERS["NIGHT_LENGTH"]),
+    ("enemy_city_cooldown", PARAMETERS["CITY_ACTION_COOLDOWN"]),
+    ("road", PARAMETERS["MAX_ROAD"]),
+    # cells of the map, the others are padding
+    ("map", 1),
+    # the planes below have the same value on every cell of the map
+    ("day_night", PARAMETERS["DAY_LENGTH"] + PARAMETERS["NIGHT_LENGTH"]),
+    ("night", 1),
+    ("turn", PARAMETERS["MAX_DAYS"]),
+    ("own_research", PARAMETERS["RESEARCH_REQUIREMENTS"]["URANIUM"]),
+    ("enemy_research", PARAMETERS["RESEARCH_REQUIREMENTS"]["URANIUM"]),
+]
+CHANNEL_INDEX = {name: i for i, (name, _) in enumerate(CHANNELS)}
+_SCALES = np.array([scale for _, scale in CHANNELS], dtype=np.float32)
+# planes with the same value on every cell of the map, the last ones
+_GLOBAL_CHANNELS = slice(CHANNEL_INDEX["day_night"], len(CHANNELS))
+_RESOURCE_CHANNELS = [
+    CHANNEL_INDEX[name]
+    for name, _ in sorted(RESOURCE_TYPE_IDS.items(), key=lambda item: item[1])
+]
+
+
+class FeatureEncoder:
+    """
+    Game state as a (channels, 32, 32) array of feature planes, see CHANNELS.
+
+    Planes are written into a preallocated array, which is returned without
+    copy and can be handed as is to a learning framework (torch.from_numpy for
+    instance). Map layers are copied with array operations and units and city
+    tiles are scattered from per-object arrays, there is no loop over the
+    cells. With dtype uint8, values are quantized to 0-255.
+    """
+
+    def __init__(self, dtype=np.float32):
+        self.dtype = np.dtype(dtype)
+        self.shape = (len(CHANNELS), PLANE_SIZE, PLANE_SIZE)
+        # raw values of quantized planes are gathered in float32 before
+        # scaling, float32 planes are scaled in place
+        self._raw = np.zeros((1,) + self.shape, dtype=np.float32)
+
+    def new_buffer(self, batch: Optional[int] = None) -> np.ndarray:
+        shape = self.shape if batch is None else (batch,) + self.shape
+        return np.zeros(shape, dtype=self.dtype)
+
+    def encode(
+        self, game: Game, team: Optional[int] = None, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Feature planes of game seen by team, our player by default, written
+        into out
+        """
+        if out is None:
+            out = self.new_buffer()
+        self.encode_batch([game], None if team is None else [team], out[None])
+        return out
+
+    def encode_batch(
+        self,
+        games: Sequence[Game],
+        teams: Optional[Sequence[int]] = None,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Feature planes of many games in a single (games, channels, 32, 32)
+        array, written into out. The planes of each game are gathered into
+        their slice of the batch, then the whole batch is scaled at once.
+        """
+        if out is None:
+            out = self.new_buffer(len(games))
+        if self.dtype == np.float32:
+            raw = out
+        else:
+            if len(self._raw) < len(games):
+                self._raw = np.zeros((len(games),) + self.shape, dtype=np.float32)
+            raw = self._raw[: len(games)]
+        raw.fill(0)
+        teams = [game.id for game in games] if teams is None else teams
+        for i, game in enumerate(games):
+            self._fill_map(raw[i], game, teams[i])
+        self._fill_units(raw, games, teams)
+        self._fill_cities(raw, games, teams)
+        self._fill_globals(raw, games, teams)
+
+        raw /= _SCALES[:, None, None]
+        np.clip(raw, 0, 1, out=raw)
+        if self.dtype == np.uint8:
+            raw *= 255
+            np.rint(raw, out=raw)
+        if raw is not out:
+            out[...] = raw
+        return out
+
+    @staticmethod
+    def _fill_map(raw: np.ndarray, game: Game, team: int) -> None:
+        game_map = game.map
+        h, w = game_map.height, game_map.width
+        for type_id, channel in enumerate(_RESOURCE_CHANNELS):
+            np.multiply(
+                game_map.resource_type == type_id,
+                game_map.resource_amount,
+                out=raw[channel, :h, :w],
+            )
+        raw[CHANNEL_INDEX["own_city_tiles"], :h, :w] = game_map.citytile_team == team
+        raw[CHANNEL_INDEX["enemy_city_tiles"], :h, :w] = (
+            game_map.citytile_team != team
+        ) & (game_map.citytile_team != NO_TEAM)
+        raw[CHANNEL_INDEX["road"], :h, :w] = game_map.road
+        raw[CHANNEL_INDEX["map"], :h, :w] = 1
+
+    # the units, city tiles and global values of all the games are gathered
+    # in flat arrays along with the index of their game, then scattered into
+    # the batch at once
+
+    @staticmethod
+    def _fill_units(
+        raw: np.ndarray, games: Sequence[Game], teams: Sequence[int]
+    ) -> None:
+        batch, own, is_cart, xs, ys, cargo, cooldown = [], [], [], [], [], [], []
+        for i, game in enumerate(games):
+            for player in game.players:
+                for unit in player.units:
+                    batch.append(i)
+                    own.append(player.team == teams[i])
+                    is_cart.append(unit.type == UNIT_TYPES.CART)
+                    xs.append(unit.pos.x)
+                    ys.append(unit.pos.y)
+                    cargo.append(unit.cargo.wood + unit.cargo.coal + unit.cargo.uranium)
+                    cooldown.append(unit.cooldown)
+        if not batch:
+            return
+        own = np.array(own)
+        is_cart = np.array(is_cart)
+
+        def channels(own_name: str, enemy_name: str) -> np.ndarray:
+            return np.where(own, CHANNEL_INDEX[own_name], CHANNEL_INDEX[enemy_name])
+
+        kinds = np.where(
+            is_cart,
+            channels("own_carts", "enemy_carts"),
+            channels("own_workers", "enemy_workers"),
+        )
+        np.add.at(raw, (batch, kinds, ys, xs), 1)
+        np.add.at(raw, (batch, channels("own_cargo", "enemy_cargo"), ys, xs), cargo)
+        np.maximum.at(
+            raw,
+            (batch, channels("own_unit_cooldown", "enemy_unit_cooldown"), ys, xs),
+            cooldown,
+        )
+
+    @staticmethod
+    def _fill_cities(
+        raw: np.ndarray, games: Sequence[Game], teams: Sequence[int]
+    ) -> None:
+        batch, own, xs, ys, nights, cooldown = [], [], [], [], [], []
+        for i, game in enumerate(games):
+            for player in game.players:
+                for city in player.cities.values():
+                    city_nights = city.fuel / max(city.light_upkeep, 1)
+                    for city_tile in city.citytiles:
+                        batch.append(i)
+                        own.append(player.team == teams[i])
+                        xs.append(city_tile.pos.x)
+                        ys.append(city_tile.pos.y)
+                        nights.append(city_nights)
+                        cooldown.append(city_tile.cooldown)
+        if not batch:
+            return
+        own = np.array(own)
+        for name, values in (("city_fuel", nights), ("city_cooldown", cooldown)):
+            channels = np.where(
+                own, CHANNEL_INDEX[f"own_{name}"], CHANNEL_INDEX[f"enemy_{name}"]
+            )
+            raw[batch, channels, ys, xs] = values
+
+    @staticmethod
+    def _fill_globals(
+        raw: np.ndarray, games: Sequence[Game], teams: Sequence[int]
+    ) -> None:
+        cycle = PARAMETERS["DAY_LENGTH"] + PARAMETERS["NIGHT_LENGTH"]
+        values = []
+        for game, team in zip(games, teams):
+            turn = max(game.turn, 0)
+            values.append(
+                (
+                    turn % cycle,
+                    turn % cycle >= PARAMETERS["DAY_LENGTH"],
+                    turn,
+                    game.players[team].research_points,
+                    game.players[1 - team].research_points,
+                )
+            )
+        # only on the cells of the map
+        map_channel = CHANNEL_INDEX["map"]
+        np.multiply(
+            np.array(values, dtype=np.float32)[:, :, None, None],
+            raw[:, map_channel : map_channel + 1],
+            out=raw[:, _GLOBAL_CHANNELS],
+        )
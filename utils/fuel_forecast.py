@@ -0,0 +1,125 @@
+import heapq
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from lux.game_constants import GAME_CONSTANTS
+from lux.game_objects import City, Unit
+
+_PARAMETERS = GAME_CONSTANTS["PARAMETERS"]
+_DAY_LENGTH = _PARAMETERS["DAY_LENGTH"]
+_CYCLE_LENGTH = _DAY_LENGTH + _PARAMETERS["NIGHT_LENGTH"]
+_MAX_DAYS = _PARAMETERS["MAX_DAYS"]
+_FUEL_RATE = _PARAMETERS["RESOURCE_TO_FUEL_RATE"]
+
+# number of night turns before each turn of the game, with one more entry for
+# the end of the game
+_NIGHTS_BEFORE = np.concatenate(
+    ([0], np.cumsum(np.arange(_MAX_DAYS) % _CYCLE_LENGTH >= _DAY_LENGTH))
+)
+
+
+def survivable_turns(fuel: np.ndarray, upkeep: np.ndarray, turn: int) -> np.ndarray:
+    """
+    Turns each city keeps its lights on from turn without new fuel, counting
+    up to the end of the game
+    """
+    nights = np.floor(
+        np.divide(fuel, upkeep, out=np.full(len(fuel), np.inf), where=upkeep > 0)
+    )
+    # the city goes dark on the first night turn its fuel does not cover
+    dark = np.searchsorted(_NIGHTS_BEFORE, _NIGHTS_BEFORE[turn] + nights, "right")
+    return dark - 1 - turn
+
+
+def next_dawn(turn: int) -> int:
+    """
+    Turn ending the current or next night, or the end of the game
+    """
+    return min((turn // _CYCLE_LENGTH + 1) * _CYCLE_LENGTH, _MAX_DAYS)
+
+
+def nights_to_dawn(turn: int) -> int:
+    """
+    Night turns left from turn until the end of the current or next night
+    """
+    return int(_NIGHTS_BEFORE[next_dawn(turn)] - _NIGHTS_BEFORE[turn])
+
+
+def cargo_fuel(unit: Unit) -> int:
+    cargo = unit.cargo
+    return (
+        cargo.wood * _FUEL_RATE["WOOD"]
+        + cargo.coal * _FUEL_RATE["COAL"]
+        + cargo.uranium * _FUEL_RATE["URANIUM"]
+    )
+
+
+class FuelForecast:
+    """
+    Number of turns each city survives without new fuel and fuel it misses to
+    reach the next dawn, computed for all the cities at once.
+
+    Cities are kept in a heap by urgency, the one going dark the soonest
+    first. Planning a delivery updates the city and pushes it back in the
+    heap, the outdated entries are skipped when they reach the top, so both
+    cost O(log n).
+    """
+
+    def __init__(self, cities: Iterable[City], turn: int):
+        self.turn = turn
+        self.cities: List[City] = list(cities)
+        self._index: Dict[str, int] = {
+            city.cityid: i for i, city in enumerate(self.cities)
+        }
+        self.fuel = np.array([city.fuel for city in self.cities], dtype=float)
+        self.upkeep = np.array(
+            [city.get_light_upkeep() for city in self.cities], dtype=float
+        )
+        self.nights_to_dawn = nights_to_dawn(turn)
+        self.turns = survivable_turns(self.fuel, self.upkeep, turn)
+        margin = self.fuel - self.upkeep * self.nights_to_dawn
+        self.deficit = np.maximum(-margin, 0)
+
+        self._versions = [0] * len(self.cities)
+        self._heap: List[Tuple[int, float, int, int]] = [
+            (turns, margin, i, 0)
+            for i, (turns, margin) in enumerate(
+                zip(self.turns.tolist(), margin.tolist())
+            )
+        ]
+        heapq.heapify(self._heap)
+
+    def __len__(self) -> int:
+        return len(self.cities)
+
+    def get(self, cityid: str) -> Tuple[int, float]:
+        """
+        Turns survived and fuel deficit to the next dawn of the city
+        """
+        i = self._index[cityid]
+        return int(self.turns[i]), float(self.deficit[i])
+
+    def most_urgent(self) -> Optional[City]:
+        """
+        City going dark the soonest, the one with the least fuel left at the
+        next dawn among those going dark at the same time
+        """
+        heap = self._heap
+        while heap and heap[0][3] != self._versions[heap[0][2]]:
+            heapq.heappop(heap)
+        return self.cities[heap[0][2]] if heap else None
+
+    def deliver(self, cityid: str, fuel: float) -> None:
+        """
+        Account for fuel that will be brought to the city
+        """
+        i = self._index[cityid]
+        self.fuel[i] += fuel
+        self.turns[i] = survivable_turns(
+            self.fuel[i : i + 1], self.upkeep[i : i + 1], self.turn
+        )[0]
+        margin = float(self.fuel[i] - self.upkeep[i] * self.nights_to_dawn)
+        self.deficit[i] = max(-margin, 0)
+        self._versions[i] += 1
+        heapq.heappush(self._heap, (int(self.turns[i]), margin, i, self._versions[i]))
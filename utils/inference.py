@@ -0,0 +1,442 @@
+"""
+Policy inference shared by many agent processes over a Unix socket.
+
+The server evaluates the policy on the feature planes of utils.features,
+stacking the requests received within a short window into a single batch.
+Each request carries the planes of a turn and the cells of the units to act,
+the response holds the logits of UNIT_ACTIONS for each of these units.
+
+    python -m utils.inference /tmp/lux-policy.sock [--weights policy.npz]
+        [--max-batch 64] [--max-delay 0.002] [--dtype uint8]
+
+Agents use it with the POLICY_SOCKET configuration:
+
+    python main.py '{"POLICY_SOCKET": "/tmp/lux-policy.sock"}'
+"""
+
+import argparse
+import collections
+import json
+import os
+import selectors
+import socket
+import struct
+import time
+from typing import Callable, Deque, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from lux.constants import Constants
+from lux.game import Game
+
+from utils.features import CHANNELS, PLANE_SIZE, FeatureEncoder
+
+DIRECTIONS = Constants.DIRECTIONS
+
+# actions a unit can be given by the policy, "c" is staying in place
+UNIT_ACTIONS = [
+    DIRECTIONS.CENTER,
+    DIRECTIONS.NORTH,
+    DIRECTIONS.EAST,
+    DIRECTIONS.SOUTH,
+    DIRECTIONS.WEST,
+    "bcity",
+]
+_MOVES = {
+    DIRECTIONS.NORTH: (0, -1),
+    DIRECTIONS.EAST: (1, 0),
+    DIRECTIONS.SOUTH: (0, 1),
+    DIRECTIONS.WEST: (-1, 0),
+}
+
+# frames are prefixed with their length, a request is the number of units,
+# their cells (y * PLANE_SIZE + x) and the feature planes. An empty request
+# asks for the metrics of the server.
+_LENGTH = struct.Struct(">I")
+_UNITS = struct.Struct(">H")
+_CELL_DTYPE = np.dtype(">u2")
+_LOGIT_DTYPE = np.dtype("<f4")
+
+_DEFAULT_MAX_BATCH = 64
+_DEFAULT_MAX_DELAY = 0.002
+# seconds a client waits for the server
+_DEFAULT_TIMEOUT = 1.0
+# latencies kept for the percentiles of the metrics
+_LATENCY_WINDOW = 10000
+
+# feature planes of a batch to (batch, actions, PLANE_SIZE, PLANE_SIZE) logits
+Policy = Callable[[np.ndarray], np.ndarray]
+
+
+class LinearPolicy:
+    """
+    Logits of each cell as a linear function of the feature planes of the
+    cell. uint8 planes are scaled back to [0, 1].
+    """
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray):
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+
+    @classmethod
+    def random(cls, seed: int = 0, scale: float = 0.1) -> "LinearPolicy":
+        rng = np.random.default_rng(seed)
+        weights = rng.normal(0, scale, (len(UNIT_ACTIONS), len(CHANNELS)))
+        return cls(weights, np.zeros(len(UNIT_ACTIONS)))
+
+    @classmethod
+    def load(cls, path: str) -> "LinearPolicy":
+        with np.load(path) as data:
+            return cls(data["weights"], data["bias"])
+
+    def save(self, path: str) -> None:
+        np.savez(path, weights=self.weights, bias=self.bias)
+
+    def __call__(self, features: np.ndarray) -> np.ndarray:
+        batch, channels = features.shape[:2]
+        x = features.reshape(batch, channels, -1).astype(np.float32, copy=False)
+        if features.dtype == np.uint8:
+            x = x / 255
+        logits = np.matmul(self.weights, x)
+        logits += self.bias[:, None]
+        return logits.reshape(batch, len(self.bias), *features.shape[2:])
+
+
+class InferenceMetrics:
+    """
+    Requests and batches served, with the latency of the recent requests
+    from their arrival to their response
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.requests = 0
+        self.units = 0
+        self.batches = 0
+        self.inference_time = 0.0
+        self.latencies: Deque[float] = collections.deque(maxlen=_LATENCY_WINDOW)
+
+    def add_batch(self, size: int, units: int, elapsed: float) -> None:
+        self.batches += 1
+        self.requests += size
+        self.units += units
+        self.inference_time += elapsed
+
+    def summary(self) -> Dict:
+        elapsed = time.perf_counter() - self.start
+        latencies = np.array(self.latencies) * 1e3
+        summary = {
+            "requests": self.requests,
+            "units": self.units,
+            "batches": self.batches,
+            "mean_batch": self.requests / max(self.batches, 1),
+            "requests_per_s": self.requests / elapsed,
+            "inference_ms": self.inference_time * 1e3 / max(self.batches, 1),
+        }
+        if len(latencies):
+            summary["latency_ms"] = {
+                "p50": float(np.percentile(latencies, 50)),
+                "p95": float(np.percentile(latencies, 95)),
+                "p99": float(np.percentile(latencies, 99)),
+                "max": float(latencies.max()),
+            }
+        return summary
+
+
+class _Request:
+    __slots__ = ("connection", "cells", "features", "received")
+
+    def __init__(self, connection, cells, features, received):
+        self.connection = connection
+        self.cells = cells
+        self.features = features
+        self.received = received
+
+
+class InferenceServer:
+    """
+    Serves the policy to the clients connected on a Unix socket.
+
+    A single thread reads the requests of all the clients. A batch is run
+    once max_batch requests or one request of every client are waiting, or
+    once the oldest one has waited max_delay seconds.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        policy: Policy,
+        dtype=np.float32,
+        max_batch: int = _DEFAULT_MAX_BATCH,
+        max_delay: float = _DEFAULT_MAX_DELAY,
+    ):
+        self.path = path
+        self.policy = policy
+        self.encoder = FeatureEncoder(dtype)
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.metrics = InferenceMetrics()
+        self._feature_size = int(np.prod(self.encoder.shape))
+        self._feature_bytes = self._feature_size * self.encoder.dtype.itemsize
+        self._batch = self.encoder.new_buffer(max_batch)
+        self._pending: List[_Request] = []
+        self._buffers: Dict[socket.socket, bytearray] = {}
+        self._running = False
+
+        if os.path.exists(path):
+            os.unlink(path)
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.bind(path)
+        self.socket.listen()
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self.socket, selectors.EVENT_READ)
+
+    def serve_forever(self) -> None:
+        self._running = True
+        while self._running:
+            timeout = 0.1
+            if self._pending:
+                age = time.perf_counter() - self._pending[0].received
+                timeout = max(self.max_delay - age, 0)
+            for key, _ in self._selector.select(timeout):
+                if key.fileobj is self.socket:
+                    self._accept()
+                else:
+                    self._read(key.fileobj)
+            # clients wait for their response before sending a new request, no
+            # need to wait for more once all of them are in
+            full = min(self.max_batch, len(self._buffers))
+            while self._pending and (
+                len(self._pending) >= full
+                or time.perf_counter() - self._pending[0].received >= self.max_delay
+            ):
+                self._run_batch()
+
+    @property
+    def clients(self) -> int:
+        return len(self._buffers)
+
+    def shutdown(self) -> None:
+        """
+        Stop serve_forever, from another thread
+        """
+        self._running = False
+
+    def close(self) -> None:
+        for connection in list(self._buffers):
+            self._disconnect(connection)
+        self._selector.close()
+        self.socket.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def _accept(self) -> None:
+        connection, _ = self.socket.accept()
+        header = {
+            "channels": [name for name, _ in CHANNELS],
+            "dtype": self.encoder.dtype.name,
+            "actions": UNIT_ACTIONS,
+        }
+        _send_frame(connection, json.dumps(header).encode())
+        self._buffers[connection] = bytearray()
+        self._selector.register(connection, selectors.EVENT_READ)
+
+    def _disconnect(self, connection: socket.socket) -> None:
+        self._selector.unregister(connection)
+        del self._buffers[connection]
+        connection.close()
+        self._pending = [
+            request for request in self._pending if request.connection is not connection
+        ]
+
+    def _read(self, connection: socket.socket) -> None:
+        try:
+            chunk = connection.recv(1 << 18)
+        except ConnectionError:
+            chunk = b""
+        if not chunk:
+            self._disconnect(connection)
+            return
+        buffer = self._buffers[connection]
+        buffer += chunk
+        received = time.perf_counter()
+        while len(buffer) >= _LENGTH.size:
+            (length,) = _LENGTH.unpack_from(buffer)
+            end = _LENGTH.size + length
+            if len(buffer) < end:
+                break
+            body = bytes(buffer[_LENGTH.size : end])
+            del buffer[:end]
+            if not self._handle(connection, body, received):
+                self._disconnect(connection)
+                return
+
+    def _handle(self, connection: socket.socket, body: bytes, received: float) -> bool:
+        """
+        Queue a request, False if it is malformed
+        """
+        if not body:
+            _send_frame(connection, json.dumps(self.metrics.summary()).encode())
+            return True
+        if len(body) < _UNITS.size:
+            return False
+        (units,) = _UNITS.unpack_from(body)
+        cells_end = _UNITS.size + units * _CELL_DTYPE.itemsize
+        if len(body) != cells_end + self._feature_bytes:
+            return False
+        cells = np.frombuffer(body, _CELL_DTYPE, units, _UNITS.size).astype(np.intp)
+        if units and cells.max() >= PLANE_SIZE * PLANE_SIZE:
+            return False
+        features = np.frombuffer(
+            body, self.encoder.dtype, self._feature_size, cells_end
+        )
+        self._pending.append(_Request(connection, cells, features, received))
+        return True
+
+    def _run_batch(self) -> None:
+        requests = self._pending[: self.max_batch]
+        self._pending = self._pending[self.max_batch :]
+        size = len(requests)
+        start = time.perf_counter()
+        batch = self._batch[:size]
+        flat = batch.reshape(size, -1)
+        for i, request in enumerate(requests):
+            flat[i] = request.features
+        logits = self.policy(batch).reshape(size, len(UNIT_ACTIONS), -1)
+        self.metrics.add_batch(
+            size,
+            sum(len(request.cells) for request in requests),
+            time.perf_counter() - start,
+        )
+
+        for i, request in enumerate(requests):
+            unit_logits = logits[i][:, request.cells].T.astype(_LOGIT_DTYPE)
+            try:
+                _send_frame(request.connection, unit_logits.tobytes())
+            except OSError:
+                # the client is gone, its connection is closed on the next read
+                continue
+            self.metrics.latencies.append(time.perf_counter() - request.received)
+
+
+class InferenceClient:
+    """
+    Connection of an agent to an InferenceServer. Requests raise OSError
+    (socket.timeout, ConnectionError) past timeout seconds or if the server
+    is gone, the connection must not be used afterwards.
+    """
+
+    def __init__(self, path: str, timeout: Optional[float] = _DEFAULT_TIMEOUT):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.settimeout(timeout)
+        try:
+            self.socket.connect(path)
+            header = json.loads(self._read_frame())
+        except OSError:
+            self.socket.close()
+            raise
+        self.channels: List[str] = header["channels"]
+        self.actions: List[str] = header["actions"]
+        self.encoder = FeatureEncoder(np.dtype(header["dtype"]))
+        self._features = self.encoder.new_buffer()
+
+    def logits(self, features: np.ndarray, cells: Sequence[int]) -> np.ndarray:
+        """
+        (units, actions) logits of the units on cells, y * PLANE_SIZE + x
+        """
+        cells = np.asarray(cells, dtype=_CELL_DTYPE)
+        features = np.ascontiguousarray(features, dtype=self.encoder.dtype)
+        _send_frame(
+            self.socket,
+            _UNITS.pack(len(cells)) + cells.tobytes() + features.tobytes(),
+        )
+        data = self._read_frame()
+        return np.frombuffer(data, _LOGIT_DTYPE).reshape(len(cells), len(self.actions))
+
+    def unit_actions(self, game: Game, team: int) -> Dict[str, Optional[str]]:
+        """
+        Action of the highest logit of each unit of team that can act, by unit
+        id, None to stay. Moves off the map are left out.
+        """
+        units = [unit for unit in game.players[team].units if unit.can_act()]
+        if not units:
+            return {}
+        features = self.encoder.encode(game, team, self._features)
+        cells = [unit.pos.y * PLANE_SIZE + unit.pos.x for unit in units]
+        logits = self.logits(features, cells).copy()
+
+        width, height = game.map.width, game.map.height
+        actions = {}
+        for unit, unit_logits in zip(units, logits):
+            for i, action in enumerate(self.actions):
+                if action in _MOVES:
+                    dx, dy = _MOVES[action]
+                    x, y = unit.pos.x + dx, unit.pos.y + dy
+                    if not (0 <= x < width and 0 <= y < height):
+                        unit_logits[i] = -np.inf
+            action = self.actions[int(np.argmax(unit_logits))]
+            if action == "bcity":
+                actions[unit.id] = unit.build_city()
+            elif action in _MOVES:
+                actions[unit.id] = unit.move(action)
+            else:
+                actions[unit.id] = None
+        return actions
+
+    def metrics(self) -> Dict:
+        _send_frame(self.socket, b"")
+        return json.loads(self._read_frame())
+
+    def close(self) -> None:
+        self.socket.close()
+
+    def _read_frame(self) -> bytes:
+        (length,) = _LENGTH.unpack(_recv_exactly(self.socket, _LENGTH.size))
+        return _recv_exactly(self.socket, length)
+
+
+def _send_frame(connection: socket.socket, data: bytes) -> None:
+    connection.sendall(_LENGTH.pack(len(data)) + data)
+
+
+def _recv_exactly(connection: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = connection.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("inference server closed the connection")
+        data += chunk
+    return bytes(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("path", help="Unix socket to listen on")
+    parser.add_argument("--weights", help="LinearPolicy .npz, random if not given")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-batch", type=int, default=_DEFAULT_MAX_BATCH)
+    parser.add_argument("--max-delay", type=float, default=_DEFAULT_MAX_DELAY)
+    parser.add_argument("--dtype", choices=["float32", "uint8"], default="float32")
+    args = parser.parse_args()
+
+    if args.weights:
+        policy = LinearPolicy.load(args.weights)
+    else:
+        policy = LinearPolicy.random(args.seed)
+    server = InferenceServer(
+        args.path, policy, args.dtype, args.max_batch, args.max_delay
+    )
+    print(f"serving on {args.path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        print(json.dumps(server.metrics.summary(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import atexit
+import json
+import queue
+import threading
+from typing import Dict, List, Optional, Tuple
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+
+# turn, team, level, message, fields
+Record = Tuple[int, int, int, str, Dict]
+
+
+class TurnLogger:
+    """
+    Keeps the log messages of a turn in memory and writes them to the file
+    once the turn is over, from a background thread unless background is
+    False. Logging a message never touches the file.
+
+    Memory is capped: at most max_records messages are kept for a turn and at
+    most max_pending turns wait for the writer, the messages over the cap are
+    dropped and counted in dropped.
+    """
+
+    def __init__(
+        self,
+        path: str = "log.txt",
+        level: int = INFO,
+        structured: bool = False,
+        background: bool = True,
+        max_records: int = 1000,
+        max_pending: int = 8,
+    ):
+        self.path = path
+        self.level = level
+        self.structured = structured
+        self.background = background
+        self.max_records = max_records
+        self.dropped = 0
+
+        self.turn = -1
+        self.team = -1
+        self._records: List[Record] = []
+        self._queue: "queue.Queue[Optional[List[Record]]]" = queue.Queue(max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._file = None
+        self._closed_at_exit = False
+
+    def start_turn(self, turn: int, team: int) -> None:
+        self.turn = turn
+        self.team = team
+
+    def log(self, message: str, level: int = INFO, **fields) -> None:
+        """
+        Buffer a message of the current turn, fields are written along with it
+        in the structured format
+        """
+        if level < self.level:
+            return
+        if len(self._records) >= self.max_records:
+            self.dropped += 1
+            return
+        self._records.append((self.turn, self.team, level, message, fields))
+
+    def debug(self, message: str, **fields) -> None:
+        self.log(message, DEBUG, **fields)
+
+    def info(self, message: str, **fields) -> None:
+        self.log(message, INFO, **fields)
+
+    def warning(self, message: str, **fields) -> None:
+        self.log(message, WARNING, **fields)
+
+    def error(self, message: str, **fields) -> None:
+        self.log(message, ERROR, **fields)
+
+    def end_turn(self) -> None:
+        """
+        Hand the messages of the turn over to the writer
+        """
+        if not self._records:
+            return
+        records, self._records = self._records, []
+        if not self.background:
+            self._write(records)
+            return
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            if not self._closed_at_exit:
+                atexit.register(self.close)
+                self._closed_at_exit = True
+        try:
+            self._queue.put_nowait(records)
+        except queue.Full:
+            self.dropped += len(records)
+
+    def flush(self) -> None:
+        """
+        Wait until every message handed over has been written
+        """
+        if self._thread is not None:
+            self._queue.join()
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        self.end_turn()
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def format(self, record: Record) -> str:
+        turn, team, level, message, fields = record
+        if self.structured:
+            entry = {
+                "turn": turn,
+                "team": team,
+                "level": LEVEL_NAMES.get(level, level),
+                "message": message,
+            }
+            entry.update(fields)
+            return json.dumps(entry, default=str)
+        return f"[Turn {turn}]Team {team}: {message}"
+
+    def _run(self) -> None:
+        while True:
+            records = self._queue.get()
+            try:
+                if records is None:
+                    return
+                self._write(records)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, records: List[Record]) -> None:
+        if self._file is None:
+            self._file = open(self.path, "a")
+        self._file.write("".join(self.format(record) + "\n" for record in records))
+        self._file.flush()
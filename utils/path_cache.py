@@ -0,0 +1,99 @@
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from lux.game_map import Position
+
+from utils.path_finder import PathType
+
+
+class PathCache:
+    """
+    Remaining path of each unit toward its objective, kept across turns.
+
+    An entry is only dropped when the objective of the unit changes, when the
+    unit left its path or when one of the cells left on the path is blocked.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, Tuple[Position, PathType]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(
+        self,
+        unit_id: Hashable,
+        objective: Position,
+        pos: Position,
+        blocked: np.ndarray,
+        is_next_blocked: Optional[Callable[[Position], bool]] = None,
+    ) -> Optional[PathType]:
+        """
+        Path from pos to objective, or None on a miss. blocked is a boolean
+        [y, x] mask of the cells the path cannot go through anymore and
+        is_next_blocked tells if the next cell is taken, by a unit for instance.
+        """
+        entry = self._entries.get(unit_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        cached_objective, path = entry
+        # the unit either waited or made the first move of the path
+        if len(path) > 1 and path[1] == (pos.x, pos.y):
+            path = path[1:]
+        if cached_objective != objective or path[0] != (pos.x, pos.y):
+            return self._invalidate(unit_id)
+
+        xs, ys = zip(*path[1:]) if len(path) > 1 else ((), ())
+        if blocked[list(ys), list(xs)].any():
+            return self._invalidate(unit_id)
+        if is_next_blocked is not None and len(path) > 1:
+            if is_next_blocked(Position(*path[1])):
+                return self._invalidate(unit_id)
+
+        self._entries[unit_id] = (objective, path)
+        self.hits += 1
+        return path
+
+    def put(self, unit_id: Hashable, objective: Position, path: PathType) -> None:
+        self._entries[unit_id] = (objective, path)
+
+    def drop(self, unit_id: Hashable) -> None:
+        self._entries.pop(unit_id, None)
+
+    def prune(self, unit_ids: List[Hashable]) -> None:
+        """
+        Drop the entries of the units that are not in unit_ids anymore
+        """
+        alive = set(unit_ids)
+        for unit_id in list(self._entries):
+            if unit_id not in alive:
+                del self._entries[unit_id]
+
+    def reset(self) -> None:
+        """
+        Drop every entry and the counters, at the end of a game
+        """
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _invalidate(self, unit_id: Hashable) -> None:
+        del self._entries[unit_id]
+        self.invalidations += 1
+        self.misses += 1
+        return None
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"PathCache | hits: {self.hits}, misses: {self.misses}, "
+            f"invalidations: {self.invalidations}, hit rate: {self.hit_rate:.0%}"
+        )
@@ -1,5 +1,6 @@
 import collections
-from typing import List, Tuple
+import heapq
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 
@@ -11,10 +12,15 @@ END = 2
 EMPTY = 3
 
 
-def game_map_to_array(game_map, startPos, endPos, forbidden_pos=None) -> np.array:
+def game_map_to_array(
+    game_map, startPos, endPos, forbidden_pos=None, obstacle_mask=None
+) -> np.array:
     """Convert GameMap to an int array"""
     forbidden_pos = forbidden_pos or []
-    array = EMPTY * np.ones((game_map.height, game_map.width))
+    array = np.full((game_map.height, game_map.width), EMPTY, dtype=np.int8)
+
+    if obstacle_mask is not None:
+        array[obstacle_mask] = WALL
 
     for pos in forbidden_pos:
         array[pos.y][pos.x] = WALL
@@ -58,3 +64,126 @@ def bfs(grid, start):
             ):
                 queue.append(path + [(x2, y2)])
                 seen.add((x2, y2))
+
+
+def astar(
+    grid, start, end=None, stats: Optional[Dict[str, int]] = None
+) -> Optional[PathType]:
+    """
+    A* search with the same grid encoding and result as bfs: the path from
+    start to the END cell (or to end if given), both included, or None.
+
+    See astar_indices, which this wraps for (x, y) coordinates. The number of
+    expanded cells is added to stats["expanded"] when stats is given.
+    """
+    grid = np.asarray(grid)
+    height, width = grid.shape
+
+    if end is None:
+        ends = np.argwhere(grid == END)
+        if not len(ends):
+            return None
+        end = (int(ends[0][1]), int(ends[0][0]))
+
+    walls = ((grid == WALL) | (grid == START)).ravel().tolist()
+    path = astar_indices(
+        walls, width, start[1] * width + start[0], end[1] * width + end[0], stats
+    )
+    if path is None:
+        return None
+    return [(idx % width, idx // width) for idx in path]
+
+
+def astar_indices(
+    walls: List[bool],
+    width: int,
+    start_idx: int,
+    end_idx: int,
+    stats: Optional[Dict[str, int]] = None,
+) -> Optional[List[int]]:
+    """
+    A* search on cells identified by their index y * width + x: the indices
+    of the path from start_idx to end_idx, both included, or None. walls is
+    indexed the same way and the start cell may be a wall.
+
+    The path is rebuilt from parent pointers, so every expansion costs O(1)
+    memory. The Manhattan distance is an exact lower bound on grids with unit
+    moves, so the path is a shortest one.
+    """
+    size = len(walls)
+    height = size // width
+    start_x, start_y = start_idx % width, start_idx // width
+    end_x, end_y = end_idx % width, end_idx // width
+
+    cost = [-1] * size
+    parent = [-1] * size
+    cost[start_idx] = 0
+    h = abs(start_x - end_x) + abs(start_y - end_y)
+    # ties on f are broken toward the goal
+    heap = [(h, h, 0, start_idx)]
+    expanded = 0
+
+    while heap:
+        _, _, g, idx = heapq.heappop(heap)
+        if idx == end_idx:
+            if stats is not None:
+                stats["expanded"] = stats.get("expanded", 0) + expanded
+            path = []
+            while idx != -1:
+                path.append(idx)
+                idx = parent[idx]
+            path.reverse()
+            return path
+        if g > cost[idx]:
+            continue
+        expanded += 1
+
+        x, y = idx % width, idx // width
+        g += 1
+        for x2, y2 in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if not (0 <= x2 < width and 0 <= y2 < height):
+                continue
+            idx2 = y2 * width + x2
+            if walls[idx2] or (cost[idx2] != -1 and cost[idx2] <= g):
+                continue
+            cost[idx2] = g
+            parent[idx2] = idx
+            h = abs(x2 - end_x) + abs(y2 - end_y)
+            heapq.heappush(heap, (g + h, h, g, idx2))
+
+    if stats is not None:
+        stats["expanded"] = stats.get("expanded", 0) + expanded
+    return None
+
+
+UNREACHABLE = -1
+
+
+def multi_source_bfs(passable: np.ndarray, sources: np.ndarray) -> np.ndarray:
+    """
+    Distance in moves from every cell to the closest source, UNREACHABLE where
+    no source can be reached. Both arguments are boolean [y, x] masks; the
+    sources do not need to be passable themselves.
+
+    The search grows the whole frontier at once with array shifts, so its cost
+    depends on the map size and not on the number of sources. sources may also
+    be a [k, y, x] stack of masks, to run k independent searches at once.
+    """
+    dist = np.full(sources.shape, UNREACHABLE, dtype=np.int32)
+    frontier = sources.copy()
+    dist[frontier] = 0
+    unvisited = passable & ~frontier
+    grown = np.empty_like(frontier)
+
+    step = 0
+    while frontier.any():
+        step += 1
+        grown.fill(False)
+        grown[..., 1:, :] |= frontier[..., :-1, :]
+        grown[..., :-1, :] |= frontier[..., 1:, :]
+        grown[..., :, 1:] |= frontier[..., :, :-1]
+        grown[..., :, :-1] |= frontier[..., :, 1:]
+        frontier = grown & unvisited
+        unvisited &= ~frontier
+        dist[frontier] = step
+    return dist
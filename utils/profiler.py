@@ -0,0 +1,108 @@
+import csv
+import json
+import time
+from typing import Dict, List, Optional
+
+
+class _Phase:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.profiler.add(self.name, time.perf_counter() - self.start)
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class Profiler:
+    """
+    Wall time spent in each phase of a turn and counters such as the number of
+    searches, recorded turn by turn.
+
+    A disabled profiler records nothing: phase() hands out a shared no-op
+    context and the counters return right away.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.info: Dict[str, object] = {}
+        self.turns: List[Dict[str, float]] = []
+        self._turn: Optional[Dict[str, float]] = None
+        self._turn_start = 0.0
+
+    def start_turn(self) -> None:
+        if not self.enabled:
+            return
+        self._turn = {}
+        self._turn_start = time.perf_counter()
+
+    def end_turn(self, turn: int) -> None:
+        if self._turn is None:
+            return
+        self._turn["total"] = time.perf_counter() - self._turn_start
+        self._turn["turn"] = turn
+        self.turns.append(self._turn)
+        self._turn = None
+
+    def phase(self, name: str):
+        """
+        Context manager adding the time spent in it to the phase name
+        """
+        if self._turn is None:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def add(self, name: str, value: float = 1) -> None:
+        """
+        Add value to the counter name of the current turn
+        """
+        if self._turn is None:
+            return
+        self._turn[name] = self._turn.get(name, 0) + value
+
+    def summary(self) -> Dict:
+        """
+        Total, mean and max of every phase and counter over the game
+        """
+        names = sorted({name for turn in self.turns for name in turn} - {"turn"})
+        stats = {}
+        for name in names:
+            values = [turn.get(name, 0) for turn in self.turns]
+            stats[name] = {
+                "total": sum(values),
+                "mean": sum(values) / len(values),
+                "max": max(values),
+            }
+        return dict(self.info, turns=len(self.turns), stats=stats)
+
+    def write(self, path: str) -> None:
+        """
+        Write the game to path: one row per turn for a .csv file, the summary
+        and the turns otherwise
+        """
+        if path.endswith(".csv"):
+            names = sorted({name for turn in self.turns for name in turn} - {"turn"})
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, ["turn"] + names, restval=0)
+                writer.writeheader()
+                writer.writerows(self.turns)
+        else:
+            with open(path, "w") as f:
+                json.dump(dict(self.summary(), per_turn=self.turns), f)
@@ -0,0 +1,146 @@
+"""
+Replay a game recorded by main.py through agent.agent, without a referee.
+
+    python -m utils.replay replay.gz [--until 120] [--break-at 87]
+
+Record a game by giving main.py a RECORD path in its configuration:
+
+    python main.py '{"RECORD": "replay.gz"}'
+"""
+
+import argparse
+import gzip
+import json
+import struct
+import time
+from typing import Iterator, List, Optional, Tuple
+
+_VERSION = 1
+_LENGTH = struct.Struct(">I")
+
+
+class ReplayWriter:
+    """
+    Writes the raw update block and the actions of every turn to a gzip file.
+    Each turn is flushed so that a replay survives the process being killed.
+    """
+
+    def __init__(self, path: str, player: int, config: dict):
+        self.file = gzip.open(path, "wb")
+        header = {"version": _VERSION, "player": player, "config": config}
+        self._write_frame(json.dumps(header).encode())
+
+    def write(self, block: bytes, actions: List[str]) -> None:
+        self._write_frame(block)
+        self._write_frame(",".join(actions).encode())
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+    def _write_frame(self, data: bytes) -> None:
+        self.file.write(_LENGTH.pack(len(data)) + data)
+
+
+class ReplayReader:
+    """
+    Turns of a replay file, a truncated last turn is ignored
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with gzip.open(path, "rb") as f:
+            header = json.loads(self._read_frame(f))
+        self.player: int = header["player"]
+        self.config: dict = header["config"]
+
+    def __iter__(self) -> Iterator[Tuple[bytes, List[str]]]:
+        with gzip.open(self.path, "rb") as f:
+            self._read_frame(f)
+            while True:
+                try:
+                    block = self._read_frame(f)
+                    actions = self._read_frame(f)
+                except EOFError:
+                    return
+                if block is None or actions is None:
+                    return
+                yield block, [
+                    action for action in actions.decode().split(",") if action
+                ]
+
+    @staticmethod
+    def _read_frame(f) -> Optional[bytes]:
+        prefix = f.read(_LENGTH.size)
+        if len(prefix) < _LENGTH.size:
+            return None
+        (length,) = _LENGTH.unpack(prefix)
+        data = f.read(length)
+        if len(data) < length:
+            return None
+        return data
+
+
+class _Observation(dict):
+    def __init__(self, player: int, step: int, block: bytes) -> None:
+        super().__init__(step=step, block=block)
+        self.player = player
+
+
+def replay(
+    path: str, until: Optional[int] = None, break_at: Optional[int] = None
+) -> Iterator[Tuple[int, List[str], List[str], float]]:
+    """
+    Feed the recorded turns to agent.agent, up to the turn until included, and
+    yield the step, the actions, the recorded actions and the time of the turn.
+    The debugger is started right before the turn break_at is played.
+    """
+    from agent import agent
+
+    reader = ReplayReader(path)
+    config = {key: value for key, value in reader.config.items() if key != "RECORD"}
+    for step, (block, recorded) in enumerate(reader):
+        if until is not None and step > until:
+            return
+        observation = _Observation(reader.player, step, block)
+        if step == break_at:
+            breakpoint()
+        start = time.perf_counter()
+        actions = agent(observation, config.copy())
+        yield step, actions, recorded, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("path")
+    parser.add_argument("--until", type=int, help="last turn to play")
+    parser.add_argument("--break-at", type=int, help="start pdb before this turn")
+    args = parser.parse_args()
+
+    times = []
+    mismatches = 0
+    for step, actions, recorded, elapsed in replay(
+        args.path, args.until, args.break_at
+    ):
+        times.append(elapsed)
+        if actions != recorded:
+            mismatches += 1
+            print(f"turn {step}: actions differ from the recording")
+            print(f"  recorded: {recorded}")
+            print(f"  replayed: {actions}")
+
+    if not times:
+        print("no turn in the replay")
+        return
+    slowest = max(range(len(times)), key=times.__getitem__)
+    print(
+        f"{len(times)} turns, {mismatches} with different actions,"
+        f" {sum(times) / len(times) * 1e3:.2f} ms/turn on average,"
+        f" slowest: turn {slowest} ({times[slowest] * 1e3:.2f} ms)"
+    )
+
+
+if __name__ == "__main__":
+    main()
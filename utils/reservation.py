@@ -0,0 +1,175 @@
+import heapq
+from typing import Dict, Hashable, List, Optional, Union
+
+import numpy as np
+
+from lux.constants import Constants
+from lux.game_map import Position, index_grid
+
+from utils.distance_field import DistanceField
+from utils.path_finder import UNREACHABLE
+
+DIRECTIONS = Constants.DIRECTIONS
+
+
+class ReservationTable:
+    """
+    Cells reserved by units at a number of turns from now (t=1 is the cell a
+    unit will be in after this turn's actions).
+
+    Reservations are stored under a single integer key per (cell, turn offset)
+    so reserving and checking a cell are both O(1). Cells flagged in shared
+    (our city tiles) can hold any number of units and are never reserved.
+    """
+
+    def __init__(self, width: int, height: int, shared: Optional[np.ndarray] = None):
+        self.width = width
+        self.height = height
+        self._size = width * height
+        self._owners: Dict[int, Hashable] = {}
+        self._keys: Dict[Hashable, List[int]] = {}
+        if shared is None:
+            self._shared = [False] * self._size
+        else:
+            self._shared = shared.ravel().tolist()
+
+    def index(self, pos: Position) -> int:
+        return pos.y * self.width + pos.x
+
+    def reserve_index(self, idx: int, t: int, owner: Hashable) -> None:
+        if self._shared[idx]:
+            return
+        key = t * self._size + idx
+        self._owners[key] = owner
+        self._keys.setdefault(owner, []).append(key)
+
+    def owner_index(self, idx: int, t: int) -> Optional[Hashable]:
+        return self._owners.get(t * self._size + idx)
+
+    def is_reserved_index(
+        self, idx: int, t: int, owner: Optional[Hashable] = None
+    ) -> bool:
+        """
+        Whether the cell is reserved at t by another unit than owner
+        """
+        other = self._owners.get(t * self._size + idx)
+        return other is not None and other != owner
+
+    def reserve(self, pos: Position, t: int, owner: Hashable) -> None:
+        self.reserve_index(self.index(pos), t, owner)
+
+    def is_reserved(self, pos: Position, t: int, owner: Optional[Hashable] = None):
+        return self.is_reserved_index(self.index(pos), t, owner)
+
+    def release(self, owner: Hashable) -> None:
+        """
+        Drop all the reservations of owner
+        """
+        for key in self._keys.pop(owner, []):
+            if self._owners.get(key) == owner:
+                del self._owners[key]
+
+
+class CooperativePathFinder:
+    """
+    Windowed hierarchical cooperative A* (WHCA*).
+
+    Units are planned one after the other in space-time, over the next window
+    turns, around the cells reserved by the units planned before them. The
+    heuristic is the distance field of the unit's target, which is the exact
+    distance when other units are ignored. Each planned path is then reserved
+    for the units planned next.
+    """
+
+    def __init__(
+        self, passable: np.ndarray, reservations: ReservationTable, window: int
+    ):
+        self.height, self.width = passable.shape
+        self.passable = passable.ravel().tolist()
+        self.reservations = reservations
+        self.window = window
+        self.grid = index_grid(self.width, self.height)
+        self.neighbors = self.grid.moves
+        self.expanded = 0
+
+    def plan(self, owner: Hashable, start: Union[Position, int], field: DistanceField):
+        """
+        Reserve the path of owner toward the sources of field over the window
+        and return the direction of its first move. start is a Position or a
+        cell index.
+        """
+        start_idx = start if type(start) is int else start.y * self.width + start.x
+        path = self._search(owner, start_idx, field.flat)
+
+        self.reservations.release(owner)
+        for t in range(1, self.window + 1):
+            idx = path[min(t, len(path) - 1)]
+            self.reservations.reserve_index(idx, t, owner)
+
+        if len(path) < 2:
+            return DIRECTIONS.CENTER
+        return self.grid.direction(path[0], path[1])
+
+    def _search(self, owner: Hashable, start_idx: int, dist: List[int]) -> List[int]:
+        """
+        Cells of the best space-time path from start_idx, one per turn. The
+        path ends at a source of the field or after window turns.
+        """
+        reservations = self.reservations
+        passable = self.passable
+        window = self.window
+
+        start_h = dist[start_idx]
+        if start_h == UNREACHABLE:
+            # the unit may stand on a cell the field does not go through
+            reachable = [
+                dist[idx2] + 1
+                for _, idx2 in self.neighbors[start_idx]
+                if dist[idx2] != UNREACHABLE
+            ]
+            if not reachable:
+                return [start_idx]
+            start_h = min(reachable)
+
+        # (f, h, t, cell), parents are keyed by (t, cell)
+        heap = [(start_h, start_h, 0, start_idx)]
+        parents = {(0, start_idx): None}
+
+        while heap:
+            _, h, t, idx = heapq.heappop(heap)
+            if h == 0 or t == window:
+                path = [idx]
+                node = parents[(t, idx)]
+                while node is not None:
+                    path.append(node[1])
+                    node = parents[node]
+                path.reverse()
+                return path
+            self.expanded += 1
+
+            t2 = t + 1
+            for _, idx2 in self.neighbors[idx] + [(DIRECTIONS.CENTER, idx)]:
+                if (t2, idx2) in parents:
+                    continue
+                h2 = dist[idx2]
+                if idx2 != idx and (
+                    h2 == UNREACHABLE or not (passable[idx2] or h2 == 0)
+                ):
+                    continue
+                if reservations.is_reserved_index(idx2, t2, owner):
+                    continue
+                # two units cannot swap their cells
+                other = reservations.owner_index(idx2, t)
+                if (
+                    idx2 != idx
+                    and other is not None
+                    and other != owner
+                    and reservations.owner_index(idx, t2) == other
+                ):
+                    continue
+                if h2 == UNREACHABLE:
+                    h2 = h
+                parents[(t2, idx2)] = (t, idx)
+                heapq.heappush(heap, (t2 + h2, h2, t2, idx2))
+
+        return [start_idx]
@@ -0,0 +1,226 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from lux.game_map import GameMap, Position, index_grid
+
+
+class ResourceCluster:
+    """
+    Group of resource tiles of the same type connected by their sides, such as
+    a forest.
+
+    Tiles are never added back once depleted, so a cluster is not split when
+    the tiles linking two of its parts get mined out: it keeps describing the
+    area it was found in.
+    """
+
+    __slots__ = ("id", "type", "tiles", "amount", "_sum_x", "_sum_y", "_perimeter")
+
+    def __init__(self, cluster_id: int, r_type: str):
+        self.id = cluster_id
+        self.type = r_type
+        # cell index of each tile left
+        self.tiles: Set[int] = set()
+        self.amount = 0
+        self._sum_x = 0
+        self._sum_y = 0
+        # number of tiles of the cluster next to each cell around it
+        self._perimeter: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.tiles)
+
+    @property
+    def centroid(self) -> Optional[Position]:
+        """
+        Cell closest to the mean position of the tiles left
+        """
+        if not self.tiles:
+            return None
+        n = len(self.tiles)
+        return Position(round(self._sum_x / n), round(self._sum_y / n))
+
+    def perimeter(self) -> List[int]:
+        """
+        Indices of the cells next to a tile of the cluster that are not part
+        of it
+        """
+        return list(self._perimeter)
+
+
+class ResourceClusters:
+    """
+    Resource clusters of a map, found with a union-find over the resource
+    tiles of each type.
+
+    The clusters are built on the first update and then only patched: the
+    amounts are updated, depleted tiles are taken out of their cluster and
+    the tiles that were not seen before are merged into the clusters around
+    them. An update costs O(number of resource tiles).
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.grid = index_grid(width, height)
+        self._parent: List[int] = list(range(width * height))
+        # amount and type of each tile, by cell index
+        self._amounts: Dict[int, int] = {}
+        self._types: Dict[int, str] = {}
+        # cluster of each root of the union-find
+        self._clusters: Dict[int, ResourceCluster] = {}
+        self._next_id = 0
+
+    def find(self, idx: int) -> int:
+        parent = self._parent
+        root = idx
+        while parent[root] != root:
+            root = parent[root]
+        while parent[idx] != root:
+            parent[idx], idx = root, parent[idx]
+        return root
+
+    def get(self, pos: Position) -> Optional[ResourceCluster]:
+        """
+        Cluster of the tile at pos, None if there is no resource on it
+        """
+        idx = pos.y * self.width + pos.x
+        if idx not in self._amounts:
+            return None
+        return self._clusters[self.find(idx)]
+
+    def __iter__(self) -> Iterator[ResourceCluster]:
+        return (cluster for cluster in self._clusters.values() if cluster.tiles)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def update(self, game_map: GameMap) -> None:
+        cells = game_map.cells
+        for idx in list(self._amounts):
+            resource = cells[idx].resource
+            if resource is None or resource.amount <= 0:
+                self._remove(idx)
+            elif resource.amount != self._amounts[idx]:
+                self._clusters[self.find(idx)].amount += (
+                    resource.amount - self._amounts[idx]
+                )
+                self._amounts[idx] = resource.amount
+
+        if game_map.resource_cell_count() == len(self._amounts):
+            # no new tile
+            return
+        parent = self._parent
+        for r_type, tiles in game_map.resource_cells.items():
+            for idx, cell in tiles.items():
+                # the tiles depleted before stay linked in the union-find and
+                # are not added back
+                if (
+                    idx not in self._amounts
+                    and parent[idx] == idx
+                    and idx not in self._clusters
+                    and cell.resource.amount > 0
+                ):
+                    self._add(idx, r_type, cell.resource.amount)
+
+    def _add(self, idx: int, r_type: str, amount: int) -> None:
+        cluster = ResourceCluster(self._next_id, r_type)
+        self._next_id += 1
+        self._clusters[idx] = cluster
+        self._amounts[idx] = amount
+        self._types[idx] = r_type
+        cluster.tiles.add(idx)
+        cluster.amount = amount
+        cluster._sum_x = self.grid.xs[idx]
+        cluster._sum_y = self.grid.ys[idx]
+        for idx2 in self.grid.neighbors[idx]:
+            cluster._perimeter[idx2] = 1
+
+        for idx2 in self.grid.neighbors[idx]:
+            if self._types.get(idx2) == r_type:
+                self._union(idx, idx2)
+
+    def _union(self, idx1: int, idx2: int) -> None:
+        root1, root2 = self.find(idx1), self.find(idx2)
+        if root1 == root2:
+            return
+        cluster1, cluster2 = self._clusters[root1], self._clusters[root2]
+        # the largest cluster absorbs the other one
+        if len(cluster1) < len(cluster2):
+            root1, root2 = root2, root1
+            cluster1, cluster2 = cluster2, cluster1
+        self._parent[root2] = root1
+        del self._clusters[root2]
+
+        tiles = cluster1.tiles
+        perimeter = cluster1._perimeter
+        # cells around one cluster can be tiles of the other one
+        for idx in cluster2.tiles:
+            perimeter.pop(idx, None)
+        for idx, count in cluster2._perimeter.items():
+            if idx not in tiles:
+                perimeter[idx] = perimeter.get(idx, 0) + count
+        tiles.update(cluster2.tiles)
+        cluster1.amount += cluster2.amount
+        cluster1._sum_x += cluster2._sum_x
+        cluster1._sum_y += cluster2._sum_y
+
+    def _remove(self, idx: int) -> None:
+        root = self.find(idx)
+        cluster = self._clusters[root]
+        cluster.tiles.remove(idx)
+        cluster.amount -= self._amounts.pop(idx)
+        del self._types[idx]
+        cluster._sum_x -= self.grid.xs[idx]
+        cluster._sum_y -= self.grid.ys[idx]
+
+        # the depleted tile stays in the union-find to keep the other tiles
+        # linked to their root, it becomes part of the perimeter instead
+        perimeter = cluster._perimeter
+        count = 0
+        for idx2 in self.grid.neighbors[idx]:
+            if idx2 in cluster.tiles:
+                count += 1
+            elif idx2 in perimeter:
+                perimeter[idx2] -= 1
+                if not perimeter[idx2]:
+                    del perimeter[idx2]
+        if count:
+            perimeter[idx] = count
+
+    def free_perimeter(
+        self, cluster: ResourceCluster, game_map: GameMap
+    ) -> List[Position]:
+        """
+        Cells around the cluster without resource nor city tile, where a city
+        tile could be built
+        """
+        cells = game_map.cells
+        return [
+            cells[idx].pos
+            for idx in cluster._perimeter
+            if cells[idx].citytile is None and not cells[idx].has_resource()
+        ]
+
+    def nearest(
+        self,
+        pos: Position,
+        min_amount: int = 0,
+        r_types: Optional[Iterable[str]] = None,
+    ) -> Optional[ResourceCluster]:
+        """
+        Cluster with at least min_amount resources whose centroid is the
+        closest to pos, restricted to r_types if given
+        """
+        best = None
+        best_dist = None
+        for cluster in self:
+            if cluster.amount < min_amount:
+                continue
+            if r_types is not None and cluster.type not in r_types:
+                continue
+            centroid = cluster.centroid
+            dist = abs(centroid.x - pos.x) + abs(centroid.y - pos.y)
+            if best is None or dist < best_dist:
+                best = cluster
+                best_dist = dist
+        return best
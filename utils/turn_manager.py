@@ -1,58 +1,240 @@
-import math
-from typing import Dict, List, Optional, Set
+import time
+from typing import Dict, List, Optional, Union
+
+import numpy as np
 
 from lux import annotate
 from lux.constants import Constants
 from lux.game import Game
+from lux.game_constants import GAME_CONSTANTS
 from lux.game_map import Cell, GameMap, Position
-from lux.game_objects import Unit
-
-from utils.map import get_closest_cell
+from lux.game_objects import City, CityTile, Unit
+
+from utils.assignment import UNREACHABLE_COST, assign
+from utils.distance_field import DistanceField, DistanceFields
+from utils.fuel_forecast import FuelForecast, cargo_fuel
+from utils.logger import INFO, WARNING, TurnLogger
+from utils.path_cache import PathCache
+from utils.path_finder import UNREACHABLE, astar_indices, multi_source_bfs
+from utils.profiler import Profiler
+from utils.reservation import CooperativePathFinder, ReservationTable
+from utils.resource_clusters import ResourceCluster, ResourceClusters
 
 DIRECTIONS = Constants.DIRECTIONS
+RESOURCE_TYPES = Constants.RESOURCE_TYPES
 game_state = None
 
 unit_objectives = {}
-
+path_cache = PathCache()
+# resource clusters of the map, patched on the turns they are used
+resource_clusters = None
+# timers and counters of each turn, enabled by the PROFILE configuration
+profiler = Profiler()
+# file the profile of the game is written to at its end
+profile_path = None
+# messages are buffered and written to LOG_PATH at the end of each turn
+logger = TurnLogger()
+# connection to the inference server, kept for the whole game
+policy_client = None
+# duration of a planner rollout measured on the previous turns
+planner_rollout_time = None
+
+_DEFAULT_LOG_PATH = "log.txt"
 _DEFAULT_MAX_CITIES = 3
 _DEFAULT_MAX_UNITS = 2
+# number of turns units plan ahead around each other, 0 to only avoid the
+# cells our units will be in next turn
+_DEFAULT_PATH_WINDOW = 4
+# spread the gathering units over the resource tiles with a min-cost assignment
+# computed within ASSIGNMENT_BUDGET seconds, instead of following the resource
+# field to the nearest tile. Off until it is shown to play better
+_DEFAULT_ASSIGN_TARGETS = False
+_DEFAULT_ASSIGNMENT_BUDGET = 0.05
+# number of closest resource tiles of each unit in the assignment
+_ASSIGNMENT_CANDIDATES = 5
+# seconds the turn may take, counted from the start of the turn; once they are
+# spent the remaining units move straight toward their target instead of
+# searching a path. None to always plan every unit fully
+_DEFAULT_TURN_BUDGET = None
+# city tiles are built next to the nearest resource cluster with at least
+# BUILD_CLUSTER_AMOUNT resources, when it has free cells next to the city or
+# when there is no city left to grow. None to only grow the nearest city
+_DEFAULT_BUILD_CLUSTER_AMOUNT = 1000
+# improve the actions given by the rules with a beam search over the next
+# PLANNER_DEPTH turns, for at most PLANNER_BUDGET seconds of the turn
+_DEFAULT_PLANNER = False
+_DEFAULT_PLANNER_BUDGET = 0.1
+_DEFAULT_PLANNER_DEPTH = 3
+_DEFAULT_PLANNER_WIDTH = 4
+# Unix socket of a utils.inference server whose policy chooses the actions of
+# the units, the city tiles still follow the rules. None to only use the rules
+_DEFAULT_POLICY_SOCKET = None
+# seconds the agent waits for the inference server, at most what is left of
+# TURN_BUDGET. The rules play the units if the server does not answer
+_DEFAULT_POLICY_TIMEOUT = 1.0
+
+
+def end_game() -> None:
+    """
+    Write the profile of the game, report and reset the path cache, release
+    the log file and its writer thread and the connection to the inference
+    server, at the end of a game. Games may end before their last turn, when
+    a team has nothing left.
+    """
+    if profile_path and profiler.turns:
+        profiler.write(profile_path)
+        profiler.turns = []
+    if path_cache.hits + path_cache.misses and logger.team == 0:
+        logger.log(str(path_cache))
+    path_cache.reset()
+    logger.close()
+    _close_policy_client()
+
+
+def _close_policy_client() -> None:
+    global policy_client
+
+    if policy_client is not None:
+        policy_client.close()
+        policy_client = None
 
 
 class TurnManager:
     def __init__(self, observation, configuration):
-        global game_state
+        global profile_path
+
+        self.turn_start = time.perf_counter()
+        configuration = configuration or {}
+        profile_path = configuration.get("PROFILE")
+        profiler.enabled = bool(profile_path)
+        profiler.start_turn()
 
         ### Do not edit ###
-        if observation["step"] == 0:
-            game_state = Game()
-            game_state._initialize(observation["updates"])
-            game_state._update(observation["updates"][2:])
-            game_state.id = observation.player
-        else:
-            game_state._update(observation["updates"])
+        with profiler.phase("update"):
+            self._update_game_state(observation)
 
         ### AI Code goes down here! ###
         self.player = game_state.players[observation.player]
         self.opponent = game_state.players[(observation.player + 1) % 2]
+        logger.path = configuration.get("LOG_PATH", _DEFAULT_LOG_PATH)
+        logger.level = configuration.get("LOG_LEVEL", INFO)
+        logger.start_turn(game_state.turn, self.player.team)
 
         self._resource_tiles = None
         self._city_tiles = None
+        self._clusters_updated = False
+        self._fuel_forecast = None
 
-        configuration = configuration or {}
         self.max_cities = configuration.get("MAX_CITIES", _DEFAULT_MAX_CITIES)
         self.max_units = configuration.get("MAX_UNITS", _DEFAULT_MAX_UNITS)
+        self.path_window = configuration.get("PATH_WINDOW", _DEFAULT_PATH_WINDOW)
+        self.assign_targets = configuration.get(
+            "ASSIGN_TARGETS", _DEFAULT_ASSIGN_TARGETS
+        )
+        self.assignment_budget = configuration.get(
+            "ASSIGNMENT_BUDGET", _DEFAULT_ASSIGNMENT_BUDGET
+        )
+        self.turn_budget = configuration.get("TURN_BUDGET", _DEFAULT_TURN_BUDGET)
+        self.build_cluster_amount = configuration.get(
+            "BUILD_CLUSTER_AMOUNT", _DEFAULT_BUILD_CLUSTER_AMOUNT
+        )
+        self.planner = None
+        if configuration.get("PLANNER", _DEFAULT_PLANNER):
+            # the planner runs the offline simulator, only loaded when enabled
+            from utils.beam_planner import BeamPlanner
+
+            self.planner = BeamPlanner(
+                self.player.team,
+                depth=configuration.get("PLANNER_DEPTH", _DEFAULT_PLANNER_DEPTH),
+                width=configuration.get("PLANNER_WIDTH", _DEFAULT_PLANNER_WIDTH),
+                max_city_tiles=self.max_cities,
+                rollout_time=planner_rollout_time,
+            )
+        self.planner_budget = configuration.get(
+            "PLANNER_BUDGET", _DEFAULT_PLANNER_BUDGET
+        )
+        self.policy_socket = configuration.get("POLICY_SOCKET", _DEFAULT_POLICY_SOCKET)
+        self.policy_timeout = configuration.get(
+            "POLICY_TIMEOUT", _DEFAULT_POLICY_TIMEOUT
+        )
+        # units moved without a search because the turn budget was spent
+        self.fallback_count = 0
 
         self.unit_count_forcast = len(self.player.units)
         self.citytile_count_forcast = self.player.city_tile_count
+        self.astar_stats = {"expanded": 0}
+        self.astar_count = 0
+        self.assignment_bfs_count = 0
+
+        with profiler.phase("setup"):
+            self._setup_planning()
+
+    def _setup_planning(self) -> None:
+        # shared by all units, so that the number of searches per turn does not
+        # grow with the number of units
+        self.distance_fields = DistanceFields(self.map, self.player.team)
+
+        # units stay where they are until they are given a move, those in
+        # cooldown for the whole window
+        self.reservations = ReservationTable(
+            self.width, self.height, shared=self.map.citytile_mask([self.player.team])
+        )
+        for unit in self.player.units:
+            stay = max(self.path_window, 1) if not unit.can_act() else 1
+            for t in range(1, stay + 1):
+                self.reservations.reserve(unit.pos, t, unit.id)
 
-        self.future_unit_pos: Dict[Unit, Position] = {
-            unit: unit.pos for unit in self.player.units
-        }
+        self.path_finder = CooperativePathFinder(
+            self.distance_fields.passable, self.reservations, self.path_window
+        )
+
+        path_cache.prune([unit.id for unit in self.player.units])
+
+    @staticmethod
+    def _update_game_state(observation) -> None:
+        global game_state, resource_clusters
+
+        if observation["step"] == 0:
+            resource_clusters = None
+            _close_policy_client()
+        if "block" in observation:
+            # raw turn read by main.py
+            TurnManager._update_game_state_from_block(observation)
+        elif observation["step"] == 0:
+            game_state = Game()
+            game_state._initialize(observation["updates"])
+            game_state._update(observation["updates"][2:])
+            game_state.id = observation.player
+        else:
+            game_state._update(observation["updates"])
+
+    @staticmethod
+    def _update_game_state_from_block(observation) -> None:
+        global game_state
+
+        block = observation["block"]
+        if observation["step"] == 0:
+            player_id, map_size, block = block.split(b"\n", 2)
+            game_state = Game()
+            game_state._initialize([player_id.decode(), map_size.decode()])
+            game_state.id = observation.player
+        game_state._update_block(block)
 
     def play_turn(self):
+        global planner_rollout_time
+
         actions = []
-        # we iterate over all our units and do something with them
-        for unit in self.player.units:
+
+        resource_targets: Dict[str, Position] = {}
+        if self.assign_targets and not self.is_over_budget():
+            with profiler.phase("assignment"):
+                resource_targets = self.assign_resource_tiles(
+                    [unit for unit in self.player.units if self.is_gathering(unit)]
+                )
+
+        # we iterate over all our units and do something with them, those
+        # feeding the cities first in case the turn budget runs out
+        for unit in sorted(self.player.units, key=self.unit_priority):
 
             objective_position = self.get_objective(unit)
 
@@ -62,11 +244,15 @@ class TurnManager:
                     objective_position is None
                     and self.citytile_count_forcast < self.max_cities
                     and unit.has_enough_resource()
+                    and not self.is_over_budget()
                 ):
                     # get new objective for the unit
-                    closest_cell = self.get_next_city_cell(unit.pos)
-                    self.set_objective(unit, closest_cell.pos)
-                    objective_position = closest_cell.pos
+                    with profiler.phase("objectives"):
+                        closest_cell = self.get_next_city_cell(unit.pos)
+                    # there may be no free cell left around the unit
+                    if closest_cell is not None:
+                        self.set_objective(unit, closest_cell.pos)
+                        objective_position = closest_cell.pos
 
                 if (
                     objective_position is not None
@@ -90,101 +276,263 @@ class TurnManager:
 
                 elif unit.get_cargo_space_left() > 0:
 
-                    # if the unit is a worker and we have space in cargo, lets find the nearest resource tile and try to mine it
-                    closest_resource_tile = self.get_closest_resource_tile(unit)
-
-                    if closest_resource_tile is not None:
-                        actions += self.get_path_direction(
-                            unit, closest_resource_tile.pos
-                        )
+                    # if the unit is a worker and we have space in cargo, lets go to a resource tile and try to mine it
+                    target = resource_targets.get(unit.id)
+                    if target is not None:
+                        actions += self.get_path_direction(unit, target)
+                    elif self.is_over_budget():
+                        cell = self.get_closest_resource_tile(unit)
+                        actions += self.fallback_move(unit, cell and cell.pos)
+                    else:
+                        with profiler.phase("targets"):
+                            field = self.distance_fields.resources(
+                                self.researched_resource_types
+                            )
+                        actions += self.move_along(unit, field)
                 else:
                     # if unit is a worker and there is no cargo space left, and we have cities, lets return to them
-                    if len(self.player.cities) > 0:
-
-                        # closest_city_tile = self.get_closest_city_tile(unit)
-                        closest_city_tile = self.get_closest_poorest_city_tile(unit)
-
-                        if closest_city_tile is not None:
-                            actions += self.get_path_direction(
-                                unit, closest_city_tile.pos
+                    if len(self.player.cities) > 0 and self.is_over_budget():
+                        cell = self.get_closest_poorest_city_tile(unit)
+                        actions += self.fallback_move(unit, cell.pos)
+                        self.plan_delivery(unit, cell.citytile.cityid)
+                    elif len(self.player.cities) > 0:
+
+                        with profiler.phase("targets"):
+                            poorest_city = self.get_poorest_city()
+                            field = self.distance_fields.to_positions(
+                                ("city", poorest_city.cityid),
+                                [city_tile.pos for city_tile in poorest_city.citytiles],
                             )
-
-        for _, city in self.player.cities.items():
-            for city_tile in city.citytiles:
-                if city_tile.cooldown < 1:
-                    if (
-                        self.player.city_tile_count > len(self.player.units)
-                        and self.unit_count_forcast < self.max_units
-                    ):
-                        actions.append(city_tile.build_worker())
-                        self.unit_count_forcast += 1
-                    # TODO: else research
+                        actions += self.move_along(unit, field)
+                        self.plan_delivery(unit, poorest_city.cityid)
+
+        with profiler.phase("city_actions"):
+            for _, city in self.player.cities.items():
+                for city_tile in city.citytiles:
+                    if city_tile.cooldown < 1:
+                        if (
+                            self.player.city_tile_count > len(self.player.units)
+                            and self.unit_count_forcast < self.max_units
+                        ):
+                            actions.append(city_tile.build_worker())
+                            self.unit_count_forcast += 1
+                        # TODO: else research
+
+        if self.policy_socket is not None:
+            with profiler.phase("policy"):
+                actions = self.apply_policy(actions)
+
+        if self.planner is not None and not self.is_over_budget():
+            deadline = time.perf_counter() + self.planner_budget
+            if self.turn_budget is not None:
+                deadline = min(deadline, self.turn_start + self.turn_budget)
+            with profiler.phase("planner"):
+                actions = self.planner.plan(game_state, actions, deadline)
+            planner_rollout_time = self.planner.rollout_time
+            if profiler.enabled:
+                profiler.add("rollouts", self.planner.rollouts)
+
+        if self.fallback_count:
+            self.log(
+                f"turn budget spent, {self.fallback_count} units moved without search",
+                WARNING,
+                fallbacks=self.fallback_count,
+            )
+        if profiler.enabled:
+            self._end_profiled_turn()
+        logger.end_turn()
+        if game_state.turn == GAME_CONSTANTS["PARAMETERS"]["MAX_DAYS"] - 1:
+            end_game()
         return actions
 
+    def apply_policy(self, actions: List[str]) -> List[str]:
+        """
+        Replace the actions of the units that can act by those of the policy,
+        the actions are kept if the inference server cannot be reached in time
+        """
+        global policy_client
+
+        from utils.beam_planner import split_actions
+        from utils.inference import InferenceClient
+
+        timeout = self.policy_timeout
+        if self.turn_budget is not None:
+            remaining = self.turn_start + self.turn_budget - time.perf_counter()
+            timeout = min(timeout, max(remaining, 0.001))
+        try:
+            if policy_client is None:
+                policy_client = InferenceClient(self.policy_socket, timeout)
+            policy_client.socket.settimeout(timeout)
+            policy_actions = policy_client.unit_actions(game_state, self.player.team)
+        except OSError as error:
+            self.log(f"no policy from the inference server: {error!r}", WARNING)
+            # a late answer would be read as the one of the next request
+            _close_policy_client()
+            return actions
+        annotations, joint = split_actions(actions)
+        joint.update(policy_actions)
+        return annotations + [action for action in joint.values() if action]
+
+    def _end_profiled_turn(self) -> None:
+        """
+        Record the searches of the turn
+        """
+        profiler.add("units", len(self.player.units))
+        profiler.add("bfs", self.distance_fields.bfs_count + self.assignment_bfs_count)
+        profiler.add("astar", self.astar_count)
+        profiler.add("fallbacks", self.fallback_count)
+        profiler.add(
+            "cells_expanded",
+            self.distance_fields.cells_expanded()
+            + self.astar_stats["expanded"]
+            + self.path_finder.expanded,
+        )
+        profiler.end_turn(game_state.turn)
+
+        if game_state.turn == 0:
+            profiler.turns = profiler.turns[-1:]
+            profiler.info = {
+                "team": self.player.team,
+                "width": self.width,
+                "height": self.height,
+            }
+
+    def is_over_budget(self) -> bool:
+        """
+        Whether the time budget of the turn is spent
+        """
+        return (
+            self.turn_budget is not None
+            and time.perf_counter() - self.turn_start > self.turn_budget
+        )
+
+    @staticmethod
+    def unit_priority(unit: Unit):
+        """
+        Sort key of the units: the ones that can act first, then those
+        carrying the most resources, on their way to build or feed a city
+        """
+        return not unit.can_act(), unit.get_cargo_space_left()
+
+    def is_gathering(self, unit: Unit) -> bool:
+        """
+        Whether the unit will go mine this turn
+        """
+        return unit.is_worker() and unit.can_act() and unit.get_cargo_space_left() > 0
+
+    def assign_resource_tiles(self, units: List[Unit]) -> Dict[str, Position]:
+        """
+        Resource tile each unit should mine, minimizing the total distance
+        walked by the units instead of sending each one to its closest tile
+        """
+        targets = self.map.get_resource_cells(self.researched_resource_types)
+        if not units or not targets:
+            return {}
+        target_xs = np.array([cell.pos.x for cell in targets])
+        target_ys = np.array([cell.pos.y for cell in targets])
+
+        # one search per unit, all run at once
+        sources = np.zeros((len(units), self.height, self.width), dtype=bool)
+        for i, unit in enumerate(units):
+            sources[i, unit.pos.y, unit.pos.x] = True
+        dist = multi_source_bfs(self.distance_fields.passable, sources)
+        self.assignment_bfs_count += len(units)
+        if profiler.enabled:
+            profiler.add("cells_expanded", int(np.count_nonzero(dist != UNREACHABLE)))
+
+        cost = dist[:, target_ys, target_xs].astype(float)
+        cost[cost == UNREACHABLE] = UNREACHABLE_COST
+
+        # only keep the closest tiles of each unit
+        if cost.shape[1] > _ASSIGNMENT_CANDIDATES * len(units):
+            nearest = np.argpartition(cost, _ASSIGNMENT_CANDIDATES - 1, axis=1)
+            cols = np.unique(nearest[:, :_ASSIGNMENT_CANDIDATES])
+            cost = cost[:, cols]
+            target_xs, target_ys = target_xs[cols], target_ys[cols]
+
+        budget = self.assignment_budget
+        if self.turn_budget is not None:
+            remaining = self.turn_budget - (time.perf_counter() - self.turn_start)
+            budget = max(0.0, min(budget, remaining))
+        assignment = assign(cost, budget=budget)
+        return {
+            units[row].id: Position(int(target_xs[col]), int(target_ys[col]))
+            for row, col in assignment.items()
+        }
+
     def get_closest_resource_tile(self, unit: Unit) -> Optional[Cell]:
-        closest_dist = math.inf
-        for resource_tile in self.resource_tiles:
-            pos = resource_tile.pos
-            if (
-                resource_tile.resource.type == Constants.RESOURCE_TYPES.COAL
-                and not self.player.researched_coal()
-            ):
-                continue
-            if (
-                resource_tile.resource.type == Constants.RESOURCE_TYPES.URANIUM
-                and not self.player.researched_uranium()
-            ):
-                continue
-            if pos != unit.pos and pos in list(self.future_unit_pos.values()):
-                continue
-
-            dist = resource_tile.pos.distance_to(unit.pos)
-            if dist < closest_dist:
-                closest_dist = dist
-                closest_resource_tile = resource_tile
-
-        return closest_resource_tile
-
-    def get_closest_city_tile(self, unit: Unit):
-        # TODO: use get_closest_cell instead
-        closest_dist = math.inf
-        closest_city_tile = None
-        for k, city in self.player.cities.items():
-            for city_tile in city.citytiles:
-                dist = city_tile.pos.distance_to(unit.pos)
-                if dist < closest_dist:
-                    closest_dist = dist
-                    closest_city_tile = city_tile
-
-        return closest_city_tile
-
-    def get_poorest_city(self):
-        cities = sorted(list(self.player.cities.values()), key=lambda city: city.fuel)
-        return cities[0] if cities else None
+        r_types = self.researched_resource_types
 
-    def get_closest_poorest_city_tile(self, unit: Unit) -> Cell:
-        poorest_city = self.get_poorest_city()
+        def is_target(cell: Cell) -> bool:
+            return (
+                cell.has_resource()
+                and cell.resource.type in r_types
+                and not self.reservations.is_reserved(cell.pos, 1, unit.id)
+            )
 
-        if poorest_city is None:
-            return None
+        return self.map.resource_index.nearest(unit.pos, is_target)
 
-        possible_cells = [
-            game_state.map.get_cell_by_pos(city_tile.pos)
-            for city_tile in poorest_city.citytiles
-        ]
+    def get_closest_city_tile(self, unit: Unit) -> Optional[CityTile]:
+        return self.map.citytile_index.nearest(
+            unit.pos, lambda city_tile: city_tile.team == self.player.team
+        )
 
-        return get_closest_cell(unit, possible_cells)
+    def get_poorest_city(self) -> Optional[City]:
+        """
+        City going dark the soonest, counting the fuel our units are already
+        bringing to the cities this turn
+        """
+        return self.fuel_forecast.most_urgent()
 
-    def get_next_city_cell(self, pos: Position) -> Optional[Cell]:
+    def plan_delivery(self, unit: Unit, cityid: str) -> None:
+        self.fuel_forecast.deliver(cityid, cargo_fuel(unit))
 
-        possible_cells: Set[Cell] = set()
-        for cell in self.city_tiles:
-            pos_list = self.map.get_plus_neighbors(cell.pos)
-            for pos in pos_list:
-                possible_cells.add(self.map[pos])
+    def get_closest_poorest_city_tile(self, unit: Unit) -> Cell:
+        poorest_city = self.get_poorest_city()
 
-        if possible_cells:
-            return get_closest_cell(pos, possible_cells)
+        if poorest_city is None:
+            return None
+
+        city_tile = self.map.citytile_index.nearest(
+            unit.pos,
+            lambda city_tile: city_tile.team == self.player.team
+            and city_tile.cityid == poorest_city.cityid,
+        )
+        return self.map.get_cell_by_pos(city_tile.pos)
+
+    def get_next_city_cell(self, pos: Union[Position, int]) -> Optional[Cell]:
+        if type(pos) is int:
+            pos = self.map.position(pos)
+
+        build_sites = self.distance_fields.build_sites()
+        cluster = self.build_cluster(pos)
+        if cluster is not None:
+            cluster_sites = self.resource_clusters.free_perimeter(cluster, self.map)
+            # grow the city on the side of the cluster, whose tiles then fuel
+            # the new city tile without a trip
+            next_to_city = [
+                site for site in cluster_sites if build_sites.distance(site) == 0
+            ]
+            if next_to_city:
+                field = self.distance_fields.to_positions(
+                    ("cluster_build_sites", cluster.id), next_to_city
+                )
+                build_site = field.nearest_source(pos)
+                if build_site is not None:
+                    return self.map.get_cell_by_pos(build_site)
+
+        build_site = build_sites.nearest_source(pos)
+        if build_site is not None:
+            return self.map.get_cell_by_pos(build_site)
+
+        # no city left to grow, found a new one next to the cluster
+        if cluster is not None and cluster_sites:
+            field = self.distance_fields.to_positions(
+                ("cluster_sites", cluster.id), cluster_sites
+            )
+            build_site = field.nearest_source(pos)
+            if build_site is not None:
+                return self.map.get_cell_by_pos(build_site)
 
         # if no possible cell, return first ad
         possible_cells = [
@@ -196,26 +544,120 @@ class TurnManager:
 
         return None
 
+    def build_cluster(self, pos: Position) -> Optional[ResourceCluster]:
+        """
+        Nearest resource cluster we can mine with at least BUILD_CLUSTER_AMOUNT
+        resources, None if disabled
+        """
+        if self.build_cluster_amount is None:
+            return None
+        return self.resource_clusters.nearest(
+            pos, self.build_cluster_amount, self.researched_resource_types
+        )
+
     def get_path_direction(
-        self, unit: Unit, target_pos: Position, allow_own_city: bool = False
-    ):
+        self, unit: Unit, target_pos: Union[Position, int]
+    ) -> List[str]:
+        """
+        Move the unit along its path toward target_pos. The path is kept across
+        turns and only searched again once it is blocked. target_pos is a
+        Position or a cell index.
+        """
+        if type(target_pos) is int:
+            target_pos = self.map.position(target_pos)
+        with profiler.phase("pathfinding"):
+            return self._get_path_direction(unit, target_pos)
+
+    def _get_path_direction(self, unit: Unit, target_pos: Position) -> List[str]:
         actions = []
-        allowed_teams = [self.player.team] if allow_own_city else []
-
-        unit_positions = [
-            pos
-            for pos in list(self.future_unit_pos.values())
-            if not self.map[pos].citytile
-        ]
-
-        direction = game_state.map.get_path_direction(
-            unit.pos,
+        blocked = ~self.distance_fields.passable
+        path = path_cache.get(
+            unit.id,
             target_pos,
-            allowed_city_teams=allowed_teams,
-            unit_positions=unit_positions,
+            unit.pos,
+            blocked,
+            lambda pos: self.reservations.is_reserved(pos, 1, unit.id),
         )
+
+        grid = self.map.grid
+        unit_idx = self.map.index(unit.pos)
+        if path is None:
+            # go around the units that are already in the way
+            walls = blocked.ravel().tolist()
+            for idx in grid.neighbors[unit_idx]:
+                if self.reservations.is_reserved_index(idx, 1, unit.id):
+                    walls[idx] = True
+            target_idx = self.map.index(target_pos)
+            walls[target_idx] = False
+
+            if self.is_over_budget():
+                return self.fallback_move(unit, target_pos)
+            indices = astar_indices(
+                walls, self.width, unit_idx, target_idx, self.astar_stats
+            )
+            self.astar_count += 1
+            if indices is not None:
+                path = [(grid.xs[idx], grid.ys[idx]) for idx in indices]
+                path_cache.put(unit.id, target_pos, path)
+
+        self.reservations.release(unit.id)
+        if path is None or len(path) < 2:
+            direction = DIRECTIONS.CENTER
+            path = [(unit.pos.x, unit.pos.y)]
+        else:
+            x, y = path[1]
+            direction = DIRECTIONS.get_from_coord(x - unit.pos.x, y - unit.pos.y)
+        for t in range(1, max(self.path_window, 1) + 1):
+            x, y = path[min(t, len(path) - 1)]
+            self.reservations.reserve_index(y * self.width + x, t, unit.id)
+
+        actions.append(unit.move(direction))
+        return actions
+
+    def fallback_move(
+        self, unit: Unit, target_pos: Optional[Union[Position, int]]
+    ) -> List[str]:
+        """
+        Step straight toward target_pos without any search, or stay put when
+        the cell is an enemy city tile or taken by another of our units
+        """
+        if type(target_pos) is int:
+            target_pos = self.map.position(target_pos)
+        self.fallback_count += 1
+        direction = DIRECTIONS.CENTER
+        if target_pos is not None:
+            direction = unit.pos.direction_to(target_pos)
+        next_pos = unit.pos.translate(direction)
+        if direction != DIRECTIONS.CENTER and (
+            self.map.citytile_team[next_pos.y, next_pos.x] == self.opponent.team
+            or self.reservations.is_reserved(next_pos, 1, unit.id)
+        ):
+            direction = DIRECTIONS.CENTER
+            next_pos = unit.pos
+
+        self.reservations.release(unit.id)
+        for t in range(1, max(self.path_window, 1) + 1):
+            self.reservations.reserve(next_pos, t, unit.id)
+        return [unit.move(direction)]
+
+    def move_along(self, unit: Unit, field: DistanceField) -> List[str]:
+        """
+        Move the unit one step down the field, around the cells reserved by our
+        other units. Units can stack on city tiles.
+        """
+        actions = []
+        with profiler.phase("pathfinding"):
+            if self.path_window > 0:
+                direction = self.path_finder.plan(unit.id, unit.pos, field)
+            else:
+                direction = field.direction_index(
+                    self.map.index(unit.pos),
+                    lambda idx: self.reservations.is_reserved_index(idx, 1, unit.id),
+                )
+                self.reservations.release(unit.id)
+                self.reservations.reserve(unit.pos.translate(direction), 1, unit.id)
+
         actions.append(unit.move(direction))
-        self.future_unit_pos[unit] = unit.pos.translate(direction)
         return actions
 
     @property
@@ -230,44 +672,62 @@ class TurnManager:
     def height(self) -> int:
         return game_state.map.height
 
+    @property
+    def researched_resource_types(self) -> List[str]:
+        r_types = [RESOURCE_TYPES.WOOD]
+        if self.player.researched_coal():
+            r_types.append(RESOURCE_TYPES.COAL)
+        if self.player.researched_uranium():
+            r_types.append(RESOURCE_TYPES.URANIUM)
+        return r_types
+
     @property
     def resource_tiles(self) -> List[Cell]:
         if self._resource_tiles is None:
-            self._resource_tiles = []
-            for y in range(self.height):
-                for x in range(self.width):
-                    cell = game_state.map.get_cell(x, y)
-                    if cell.has_resource():
-                        self.resource_tiles.append(cell)
+            self._resource_tiles = self.map.get_resource_cells()
 
         return self._resource_tiles
 
     @property
     def city_tiles(self) -> List[Cell]:
-        # TODO: cache this instead
+        if self._city_tiles is None:
+            self._city_tiles = self.map.get_citytile_cells(self.player.team)
+
+        return self._city_tiles
+
+    @property
+    def fuel_forecast(self) -> FuelForecast:
+        if self._fuel_forecast is None:
+            self._fuel_forecast = FuelForecast(
+                self.player.cities.values(), game_state.turn
+            )
+
+        return self._fuel_forecast
+
+    @property
+    def resource_clusters(self) -> ResourceClusters:
+        global resource_clusters
+        if resource_clusters is None:
+            resource_clusters = ResourceClusters(self.width, self.height)
+        if not self._clusters_updated:
+            with profiler.phase("clusters"):
+                resource_clusters.update(self.map)
+            self._clusters_updated = True
 
-        res = []
-        for y in range(self.height):
-            for x in range(self.width):
-                cell = game_state.map.get_cell(x, y)
-                city_tile = cell.citytile
-                if city_tile is not None and city_tile.team == self.player.team:
-                    res.append(cell)
-        return res
+        return resource_clusters
 
     def get_objective(self, unit: Unit) -> Position:
         return unit_objectives.get(unit)
 
     def clear_objective(self, unit: Unit) -> None:
         del unit_objectives[unit]
+        path_cache.drop(unit.id)
 
     def set_objective(self, unit: Unit, position: Position) -> None:
         unit_objectives[unit] = position
 
-    def log(self, message: str):
+    def log(self, message: str, level: int = INFO, **fields):
         if self.player.team != 0:
             return
 
-        with open("log.txt", "a") as f:
-            message = f"[Turn {game_state.turn}]Team {self.player.team}: {message}\n"
-            f.write(message)
+        logger.log(message, level, **fields)